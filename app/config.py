@@ -7,10 +7,100 @@ load_dotenv()
 
 class Settings(BaseModel):
     ALADIN_TTB_KEY: str = os.getenv("ALADIN_TTB_KEY", "")
+    ALADIN_BASE_URL: str = os.getenv("ALADIN_BASE_URL", "")  # 비우면 공식 API (테스트용 스텁 서버 지정)
     # ALADIN_PARTNER: str = os.getenv("ALADIN_PARTNER", "")
     EMBEDDING_PROVIDER: str = os.getenv("EMBEDDING_PROVIDER", "sbert")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    # OpenAI 임베딩: 청크 예산, 동시성, 재시도, 차원 축소(0 = 모델 기본)
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")
+    OPENAI_TIMEOUT: float = float(os.getenv("OPENAI_TIMEOUT", 30))
+    OPENAI_CLIENTS_MAX: int = int(os.getenv("OPENAI_CLIENTS_MAX", 64))
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", 4))
+    OPENAI_BACKOFF_BASE: float = float(os.getenv("OPENAI_BACKOFF_BASE", 0.5))
+    OPENAI_BACKOFF_MAX: float = float(os.getenv("OPENAI_BACKOFF_MAX", 8))
+    OPENAI_EMBED_MAX_ITEMS: int = int(os.getenv("OPENAI_EMBED_MAX_ITEMS", 256))
+    OPENAI_EMBED_MAX_TOKENS: int = int(os.getenv("OPENAI_EMBED_MAX_TOKENS", 100000))  # textprep.estimate_tokens 기준 (한국어는 실제 토큰이 약 2배)
+    OPENAI_EMBED_CONCURRENCY: int = int(os.getenv("OPENAI_EMBED_CONCURRENCY", 4))
+    OPENAI_EMBED_DIMENSIONS: int = int(os.getenv("OPENAI_EMBED_DIMENSIONS", 0))
+    # EMBEDDING_PROVIDER=sbert-onnx 용 (python -m app.core.onnx_encoder 로 생성)
+    ONNX_MODEL_DIR: str = os.getenv("ONNX_MODEL_DIR", "models/kr-sbert-onnx")
+    ONNX_QUANTIZED: bool = os.getenv("ONNX_QUANTIZED", "1") == "1"
+    ONNX_INTRA_OP_THREADS: int = int(os.getenv("ONNX_INTRA_OP_THREADS", 0))
+    # 기동 시 임베딩 모델 사전 로드/워밍업
+    EMBEDDING_WARMUP: bool = os.getenv("EMBEDDING_WARMUP", "1") == "1"
+    # 임베딩 마이크로배칭 워커
+    EMBED_MAX_BATCH: int = int(os.getenv("EMBED_MAX_BATCH", 64))
+    EMBED_MAX_WAIT_MS: float = float(os.getenv("EMBED_MAX_WAIT_MS", 5))
+    EMBED_WORKER_THREADS: int = int(os.getenv("EMBED_WORKER_THREADS", 1))
+    # 책 텍스트 토큰 예산 (근사치, 0 = 자르지 않음). 바꾸면 저장된 임베딩은 다시 계산됨
+    EMBED_MAX_TOKENS: int = int(os.getenv("EMBED_MAX_TOKENS", 128))
+    # 책 임베딩 영구 저장소 (비우면 비활성)
+    EMBEDDING_DB: str = os.getenv("EMBEDDING_DB", "squin.db")
+    # 같은 파일을 여러 연결이 쓸 때 쓰기 잠금 대기 상한(초). 연결은 WAL 모드로 열림
+    SQLITE_BUSY_TIMEOUT_S: float = float(os.getenv("SQLITE_BUSY_TIMEOUT_S", 10))
+    # 로컬 카탈로그(BookCache) 및 FAISS 인덱스
+    CATALOGUE_DB: str = os.getenv("CATALOGUE_DB", os.getenv("EMBEDDING_DB", "squin.db"))
+    VECTOR_INDEX_ON_STARTUP: bool = os.getenv("VECTOR_INDEX_ON_STARTUP", "1") == "1"
+    VECTOR_INDEX_TYPE: str = os.getenv("VECTOR_INDEX_TYPE", "hnsw")  # flat | hnsw | ivf | ivfpq | mmap
+    VECTOR_INDEX_NLIST: int = int(os.getenv("VECTOR_INDEX_NLIST", 256))
+    VECTOR_INDEX_NPROBE: int = int(os.getenv("VECTOR_INDEX_NPROBE", 16))
+    VECTOR_INDEX_PQ_M: int = int(os.getenv("VECTOR_INDEX_PQ_M", 64))
+    VECTOR_INDEX_HNSW_M: int = int(os.getenv("VECTOR_INDEX_HNSW_M", 32))
+    VECTOR_INDEX_EF_SEARCH: int = int(os.getenv("VECTOR_INDEX_EF_SEARCH", 128))
+    # mmap: 양자화 벡터 파일을 np.memmap으로 열어 정확 검색 (없으면 카탈로그에서 생성)
+    VECTOR_STORE_DIR: str = os.getenv("VECTOR_STORE_DIR", "models/catalogue-vectors")
+    VECTOR_STORE_DTYPE: str = os.getenv("VECTOR_STORE_DTYPE", "int8")  # int8 | float16
+    # 카탈로그 BM25 어휘 색인 (문자 bigram): 후보 추출(retrieval="lexical") + 재정렬 점수 융합
+    LEXICAL_INDEX_ENABLED: bool = os.getenv("LEXICAL_INDEX_ENABLED", "1") == "1"
+    LEXICAL_INDEX_MAX_DOCS: int = int(os.getenv("LEXICAL_INDEX_MAX_DOCS", 200000))
+    LEXICAL_BM25_K1: float = float(os.getenv("LEXICAL_BM25_K1", 1.2))
+    LEXICAL_BM25_B: float = float(os.getenv("LEXICAL_BM25_B", 0.75))
+    # /recommend 의미 캐시 (같은 제약 + 비슷한 내러티브 → 저장된 top-k)
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+    SEMANTIC_CACHE_TTL_S: float = float(os.getenv("SEMANTIC_CACHE_TTL_S", 600))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 2000))
     APP_HOST: str = os.getenv("APP_HOST", "0.0.0.0")
     APP_PORT: int = int(os.getenv("APP_PORT", 8000))
+    # 알라딘 HTTP 커넥션 풀 (앱 수명 동안 하나의 AsyncClient 공유)
+    ALADIN_MAX_CONNECTIONS: int = int(os.getenv("ALADIN_MAX_CONNECTIONS", 50))
+    ALADIN_MAX_KEEPALIVE: int = int(os.getenv("ALADIN_MAX_KEEPALIVE", 20))
+    ALADIN_KEEPALIVE_EXPIRY: float = float(os.getenv("ALADIN_KEEPALIVE_EXPIRY", 30))
+    ALADIN_CONNECT_TIMEOUT: float = float(os.getenv("ALADIN_CONNECT_TIMEOUT", 3))
+    ALADIN_READ_TIMEOUT: float = float(os.getenv("ALADIN_READ_TIMEOUT", 10))
+    ALADIN_WRITE_TIMEOUT: float = float(os.getenv("ALADIN_WRITE_TIMEOUT", 5))
+    ALADIN_POOL_TIMEOUT: float = float(os.getenv("ALADIN_POOL_TIMEOUT", 5))
+    # 사용자 제공 TTB 키별 클라이언트 LRU 크기
+    ALADIN_KEY_CLIENTS_MAX: int = int(os.getenv("ALADIN_KEY_CLIENTS_MAX", 128))
+    # 키별 토큰 버킷/일일 쿼터, 업스트림 서킷 브레이커 (0이면 해당 제한 없음)
+    # app.serve --workers 값 (알라딘 토큰 버킷은 워커마다 따로라 RATE/BURST를 워커 수로 나눔)
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", 1))
+    ALADIN_RATE_PER_S: float = float(os.getenv("ALADIN_RATE_PER_S", 10))
+    ALADIN_RATE_BURST: float = float(os.getenv("ALADIN_RATE_BURST", 20))
+    ALADIN_RATE_MAX_WAIT_S: float = float(os.getenv("ALADIN_RATE_MAX_WAIT_S", 2))  # interactive 대기 상한
+    ALADIN_DAILY_QUOTA: int = int(os.getenv("ALADIN_DAILY_QUOTA", 5000))
+    ALADIN_QUOTA_RESERVE: int = int(os.getenv("ALADIN_QUOTA_RESERVE", 500))  # background가 못 쓰는 잔량
+    # 일일 쿼터 카운터를 둘 SQLite (서버 워커·수집 프로세스가 공유, 비우면 프로세스마다 따로 셈)
+    ALADIN_QUOTA_DB: str = os.getenv("ALADIN_QUOTA_DB", os.getenv("EMBEDDING_DB", "squin.db"))
+    ALADIN_BREAKER_FAILURES: int = int(os.getenv("ALADIN_BREAKER_FAILURES", 5))
+    ALADIN_BREAKER_RESET_S: float = float(os.getenv("ALADIN_BREAKER_RESET_S", 30))
+    # 면담 세션 저장소 및 면담 중 선행 후보 수집
+    SESSION_DB: str = os.getenv("SESSION_DB", os.getenv("EMBEDDING_DB", "squin.db"))
+    PREFETCH_ENABLED: bool = os.getenv("PREFETCH_ENABLED", "1") == "1"
+    PREFETCH_MAX_SESSIONS: int = int(os.getenv("PREFETCH_MAX_SESSIONS", 1000))
+    PREFETCH_WAIT_S: float = float(os.getenv("PREFETCH_WAIT_S", 10))
+    # 후보 수집 fan-out: 동시 호출 상한 및 단계 전체 deadline(초)
+    COLLECT_MAX_CONCURRENCY: int = int(os.getenv("COLLECT_MAX_CONCURRENCY", 8))
+    COLLECT_DEADLINE_S: float = float(os.getenv("COLLECT_DEADLINE_S", 8))
+    # 2단계 랭킹: 후보가 이보다 많으면 메타데이터 점수(규칙+인기도+어휘) 상위 N권만 임베딩 (0 = 전부)
+    PREFILTER_TOP_N: int = int(os.getenv("PREFILTER_TOP_N", 60))
+    # /recommend/batch: 요청당 프로필 수 상한, 한 번에 인코딩·채점하는 프로필 수
+    BATCH_MAX_PROFILES: int = int(os.getenv("BATCH_MAX_PROFILES", 10000))
+    BATCH_CHUNK_SIZE: int = int(os.getenv("BATCH_CHUNK_SIZE", 256))
+    # 알라딘 응답 캐시 (ALADIN_CACHE_DB를 비우면 SQLite 2차 캐시 비활성)
+    ALADIN_CACHE_MAX_ENTRIES: int = int(os.getenv("ALADIN_CACHE_MAX_ENTRIES", 2000))
+    ALADIN_CACHE_MAX_BYTES: int = int(os.getenv("ALADIN_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    ALADIN_CACHE_DB: str = os.getenv("ALADIN_CACHE_DB", "")
+    ALADIN_CACHE_SWR_SECONDS: int = int(os.getenv("ALADIN_CACHE_SWR_SECONDS", 24 * 60 * 60))
 
 settings = Settings()
@@ -0,0 +1,204 @@
+# app/core/embed_worker.py
+"""
+임베딩 마이크로배칭 워커
+- 동시 요청의 텍스트를 asyncio 큐로 모아 한 번의 encode로 처리 (최대 배치/최대 대기)
+- encode는 스레드 풀에서 실행해 이벤트 루프를 막지 않음 (OpenAI는 비동기 호출)
+- 같은 (provider, 텍스트)가 이미 인코딩 중이면 새로 넣지 않고 그 결과를 공유 (single-flight)
+"""
+import asyncio
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.core import metrics, nlp
+
+
+class _Job:
+    __slots__ = ("texts", "provider", "openai_key", "futures")
+
+    def __init__(self, texts: List[str], provider: str, openai_key: Optional[str], futures: List[asyncio.Future]):
+        self.texts = texts
+        self.provider = provider
+        self.openai_key = openai_key
+        self.futures = futures  # 텍스트별 결과
+
+    def live(self) -> bool:
+        """기다리는 호출자가 남은 텍스트만 남김"""
+        pairs = [(t, f) for t, f in zip(self.texts, self.futures) if not f.done()]
+        self.texts = [t for t, _ in pairs]
+        self.futures = [f for _, f in pairs]
+        return bool(pairs)
+
+
+class _Flight:
+    __slots__ = ("future", "waiters")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.waiters = 0
+
+
+class EmbeddingBatcher:
+    def __init__(self, max_batch: int = 64, max_wait_ms: float = 5.0, threads: int = 1):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.threads = threads
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._batch_sizes: Deque[int] = deque(maxlen=1000)
+        self._inflight: Set[asyncio.Task] = set()
+        self._pending: Dict[Tuple[str, Optional[str], str], _Flight] = {}
+        self.counters: Dict[str, int] = {"jobs": 0, "texts": 0, "batches": 0, "errors": 0, "coalesced": 0}
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="embed")
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        for t in list(self._inflight):
+            t.cancel()
+        await asyncio.gather(self._task, *self._inflight, return_exceptions=True)
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            for f in job.futures:
+                if not f.done():
+                    f.set_exception(RuntimeError("embedding worker stopped"))
+        self._executor.shutdown(wait=False)
+        self._task = self._queue = self._executor = None
+
+    async def embed(
+        self, texts: List[str], *, provider: Optional[str] = None, openai_key: Optional[str] = None
+    ) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        if self._task is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        prov = nlp.resolve_provider(provider)
+        okey = openai_key if prov == "openai" else None  # 키가 다른 OpenAI 호출끼리는 공유하지 않음
+        flights: List[_Flight] = []
+        new_texts: List[str] = []
+        new_futs: List[asyncio.Future] = []
+        for t in texts:
+            k = (prov, okey, t)
+            fl = self._pending.get(k)
+            if fl is None:
+                fl = self._pending[k] = _Flight(loop.create_future())
+                fl.future.add_done_callback(functools.partial(self._forget, k, fl))
+                new_texts.append(t)
+                new_futs.append(fl.future)
+            else:
+                self.counters["coalesced"] += 1
+            fl.waiters += 1
+            flights.append(fl)
+        self.counters["jobs"] += 1
+        self.counters["texts"] += len(texts)
+        if len(new_texts) < len(texts):
+            metrics.COALESCED.inc(len(texts) - len(new_texts), kind="embed")
+        try:
+            if new_texts:
+                await self._queue.put(_Job(new_texts, prov, openai_key, new_futs))
+            # wait는 취소돼도 결과 future를 취소하지 않음 → 다른 호출자는 계속 기다릴 수 있음
+            await asyncio.wait({fl.future for fl in flights})
+        finally:
+            for fl in flights:
+                fl.waiters -= 1
+                if fl.waiters == 0 and not fl.future.done():
+                    fl.future.cancel()  # 아무도 기다리지 않으면 인코딩 대상에서 빠짐
+        return np.stack([fl.future.result() for fl in flights])
+
+    def _forget(self, key: Tuple[str, Optional[str], str], fl: _Flight, _fut=None) -> None:
+        if self._pending.get(key) is fl:
+            del self._pending[key]
+
+    def _drain(self, jobs: List[_Job], n: int) -> int:
+        while n < self.max_batch and not self._queue.empty():
+            job = self._queue.get_nowait()
+            jobs.append(job)
+            n += len(job.texts)
+        return n
+
+    async def _run(self) -> None:
+        while True:
+            jobs = [await self._queue.get()]
+            n = self._drain(jobs, len(jobs[0].texts))
+            if n < self.max_batch and self.max_wait > 0:
+                await asyncio.sleep(self.max_wait)
+                self._drain(jobs, n)
+
+            groups: Dict[Tuple[str, Optional[str]], List[_Job]] = {}
+            for job in jobs:
+                if job.live():  # 호출측이 모두 취소한 텍스트는 건너뜀
+                    groups.setdefault((job.provider, job.openai_key), []).append(job)
+            for (prov, key), group in groups.items():
+                if prov == "openai":
+                    # 원격 호출은 기다리지 않고 다음 배치 수집을 계속
+                    t = asyncio.get_running_loop().create_task(self._dispatch(prov, key, group))
+                    self._inflight.add(t)
+                    t.add_done_callback(self._inflight.discard)
+                else:
+                    await self._dispatch(prov, key, group)
+
+    async def _dispatch(self, provider: str, openai_key: Optional[str], jobs: List[_Job]) -> None:
+        texts = [t for job in jobs for t in job.texts]
+        self.counters["batches"] += 1
+        self._batch_sizes.append(len(texts))
+        metrics.EMBED_BATCH.observe(len(texts), provider=provider)
+        try:
+            if provider == "openai":
+                # 네트워크 I/O는 스레드 대신 이벤트 루프에서 비동기로
+                vecs = await nlp.aembed_openai(texts, openai_key=openai_key)
+            else:
+                vecs = await asyncio.get_running_loop().run_in_executor(
+                    self._executor,
+                    functools.partial(nlp.embed_texts, texts, provider=provider, openai_key=openai_key),
+                )
+        except Exception as e:
+            self.counters["errors"] += 1
+            for job in jobs:
+                for f in job.futures:
+                    if not f.done():
+                        f.set_exception(e)
+            return
+        off = 0
+        for job in jobs:
+            for f in job.futures:
+                if not f.done():
+                    f.set_result(vecs[off])
+                off += 1
+
+    def stats(self) -> Dict:
+        sizes = np.asarray(self._batch_sizes) if self._batch_sizes else np.zeros(1)
+        return {
+            **self.counters,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batch_size_mean": float(sizes.mean()),
+            "batch_size_p50": float(np.percentile(sizes, 50)),
+            "batch_size_max": int(sizes.max()),
+        }
+
+
+_batcher: Optional[EmbeddingBatcher] = None
+
+def get_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = EmbeddingBatcher(
+            max_batch=settings.EMBED_MAX_BATCH,
+            max_wait_ms=settings.EMBED_MAX_WAIT_MS,
+            threads=settings.EMBED_WORKER_THREADS,
+        )
+    return _batcher
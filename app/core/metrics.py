@@ -0,0 +1,195 @@
+# app/core/metrics.py
+"""
+경량 메트릭 (Prometheus 텍스트 포맷, 외부 의존성 없음)
+- Counter/Histogram: 라벨별 값을 dict에 누적 (관측 1회 = bisect + 잠금 1회)
+- StageTimer: 요청 단위 단계별 시간 → 응답 JSON timings, Server-Timing 헤더
+- timed(): 현재 요청의 StageTimer(contextvar)와 히스토그램에 동시에 기록
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+_metrics: List["_Metric"] = []
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()  # 임베딩 스레드에서도 관측
+        _metrics.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 → [버킷별 개수..., +Inf 개수, 합계]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        out = []
+        names = self.labelnames + ("le",)
+        for key, row in items:
+            acc = 0.0
+            for b, c in zip(self.buckets + (float("inf"),), row[:-1]):
+                acc += c
+                le = "+Inf" if b == float("inf") else _num(b)
+                out.append(f"{self.name}_bucket{_labels(names, key + (le,))} {_num(acc)}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(row[-1])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, key)} {_num(acc)}")
+        return out
+
+
+def render(extra: Optional[List[str]] = None) -> str:
+    lines: List[str] = []
+    for m in _metrics:
+        lines.extend(m.render())
+    lines.extend(extra or [])
+    return "\n".join(lines) + "\n"
+
+
+def render_counters(name: str, help: str, label: str, values: Dict[str, float]) -> List[str]:
+    """다른 모듈이 이미 세고 있는 카운터 dict를 그대로 노출 (관측 경로 추가 비용 없음)"""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+    lines += [f"{name}{_labels((label,), (k,))} {_num(v)}" for k, v in sorted(values.items())]
+    return lines
+
+
+# ---------- 공용 메트릭 ----------
+STAGE_SECONDS = Histogram("squin_stage_seconds", "Time spent per pipeline stage", ["stage"])
+REQUEST_SECONDS = Histogram("squin_request_seconds", "Recommend request latency", ["endpoint", "status"])
+ALADIN_SECONDS = Histogram("squin_aladin_request_seconds", "Aladin call latency (cache hits included)", ["path"])
+ALADIN_ERRORS = Counter("squin_aladin_errors_total", "Aladin request failures", ["path"])
+COLLECT_FALLBACK = Counter(
+    "squin_collect_stage_total", "Which candidate stage produced the result (primary/relaxed/bestseller/empty)",
+    ["stage"],
+)
+PREFETCH = Counter("squin_prefetch_total", "Interview prefetch results used or missed", ["result"])
+EMBED_SECONDS = Histogram("squin_embed_seconds", "embed_texts latency", ["provider"])
+EMBED_BATCH = Histogram("squin_embed_batch_size", "Texts per embedding batch", ["provider"], buckets=SIZE_BUCKETS)
+COALESCED = Counter("squin_coalesced_total", "Callers that joined an identical in-flight request", ["kind"])
+EMBED_STORE = Counter("squin_embedding_store_total", "Stored book embeddings reused or encoded", ["result"])
+
+
+# ---------- 요청 단위 타이머 ----------
+class StageTimer:
+    """
+    순차 단계(mark)와 하위 구간(add, 동시 실행 포함)의 소요 시간(ms)을 기록.
+    mark 단계는 STAGE_SECONDS에도 관측된다.
+    """
+
+    def __init__(self):
+        self.t0 = self._last = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.spans: Dict[str, List[float]] = {}  # 이름 → [합계 ms, 횟수]
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        dt = now - self._last
+        self.stages[stage] = round(self.stages.get(stage, 0.0) + dt * 1000.0, 2)
+        self._last = now
+        STAGE_SECONDS.observe(dt, stage=stage)
+
+    def add(self, name: str, seconds: float) -> None:
+        span = self.spans.setdefault(name, [0.0, 0])
+        span[0] += seconds * 1000.0
+        span[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def snapshot(self) -> Dict[str, float]:
+        return {**self.stages, "total": round(self.elapsed() * 1000.0, 2)}
+
+    def server_timing(self) -> str:
+        parts = [f"{k};dur={v:.2f}" for k, v in self.stages.items()]
+        # 동시 호출 구간은 합계라 벽시계 시간보다 클 수 있음 → desc에 횟수 표시
+        parts += [f'{k};dur={ms:.2f};desc="{n} calls"' for k, (ms, n) in self.spans.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000.0:.2f}")
+        return ", ".join(parts)
+
+
+current_timer: ContextVar[Optional[StageTimer]] = ContextVar("current_timer", default=None)
+
+
+@contextmanager
+def timed(name: str, hist: Histogram = STAGE_SECONDS, **labels: str) -> Iterator[None]:
+    """구간 시간을 히스토그램에 관측하고, 요청 타이머가 있으면 span으로도 기록"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        hist.observe(dt, **(labels or {"stage": name}))
+        timer = current_timer.get()
+        if timer is not None:
+            timer.add(name, dt)
@@ -1,49 +1,153 @@
+import threading
+import time
 import numpy as np
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.config import settings
+from app.core import metrics, textprep
+
+# sentence_transformers/openai는 import 자체가 무거우므로 provider가 정해질 때 지연 import
+# 로드/워밍업 소요 시간(초) 기록 → /readyz 에서 노출
+timings: Dict[str, float] = {}
+_ready: Dict[str, bool] = {}
+
+SBERT_MODEL = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+OPENAI_MODEL = "text-embedding-3-large"
+
+def resolve_provider(provider: Optional[str] = None) -> str:
+    return (provider or settings.EMBEDDING_PROVIDER).lower()
+
+def model_name(provider: Optional[str] = None) -> str:
+    prov = resolve_provider(provider)
+    if prov == "openai":
+        dims = settings.OPENAI_EMBED_DIMENSIONS
+        return f"{OPENAI_MODEL}@{dims}" if dims else OPENAI_MODEL
+    if prov == "sbert-onnx":
+        # 양자화 시 벡터가 미세하게 달라지므로 저장소에서는 별도 모델로 취급
+        return SBERT_MODEL + ("#onnx-int8" if settings.ONNX_QUANTIZED else "#onnx")
+    return SBERT_MODEL
 
 # SBERT
-from sentence_transformers import SentenceTransformer
 _sbert_model = None
+_sbert_lock = threading.Lock()
 
 def _get_sbert():
     global _sbert_model
     if _sbert_model is None:
-        try:
-            _sbert_model = SentenceTransformer("snunlp/KR-SBERT-V40K-klueNLI-augSTS")
-        except Exception as e:
-            raise RuntimeError(f"SBERT model load failed: {e}. "
-                               f"Check internet or switch EMBEDDING_PROVIDER=openai") from e
+        with _sbert_lock:
+            if _sbert_model is None:
+                try:
+                    t0 = time.perf_counter()
+                    from sentence_transformers import SentenceTransformer
+                    t1 = time.perf_counter()
+                    model = SentenceTransformer(SBERT_MODEL)
+                    timings["sbert_import_s"] = t1 - t0
+                    timings["sbert_load_s"] = time.perf_counter() - t1
+                    _sbert_model = model
+                except Exception as e:
+                    raise RuntimeError(f"SBERT model load failed: {e}. "
+                                       f"Check internet or switch EMBEDDING_PROVIDER=openai") from e
     return _sbert_model
 
-# OpenAI
-from openai import OpenAI
-_openai_client = None
-
-def _get_openai(api_key: Optional[str] = None):
-    global _openai_client
-    # 우선 요청별 키를 우선 사용
-    if api_key:
-        return OpenAI(api_key=api_key)
-    if _openai_client is None:
-        if not settings.OPENAI_API_KEY:
-            raise RuntimeError("OPENAI_API_KEY missing while EMBEDDING_PROVIDER=openai")
-        _openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    return _openai_client
+# SBERT (ONNX Runtime)
+_onnx_encoder = None
+
+def _get_onnx():
+    global _onnx_encoder
+    if _onnx_encoder is None:
+        with _sbert_lock:
+            if _onnx_encoder is None:
+                try:
+                    t0 = time.perf_counter()
+                    from app.core.onnx_encoder import OnnxEncoder
+                    _onnx_encoder = OnnxEncoder(
+                        settings.ONNX_MODEL_DIR,
+                        quantized=settings.ONNX_QUANTIZED,
+                        intra_op_threads=settings.ONNX_INTRA_OP_THREADS,
+                    )
+                    timings["sbert-onnx_load_s"] = time.perf_counter() - t0
+                except Exception as e:
+                    raise RuntimeError(f"ONNX encoder load failed: {e}. "
+                                       f"Export it with `python -m app.core.onnx_encoder`") from e
+    return _onnx_encoder
+
+# OpenAI: 청크/동시성/재시도는 app.core.openai_embed 에서 처리
+async def aembed_openai(texts: List[str], *, openai_key: Optional[str] = None) -> np.ndarray:
+    from app.core import openai_embed
+    try:
+        vecs = await openai_embed.aembed(
+            texts, model=OPENAI_MODEL, api_key=openai_key,
+            dimensions=settings.OPENAI_EMBED_DIMENSIONS,
+        )
+        _ready["openai"] = True
+        return vecs
+    except RuntimeError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"OpenAI embedding failed: {e}") from e
 
 def embed_texts(texts: List[str], *, provider: Optional[str] = None, openai_key: Optional[str] = None) -> np.ndarray:
-    prov = (provider or settings.EMBEDDING_PROVIDER).lower()
+    prov = resolve_provider(provider)
+    # 워커 스레드에서 실행되므로 요청 타이머가 아니라 히스토그램에만 기록 (요청별로는 "embed" 단계)
+    t0 = time.perf_counter()
+    try:
+        vecs = _embed_texts(texts, prov, openai_key)
+        _ready[prov] = True  # 워밍업이 실패했어도 지연 로드·인코딩에 성공하면 준비 완료
+        return vecs
+    finally:
+        metrics.EMBED_SECONDS.observe(time.perf_counter() - t0, provider=prov)
+
+def _embed_texts(texts: List[str], prov: str, openai_key: Optional[str]) -> np.ndarray:
+    if prov != "openai" and len(texts) > 1:
+        # 로컬 인코더: 길이순으로 묶어 배치 내 패딩을 줄이고 원래 순서로 복원
+        order = textprep.length_order(texts)
+        if (order != np.arange(len(texts))).any():
+            vecs = _encode_local([texts[i] for i in order], prov)
+            return textprep.restore_order(vecs, order)
     if prov == "openai":
-        client = _get_openai(openai_key)
+        from app.core import openai_embed
         try:
-            resp = client.embeddings.create(model="text-embedding-3-large", input=texts)
-            vecs = [d.embedding for d in resp.data]
-            return np.array(vecs, dtype=np.float32)
+            return openai_embed.embed(
+                texts, model=OPENAI_MODEL, api_key=openai_key,
+                dimensions=settings.OPENAI_EMBED_DIMENSIONS,
+            )
+        except RuntimeError:
+            raise
         except Exception as e:
             raise RuntimeError(f"OpenAI embedding failed: {e}") from e
+    return _encode_local(texts, prov)
+
+def _encode_local(texts: List[str], prov: str) -> np.ndarray:
+    if prov == "sbert-onnx":
+        enc = _get_onnx()
+        try:
+            return enc.encode(texts)
+        except Exception as e:
+            raise RuntimeError(f"ONNX encode failed: {e}") from e
     # default sbert
     model = _get_sbert()
     try:
         return np.array(model.encode(texts, normalize_embeddings=True), dtype=np.float32)
     except Exception as e:
         raise RuntimeError(f"SBERT encode failed: {e}") from e
+
+def warmup(provider: Optional[str] = None) -> Dict[str, float]:
+    """설정된 provider 모델을 미리 로드하고 더미 배치로 워밍업 (lifespan에서 스레드로 실행)"""
+    prov = resolve_provider(provider)
+    t0 = time.perf_counter()
+    if prov == "openai":
+        # 네트워크 호출(과금) 없이 클라이언트 생성까지만. 로컬 모델이 없고 서버 키가 없어도
+        # 요청별 openai_key로 서비스할 수 있으므로 준비 여부에는 영향 없음
+        if settings.OPENAI_API_KEY:
+            from app.core import openai_embed
+            openai_embed.get_async_client()
+    elif prov == "sbert-onnx":
+        _get_onnx().encode(["워밍업 문장입니다.", "warmup"])
+    else:
+        _get_sbert().encode(["워밍업 문장입니다.", "warmup"], normalize_embeddings=True)
+    timings[f"{prov}_warmup_s"] = time.perf_counter() - t0
+    _ready[prov] = True
+    return timings
+
+def is_ready(provider: Optional[str] = None) -> bool:
+    """워밍업을 끈 경우 모델은 첫 요청에서 지연 로드하므로 처음부터 준비 상태"""
+    return not settings.EMBEDDING_WARMUP or _ready.get(resolve_provider(provider), False)
@@ -0,0 +1,133 @@
+# app/core/onnx_encoder.py
+"""
+KR-SBERT ONNX Runtime(CPU) 인코더 (EMBEDDING_PROVIDER=sbert-onnx)
+- 로컬 체크포인트(또는 허브 이름)에서 ONNX로 내보내고, 선택적으로 int8 동적 양자화
+- SentenceTransformer와 같은 풀링 + L2 정규화 → 기존 sbert 벡터와 호환
+
+내보내기:
+    python -m app.core.onnx_encoder --model snunlp/KR-SBERT-V40K-klueNLI-augSTS --out models/kr-sbert-onnx
+"""
+import argparse
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+CONFIG_FILE = "encoder_config.json"
+
+
+def export(model_name_or_path: str, out_dir: str, *, quantize: bool = True, opset: int = 14) -> str:
+    """SentenceTransformer 체크포인트를 ONNX로 내보냄. 사용할 모델 파일 경로를 반환"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st = SentenceTransformer(model_name_or_path, device="cpu")
+    transformer = st[0]
+    hf = transformer.auto_model.eval()
+    tok = transformer.tokenizer
+    pooling = st[1].get_pooling_mode_str() if len(st) > 1 else "mean"
+
+    os.makedirs(out_dir, exist_ok=True)
+    tok.save_pretrained(out_dir)
+
+    sample = tok(["내보내기용 샘플 문장입니다."], return_tensors="pt")
+    input_names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in sample]
+
+    class _Wrap(torch.nn.Module):
+        def __init__(self, m):
+            super().__init__()
+            self.m = m
+
+        def forward(self, *args):
+            return self.m(**dict(zip(input_names, args))).last_hidden_state
+
+    axes = {n: {0: "batch", 1: "seq"} for n in input_names}
+    axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+    fp32_path = os.path.join(out_dir, FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            _Wrap(hf), tuple(sample[n] for n in input_names), fp32_path,
+            input_names=input_names, output_names=["last_hidden_state"],
+            dynamic_axes=axes, opset_version=opset, do_constant_folding=True,
+        )
+
+    path = fp32_path
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        path = os.path.join(out_dir, INT8_FILE)
+        quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+
+    with open(os.path.join(out_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "source": model_name_or_path,
+            "pooling": pooling,
+            "max_seq_length": transformer.max_seq_length,
+            "dim": st.get_sentence_embedding_dimension(),
+            "quantized": quantize,
+        }, f, ensure_ascii=False, indent=2)
+    return path
+
+
+class OnnxEncoder:
+    def __init__(self, model_dir: str, *, quantized: bool = True, intra_op_threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), encoding="utf-8") as f:
+            self.config = json.load(f)
+        path = os.path.join(model_dir, INT8_FILE)
+        if not quantized or not os.path.exists(path):
+            path = os.path.join(model_dir, FP32_FILE)
+        self.model_path = path
+        self.quantized = path.endswith(INT8_FILE)
+        self.pooling = self.config.get("pooling", "mean")
+        self.max_length = int(self.config.get("max_seq_length") or 128)
+        self.dim = int(self.config.get("dim") or 768)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        so.inter_op_num_threads = 1
+        if intra_op_threads > 0:
+            so.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(path, so, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def encode(self, texts: List[str], *, batch_size: int = 32) -> np.ndarray:
+        out = []
+        for i in range(0, len(texts), batch_size):
+            enc = self.tokenizer(
+                texts[i:i + batch_size], padding=True, truncation=True,
+                max_length=self.max_length, return_tensors="np",
+            )
+            feeds = {k: enc[k].astype(np.int64) for k in self.input_names if k in enc}
+            hidden = self.session.run(None, feeds)[0]
+            if self.pooling.startswith("cls"):
+                v = hidden[:, 0]
+            else:
+                mask = enc["attention_mask"][..., None].astype(np.float32)
+                v = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            v = v / np.clip(np.linalg.norm(v, axis=1, keepdims=True), 1e-12, None)
+            out.append(v.astype(np.float32))
+        if not out:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.concatenate(out)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Export KR-SBERT to ONNX (optionally int8-quantized)")
+    ap.add_argument("--model", default="snunlp/KR-SBERT-V40K-klueNLI-augSTS",
+                    help="local checkpoint dir or hub name")
+    ap.add_argument("--out", default="models/kr-sbert-onnx")
+    ap.add_argument("--no-quantize", action="store_true")
+    ap.add_argument("--opset", type=int, default=14)
+    args = ap.parse_args(argv)
+    path = export(args.model, args.out, quantize=not args.no_quantize, opset=args.opset)
+    print(f"exported: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# app/core/openai_embed.py
+"""
+OpenAI 임베딩 배치 경로
+- 입력을 토큰/개수 예산으로 청크 분할 → 키별 캐시된 AsyncOpenAI로 동시 전송
+- 429/5xx/연결 오류는 지수 백오프 + 지터로 재시도 (Retry-After 존중)
+- dimensions 축소 요청 지원 (text-embedding-3-*)
+"""
+import asyncio
+import hashlib
+import random
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from app.config import settings
+from app.core.textprep import estimate_tokens  # 청크 예산과 길이 정렬이 같은 근사를 쓰도록
+
+_clients: "OrderedDict[str, object]" = OrderedDict()
+_in_use: Dict[int, int] = {}        # id(client) → 진행 중인 aembed 수
+_retired: Dict[int, object] = {}    # LRU에서 밀려났지만 아직 닫지 못한 클라이언트
+_closing: Set[asyncio.Task] = set()
+
+
+def chunk_texts(texts: List[str], *, max_items: int, max_tokens: int) -> List[List[int]]:
+    """원래 순서를 유지하는 인덱스 청크"""
+    chunks: List[List[int]] = []
+    cur: List[int] = []
+    budget = 0
+    for i, t in enumerate(texts):
+        n = estimate_tokens(t)
+        if cur and (len(cur) >= max_items or budget + n > max_tokens):
+            chunks.append(cur)
+            cur, budget = [], 0
+        cur.append(i)
+        budget += n
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+def _new_client(api_key: str):
+    from openai import AsyncOpenAI
+    # 재시도는 여기서 직접 처리 (SDK 재시도와 중복 방지)
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=settings.OPENAI_BASE_URL or None,
+        max_retries=0,
+        timeout=settings.OPENAI_TIMEOUT,
+    )
+
+
+def get_async_client(api_key: Optional[str] = None):
+    """키 해시별 AsyncOpenAI (크기 제한 LRU)"""
+    key = api_key or settings.OPENAI_API_KEY
+    if not key:
+        raise RuntimeError("OPENAI_API_KEY missing while EMBEDDING_PROVIDER=openai")
+    h = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    cli = _clients.get(h)
+    if cli is not None:
+        _clients.move_to_end(h)
+        return cli
+    cli = _new_client(key)
+    _clients[h] = cli
+    while len(_clients) > settings.OPENAI_CLIENTS_MAX:
+        _, old = _clients.popitem(last=False)
+        _retired[id(old)] = old
+        if not _in_use.get(id(old)):
+            _close_retired(old)
+    return cli
+
+
+def _close_retired(cli) -> None:
+    """밀려난 클라이언트의 연결 풀 정리. 루프 밖(워밍업 스레드)이면 close_clients까지 보류"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    del _retired[id(cli)]
+    task = loop.create_task(cli.close())
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+def _acquire(cli) -> None:
+    _in_use[id(cli)] = _in_use.get(id(cli), 0) + 1
+
+
+def _release(cli) -> None:
+    n = _in_use.pop(id(cli)) - 1
+    if n:
+        _in_use[id(cli)] = n
+    elif id(cli) in _retired:
+        _close_retired(cli)
+
+
+async def close_clients() -> None:
+    while _clients:
+        _, cli = _clients.popitem()
+        await cli.close()
+    while _retired:
+        _, cli = _retired.popitem()
+        await cli.close()
+    if _closing:
+        await asyncio.gather(*_closing, return_exceptions=True)
+
+
+def _retry_after(exc) -> Optional[float]:
+    resp = getattr(exc, "response", None)
+    if resp is None:
+        return None
+    try:
+        return float(resp.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _retryable(exc) -> bool:
+    import openai
+    if isinstance(exc, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
+
+
+async def _create(client, texts: List[str], model: str, dimensions: int) -> np.ndarray:
+    kwargs = {"model": model, "input": texts}
+    if dimensions:
+        kwargs["dimensions"] = dimensions
+    attempt = 0
+    while True:
+        try:
+            resp = await client.embeddings.create(**kwargs)
+            data = sorted(resp.data, key=lambda d: d.index)
+            return np.array([d.embedding for d in data], dtype=np.float32)
+        except Exception as e:
+            if attempt >= settings.OPENAI_MAX_RETRIES or not _retryable(e):
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(settings.OPENAI_BACKOFF_MAX, settings.OPENAI_BACKOFF_BASE * (2 ** attempt))
+                delay *= random.uniform(0.5, 1.5)
+            attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def aembed(
+    texts: List[str], *, model: str, api_key: Optional[str] = None,
+    dimensions: int = 0, client=None,
+) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, dimensions or 0), dtype=np.float32)
+    if client is None:
+        # 캐시된 클라이언트: 사용 중에 LRU에서 밀려나도 끝난 뒤에 닫힘
+        client = get_async_client(api_key)
+        _acquire(client)
+        try:
+            return await aembed(texts, model=model, dimensions=dimensions, client=client)
+        finally:
+            _release(client)
+    chunks = chunk_texts(
+        texts, max_items=settings.OPENAI_EMBED_MAX_ITEMS, max_tokens=settings.OPENAI_EMBED_MAX_TOKENS,
+    )
+    sem = asyncio.Semaphore(max(1, settings.OPENAI_EMBED_CONCURRENCY))
+
+    async def _one(idx: List[int]) -> np.ndarray:
+        async with sem:
+            return await _create(client, [texts[i] for i in idx], model, dimensions)
+
+    parts = await asyncio.gather(*[_one(c) for c in chunks])
+    vecs = np.concatenate(parts)
+    # dimensions 축소 결과도 코사인 비교를 위해 정규화
+    return vecs / np.clip(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12, None)
+
+
+def embed(texts: List[str], *, model: str, api_key: Optional[str] = None, dimensions: int = 0) -> np.ndarray:
+    """이벤트 루프가 없는 스레드용 동기 래퍼 (호출마다 임시 클라이언트 사용)"""
+    key = api_key or settings.OPENAI_API_KEY
+    if not key:
+        raise RuntimeError("OPENAI_API_KEY missing while EMBEDDING_PROVIDER=openai")
+
+    async def _run():
+        client = _new_client(key)
+        try:
+            return await aembed(texts, model=model, dimensions=dimensions, client=client)
+        finally:
+            await client.close()
+
+    return asyncio.run(_run())
@@ -1,6 +1,9 @@
 # app/core/ranker.py
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Union
+
+W_SEM, W_RULE, W_POP = 0.55, 0.25, 0.20
+W_LEX = 0.3  # 어휘(BM25) 점수를 줄 때 의미 점수 안에서의 비중
 
 def rule_score(book: Dict, cons: Dict) -> float:
     s = 0.0
@@ -31,21 +34,165 @@ def popularity(book: Dict) -> float:
     n = (book.get("salesPoint", 0) or 0)
     return 0.7 * r + 0.3 * (np.tanh(n / 5000))
 
-def mix_score(sem: float, rule: float, pop: float, w=(0.55, 0.25, 0.20)) -> float:
+def mix_score(sem: float, rule: float, pop: float, w=(W_SEM, W_RULE, W_POP)) -> float:
     return w[0]*sem + w[1]*rule + w[2]*pop
 
-def rerank(narr_vec, books: List[Dict], book_vecs, cons: Dict, topk=5) -> List[Dict]:
-    sims = (narr_vec @ book_vecs.T).tolist()
-    ranked = []
-    for i, b in enumerate(books):
-        sem = sims[i]
-        rule = rule_score(b, cons)
-        pop = popularity(b)
-        total = mix_score(sem, rule, pop)
-        ranked.append((total, sem, rule, pop, b))
-    ranked.sort(key=lambda x: x[0], reverse=True)
+# ---------- 컬럼형(벡터화) 랭커 ----------
+def _to_int(v) -> int:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return 0
+
+class BookColumns:
+    """후보 도서를 NumPy 컬럼으로 한 번 변환해 두고 규칙/인기도 점수를 벡터 연산으로 계산"""
+
+    def __init__(self, books: List[Dict]):
+        self.books = books
+        n = len(books)
+        self.pages = np.zeros(n, dtype=np.float64)     # 0 = 정보 없음
+        self.pubyear = np.zeros(n, dtype=np.float64)   # 0 = 정보 없음
+        self.review = np.zeros(n, dtype=np.float64)
+        self.sales = np.zeros(n, dtype=np.float64)
+        self.texts: List[str] = []
+        for i, b in enumerate(books):
+            sub = b.get("subInfo", {}) or {}
+            self.pages[i] = _to_int(sub.get("itemPage"))
+            pd = b.get("pubDate")
+            self.pubyear[i] = _to_int(pd[:4]) if pd else 0
+            self.review[i] = b.get("customerReviewRank", 0) or 0
+            self.sales[i] = b.get("salesPoint", 0) or 0
+            self.texts.append((b.get("description") or "") + " " + (b.get("categoryName") or ""))
+        self._masks: Dict[str, np.ndarray] = {}
+        self._pop: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def exclude_mask(self, term: str) -> np.ndarray:
+        m = self._masks.get(term)
+        if m is None:
+            m = np.fromiter((term in t for t in self.texts), dtype=bool, count=len(self.texts))
+            self._masks[term] = m
+        return m
+
+    def rule_scores(self, cons: Dict) -> np.ndarray:
+        # rule_score와 같은 순서로 더해 결과가 비트 단위로 일치하도록 함
+        s = np.zeros(len(self), dtype=np.float64)
+        if cons.get("max_pages"):
+            has = self.pages != 0
+            s += np.where(has, np.where(self.pages <= cons["max_pages"], 0.35, -0.15), 0.0)
+        if cons.get("min_pubyear"):
+            has = self.pubyear != 0
+            s += np.where(has, np.where(self.pubyear >= cons["min_pubyear"], 0.3, -0.1), 0.0)
+        for term in cons.get("exclude_terms") or []:
+            if term:
+                s -= np.where(self.exclude_mask(term), 0.25, 0.0)
+        return s
+
+    def popularity(self) -> np.ndarray:
+        if self._pop is None:
+            self._pop = 0.7 * (self.review / 10.0) + 0.3 * np.tanh(self.sales / 5000)
+        return self._pop
+
+def _topk(scores: np.ndarray, k: int) -> np.ndarray:
+    """내림차순 상위 k 인덱스. 동점은 원래 순서 유지 (list.sort와 동일)"""
+    n = scores.shape[0]
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    cand = np.flatnonzero(scores >= scores[part].min())
+    return cand[np.argsort(-scores[cand], kind="stable")][:k]
+
+def fuse_lexical(sims: np.ndarray, lexical: Optional[np.ndarray]) -> np.ndarray:
+    """의미 유사도와 후보 내 최댓값으로 나눈 BM25 점수를 섞음 (lexical이 없으면 그대로)"""
+    sem = sims.astype(np.float64)
+    if lexical is None:
+        return sem
+    lex = np.atleast_2d(np.asarray(lexical, dtype=np.float64))
+    top = lex.max(axis=1, keepdims=True)
+    lex = np.divide(lex, top, out=np.zeros_like(lex), where=top > 0)
+    return (1 - W_LEX) * sem + W_LEX * lex
+
+def prefilter(books: Union[List[Dict], BookColumns], cons: Dict, n: int, lexical=None) -> np.ndarray:
+    """
+    임베딩 전 1단계: 최종 점수에서 의미 유사도 항만 뺀 값(규칙+인기도+어휘)으로 상위 n개.
+    반환은 원래 순서를 유지한 인덱스 (n <= 0 이거나 후보가 n개 이하면 전부)
+    """
+    cols = books if isinstance(books, BookColumns) else BookColumns(books)
+    if n <= 0 or n >= len(cols):
+        return np.arange(len(cols))
+    score = W_RULE * cols.rule_scores(cons) + W_POP * cols.popularity()
+    if lexical is not None:
+        score = score + W_SEM * fuse_lexical(np.zeros(len(cols)), lexical)[0]
+    return np.sort(_topk(score, n))
+
+def _score_rows(sims: np.ndarray, cols: BookColumns, cons_list: Sequence[Dict], lexical=None):
+    sem = fuse_lexical(sims, lexical)
+    rule = np.stack([cols.rule_scores(c) for c in cons_list])
+    pop = cols.popularity()
+    total = W_SEM * sem + W_RULE * rule + W_POP * pop
+    return total, sem, rule, pop
+
+def rerank_batch(
+    narr_vecs, books: Union[List[Dict], BookColumns], book_vecs,
+    cons: Union[Dict, Sequence[Dict]], topk=5, lexical=None,
+) -> List[List[Dict]]:
+    """
+    여러 내러티브(Q×d)를 한 번의 (Q×N) 행렬곱으로 점수화.
+    cons는 공통 dict 하나 또는 내러티브별 리스트. 결과 도서는 _scores가 담긴 얕은 복사본.
+    lexical은 (Q×N) 또는 (N,) BM25 점수 (있으면 의미 점수에 융합).
+    """
+    cols = books if isinstance(books, BookColumns) else BookColumns(books)
+    q = np.atleast_2d(np.asarray(narr_vecs))
+    cons_list = [cons] * q.shape[0] if isinstance(cons, dict) else list(cons)
+    if len(cols) == 0:
+        return [[] for _ in cons_list]
+    sims = q @ np.asarray(book_vecs).T
+    total, sem, rule, pop = _score_rows(sims, cols, cons_list, lexical)
+    lex = None if lexical is None else np.broadcast_to(np.atleast_2d(lexical), sims.shape)
+    out: List[List[Dict]] = []
+    for r in range(total.shape[0]):
+        row = []
+        for i in _topk(total[r], topk):
+            b = dict(cols.books[i])
+            b["_scores"] = {"final": float(total[r, i]), "semantic": float(sem[r, i]),
+                            "rule": float(rule[r, i]), "pop": float(pop[i])}
+            if lex is not None:
+                b["_scores"]["lexical"] = float(lex[r, i])
+            row.append(b)
+        out.append(row)
+    return out
+
+def rerank_metadata(books: List[Dict], cons: Dict, topk=5) -> List[Dict]:
+    """임베딩 없이 규칙+인기도만으로 정렬 (스트리밍 첫 응답용). _scores가 담긴 얕은 복사본 반환"""
+    if not books:
+        return []
+    cols = BookColumns(books)
+    rule = cols.rule_scores(cons)
+    pop = cols.popularity()
+    total = W_RULE * rule + W_POP * pop
+    out = []
+    for i in _topk(total, topk):
+        b = dict(books[i])
+        b["_scores"] = {"final": float(total[i]), "semantic": None,
+                        "rule": float(rule[i]), "pop": float(pop[i])}
+        out.append(b)
+    return out
+
+def rerank(narr_vec, books: List[Dict], book_vecs, cons: Dict, topk=5, lexical=None) -> List[Dict]:
+    """lexical: 후보별 BM25 점수 (있으면 semantic에 융합, _scores["lexical"]에 원점수)"""
+    if not books:
+        return []
+    cols = BookColumns(books)
+    sims = np.asarray(narr_vec) @ np.asarray(book_vecs).T
+    total, sem, rule, pop = _score_rows(np.atleast_2d(sims), cols, [cons], lexical)
     out = []
-    for score, sem, rule, pop, b in ranked[:topk]:
-        b["_scores"] = {"final": score, "semantic": sem, "rule": rule, "pop": pop}
+    for i in _topk(total[0], topk):
+        b = books[i]
+        b["_scores"] = {"final": float(total[0, i]), "semantic": float(sem[0, i]),
+                        "rule": float(rule[0, i]), "pop": float(pop[i])}
+        if lexical is not None:
+            b["_scores"]["lexical"] = float(lexical[i])
         out.append(b)
     return out
@@ -0,0 +1,60 @@
+# app/core/singleflight.py
+"""
+Single-flight: 같은 키로 동시에 들어온 비동기 호출은 실행 중인 작업 하나를 공유
+- 작업은 별도 태스크로 돌려 첫 호출자가 취소돼도 나머지 호출자에게 결과가 전달됨
+- 기다리는 호출자가 모두 취소되면 작업도 취소
+- 후속 호출자는 copy로 복제한 결과를 받음 (호출측 변형이 서로 새지 않도록)
+"""
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.core import metrics
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self.counters: Dict[str, int] = {"calls": 0, "coalesced": 0, "abandoned": 0}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _Call, _task=None) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]], *,
+        copy: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        call = self._calls.get(key)
+        leader = call is None
+        if leader:
+            call = _Call(asyncio.get_running_loop().create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(functools.partial(self._forget, key, call))
+            self.counters["calls"] += 1
+        else:
+            self.counters["coalesced"] += 1
+            metrics.COALESCED.inc(kind=self.name)
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # 마지막 호출자까지 취소됨 → 작업 중단, 새 호출은 새 작업으로
+                self.counters["abandoned"] += 1
+                self._forget(key, call)
+                call.task.cancel()
+        return result if leader or copy is None else copy(result)
@@ -0,0 +1,87 @@
+"""
+임베딩 전 텍스트 전처리
+- 알라딘 설명의 HTML 태그/엔티티(이중 인코딩 포함) 제거, 공백 정리
+- 책 텍스트는 "제목. 분류. 설명" 고정 형식 (잘릴 때 설명 뒷부분부터 잘리도록)
+- 모델 토큰 예산에 맞춰 어절 경계에서 자름. 토크나이저 없이 결정적으로 계산해야
+  저장소 해시가 서빙/수집 사이에 일치하므로 WordPiece 토큰 수를 근사
+- 길이 정렬 순서: 비슷한 길이끼리 배치해 패딩을 줄이고 결과는 원래 순서로 되돌림
+"""
+import html
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.config import settings
+
+_BREAK = re.compile(r"<\s*(br|/p|p|/div|li)\b[^>]*>", re.I)
+_TAG = re.compile(r"<[^>]{0,500}>")
+_CTRL = re.compile(r"[\x00-\x08\x0b-\x1f\x7f\u200b\ufeff]")
+_SPACE = re.compile(r"\s+")
+
+
+def clean(text: Optional[str]) -> str:
+    """HTML 태그·엔티티·제어문자 제거 후 공백 하나로"""
+    if not text:
+        return ""
+    for _ in range(2):  # "&amp;lt;b&amp;gt;" 같은 이중 인코딩
+        if "&" not in text:
+            break
+        text = html.unescape(text)
+    text = _TAG.sub(" ", _BREAK.sub(" ", text))
+    return _SPACE.sub(" ", _CTRL.sub(" ", text)).strip()
+
+
+def _word_tokens(word: str) -> int:
+    """어절 하나의 근사 토큰 수: 한글 2음절, 그 외 4글자당 1토큰"""
+    hangul = sum(1 for c in word if "가" <= c <= "힣")
+    return max(1, (hangul + 1) // 2 + (len(word) - hangul + 3) // 4)
+
+
+def estimate_tokens(text: str) -> int:
+    return sum(_word_tokens(w) for w in text.split())
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """근사 토큰 수가 max_tokens를 넘지 않게 어절 경계에서 자름 (0 = 자르지 않음)"""
+    if max_tokens <= 0:
+        return text
+    words = text.split()
+    used = 0
+    for i, w in enumerate(words):
+        used += _word_tokens(w)
+        if used > max_tokens:
+            return " ".join(words[:i])
+    return text
+
+
+def _category(name: Optional[str]) -> str:
+    """"국내도서>소설/시/희곡>한국소설>..." → 최상위 몰 이름을 뺀 뒤 마지막 두 단계"""
+    parts = [p.strip() for p in (name or "").split(">") if p.strip()]
+    return " > ".join((parts[1:] or parts)[-2:])
+
+
+def book_text(book: Dict, max_tokens: Optional[int] = None) -> str:
+    sub = book.get("subInfo", {}) or {}
+    title = clean(book.get("title"))
+    desc = clean(book.get("description") or sub.get("description"))
+    parts = [p for p in (title, _category(clean(book.get("categoryName"))), desc) if p]
+    text = ". ".join(parts)
+    return truncate(text, settings.EMBED_MAX_TOKENS if max_tokens is None else max_tokens)
+
+
+def length_order(texts: Sequence[str]) -> np.ndarray:
+    """근사 토큰 수가 긴 텍스트부터의 인코딩 순서 (동률은 원래 순서)"""
+    return np.argsort([-estimate_tokens(t) for t in texts], kind="stable")
+
+
+def restore_order(vecs: np.ndarray, order: np.ndarray) -> np.ndarray:
+    out = np.empty_like(vecs)
+    out[order] = vecs
+    return out
+
+
+def padded_tokens(lengths: List[int], batch_size: int) -> int:
+    """배치별 최대 길이로 패딩했을 때의 총 토큰 수 (벤치마크용)"""
+    return sum(max(lengths[i:i + batch_size]) * len(lengths[i:i + batch_size])
+               for i in range(0, len(lengths), batch_size))
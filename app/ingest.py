@@ -0,0 +1,229 @@
+# app/ingest.py
+"""
+알라딘 카탈로그 일괄 수집 (오프라인 배치)
+- GENRE_TO_CATEGORY 전 카테고리 × ItemList QueryType × 페이지를 순회
+- 동시성 상한 + 초당 호출 제한, 체크포인트 파일로 중단 지점부터 재개
+- BookCache로 일괄 upsert, 설명은 큰 배치로 임베딩해 BookEmbedding에 저장
+
+    python -m app.ingest --pages 4 --concurrency 4 --rate 5 --checkpoint ingest_checkpoint.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.core.embed_worker import get_batcher
+from app.services import aladin
+from app.services.aladin import AladinClient, AladinError
+from app.services.catalogue import Catalogue
+from app.services.categories import GENRE_TO_CATEGORY
+from app.services.embedding_store import EmbeddingStore, book_text
+
+logger = logging.getLogger("app.ingest")
+
+DEFAULT_QUERY_TYPES = ["Bestseller", "ItemNewAll", "ItemNewSpecial", "ItemEditorChoice", "BlogBest"]
+_OPT_RESULT = "FullDescription,SubDescription,Description,Story,AuthorIntro,SubInfo"
+PAGE_SIZE = 50
+
+
+class RateLimiter:
+    """호출 간 최소 간격을 보장하는 단순 리미터 (rate: 초당 호출 수, 0 = 무제한)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.interval
+
+
+class Checkpoint:
+    """완료된 (카테고리, QueryType, 페이지)와 소진된 (카테고리, QueryType)을 JSON으로 보관"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.done: Set[str] = set()
+        self.exhausted: Set[str] = set()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.done = set(data.get("done", []))
+            self.exhausted = set(data.get("exhausted", []))
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(self.done), "exhausted": sorted(self.exhausted)}, f)
+        os.replace(tmp, self.path)
+
+
+def _has_description(b: Dict) -> bool:
+    sub = b.get("subInfo", {}) or {}
+    return bool(b.get("description") or sub.get("description"))
+
+
+class Ingestor:
+    def __init__(
+        self, cli: AladinClient, catalogue: Catalogue, store: EmbeddingStore, checkpoint: Checkpoint, *,
+        query_types: List[str], pages: int, concurrency: int, rate: float, embed_batch: int,
+        provider: Optional[str] = None, lookup: bool = False,
+    ):
+        self.cli = cli
+        self.catalogue = catalogue
+        self.store = store
+        self.checkpoint = checkpoint
+        self.query_types = query_types
+        self.pages = pages
+        self.sem = asyncio.Semaphore(max(1, concurrency))
+        self.limiter = RateLimiter(rate)
+        self.embed_batch = embed_batch
+        self.provider = provider
+        self.lookup = lookup
+        # (페이지 키, 책 목록, 이 페이지로 소진된 (카테고리, QueryType) 또는 None)
+        self._buffer: List[Tuple[str, List[Dict], Optional[str]]] = []
+        self._buffered = 0
+        self._flush_lock = asyncio.Lock()
+        self.stats: Dict[str, int] = {"calls": 0, "errors": 0, "books": 0, "embedded": 0, "skipped_pages": 0}
+
+    async def _call(self, fn, **kw) -> List[Dict]:
+        async with self.sem:
+            await self.limiter.wait()
+            self.stats["calls"] += 1
+            return await fn(**kw)
+
+    async def _enrich(self, books: List[Dict]) -> None:
+        """설명이 비어 있는 책은 ISBN으로 상세 조회"""
+        async def _one(b: Dict):
+            try:
+                found = await self._call(self.cli.item_lookup, item_id=b["isbn13"], opt_result=_OPT_RESULT)
+            except AladinError:
+                self.stats["errors"] += 1
+                return
+            if found:
+                full = found[0]
+                b["description"] = full.get("fullDescription") or full.get("description") or b.get("description")
+                b.setdefault("subInfo", {}).update(full.get("subInfo") or {})
+
+        await asyncio.gather(*[_one(b) for b in books if b.get("isbn13") and not _has_description(b)])
+
+    async def _walk(self, category_id: int, query_type: str) -> None:
+        pair = f"{category_id}:{query_type}"
+        if pair in self.checkpoint.exhausted:
+            return
+        for page in range(1, self.pages + 1):
+            key = f"{pair}:{page}"
+            if key in self.checkpoint.done:
+                self.stats["skipped_pages"] += 1
+                continue
+            try:
+                books = await self._call(
+                    self.cli.item_list, query_type=query_type, start=page, max_results=PAGE_SIZE,
+                    category_id=category_id, opt_result=_OPT_RESULT,
+                )
+            except AladinError as e:
+                self.stats["errors"] += 1
+                logger.warning("page failed %s: %s", key, e)
+                # 실패한 페이지 뒤로는 진행하지 않음 (소진 판정이 앞서지 않도록). 다음 실행에서 재시도
+                break
+            if self.lookup:
+                await self._enrich(books)
+            await self.catalogue.upsert_books(books, category_id=category_id)
+            self.stats["books"] += len(books)
+            last = len(books) < PAGE_SIZE
+            await self._add(key, books, pair if last else None)
+            if last:
+                break
+
+    async def _add(self, page_key: str, books: List[Dict], exhausted: Optional[str]) -> None:
+        self._buffer.append((page_key, books, exhausted))
+        self._buffered += len(books)
+        if self._buffered >= self.embed_batch:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """버퍼에 쌓인 책을 한 번에 임베딩·저장한 뒤에야 해당 페이지를 완료로 기록"""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            buf, self._buffer, self._buffered = self._buffer, [], 0
+            books = [b for _, page, _ in buf for b in page]
+            await self.store.embed_books(books, [book_text(b) for b in books], provider=self.provider)
+            self.stats["embedded"] += len(books)
+            for key, _, exhausted in buf:
+                self.checkpoint.done.add(key)
+                if exhausted:
+                    self.checkpoint.exhausted.add(exhausted)
+            self.checkpoint.save()
+
+    async def run(self) -> Dict[str, int]:
+        t0 = time.perf_counter()
+        tasks = [asyncio.ensure_future(self._walk(cid, qt))
+                 for cid in GENRE_TO_CATEGORY.values() for qt in self.query_types]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # 한 작업이 실패(임베딩 오류 등)하면 나머지도 멈춘 뒤 호출자가 DB를 닫게 함
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await self.flush()
+        self.checkpoint.save()
+        return {**self.stats, "elapsed_s": round(time.perf_counter() - t0, 2)}
+
+
+async def _main(args) -> Dict[str, int]:
+    db = args.db or settings.CATALOGUE_DB
+    catalogue = Catalogue(db, args.db or settings.EMBEDDING_DB)
+    store = EmbeddingStore(args.db or settings.EMBEDDING_DB)
+    # 수집 트래픽은 응답 캐시를 거치지 않음
+    cli = AladinClient(api_key=args.key, base=args.base, use_cache=False, priority="background")
+    ing = Ingestor(
+        cli, catalogue, store, Checkpoint(args.checkpoint),
+        query_types=args.query_types, pages=args.pages, concurrency=args.concurrency,
+        rate=args.rate, embed_batch=args.embed_batch, provider=args.provider, lookup=args.lookup,
+    )
+    try:
+        return await ing.run()
+    finally:
+        await get_batcher().stop()
+        await catalogue.close()
+        await store.close()
+        await aladin.shutdown()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Crawl Aladin categories into the local catalogue")
+    ap.add_argument("--query-types", nargs="+", default=DEFAULT_QUERY_TYPES)
+    ap.add_argument("--pages", type=int, default=4, help="카테고리·QueryType별 최대 페이지 수 (페이지당 50권)")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--rate", type=float, default=5.0, help="초당 최대 호출 수 (0 = 무제한)")
+    ap.add_argument("--embed-batch", type=int, default=512)
+    ap.add_argument("--provider", default=None, help="임베딩 제공자 (기본: EMBEDDING_PROVIDER)")
+    ap.add_argument("--lookup", action="store_true", help="설명이 없는 책은 ISBN 상세 조회로 보강")
+    ap.add_argument("--checkpoint", default="ingest_checkpoint.json")
+    ap.add_argument("--db", default=None, help="카탈로그/임베딩 DB 경로 (기본: 설정값)")
+    ap.add_argument("--key", default=None, help="TTB 키 (기본: ALADIN_TTB_KEY)")
+    ap.add_argument("--base", default=None, help="API 베이스 URL (스텁 서버 등)")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(json.dumps(asyncio.run(_main(args)), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
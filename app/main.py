@@ -1,23 +1,118 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException
+import time
+_T_START = time.perf_counter()
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import numpy as np
+from fastapi import APIRouter, FastAPI, HTTPException, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
 # app/main.py
-from app.core import nlp
-from app.core.ranker import rerank
+from app.config import settings
+from app.core import metrics, nlp
+from app.core import openai_embed
+from app.core.embed_worker import get_batcher
+from app.core.ranker import BookColumns, prefilter, rerank, rerank_batch, rerank_metadata
 from app.core.interview import QUESTIONS, parse_answer
+from app.services import aladin
 from app.services.aladin import get_client, AladinError
+from app.services.aladin_guard import get_guard
+from app.services.cache import get_cache
+from app.services.catalogue import get_catalogue
+from app.services.embedding_store import book_text, get_store
+from app.services.lexical_index import get_lexical_index, index_books, load_lexical_index
+from app.services.semantic_cache import constraints_key, get_semantic_cache
+from app.services.sessions import get_sessions
+from app.services.vector_index import get_index, load_index
 from app.services.categories import get_category_id
 
 
-app = FastAPI(title="SQUIN Book Agent")
+logger = logging.getLogger(__name__)
+_T_IMPORTED = time.perf_counter()
+_startup: Dict = {"app_import_s": _T_IMPORTED - _T_START}
+_warmup_task: Optional[asyncio.Task] = None
+_background: Set[asyncio.Task] = set()
+
+async def _warmup() -> None:
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, nlp.warmup)
+        _startup["ready_after_s"] = time.perf_counter() - _T_START
+        logger.info("embedding model ready: %s", nlp.timings)
+    except Exception as e:
+        _startup["warmup_error"] = str(e)
+        logger.warning("embedding warm-up failed: %s", e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _warmup_task
+    await aladin.startup()
+    await get_batcher().start()
+    if settings.EMBEDDING_WARMUP:
+        # 모델 로드는 백그라운드에서: 서버는 즉시 떠 있고 /readyz 로 준비 여부 확인
+        _warmup_task = asyncio.get_running_loop().create_task(_warmup())
+    # 멀티 워커 런처(app.serve)가 fork 전에 올려 둔 인덱스는 그대로 공유
+    if settings.VECTOR_INDEX_ON_STARTUP and get_index() is None:
+        try:
+            index = await load_index()
+            logger.info("vector index loaded: %d books", len(index) if index else 0)
+        except Exception as e:
+            # 인덱스가 없어도 알라딘 검색 경로로 서비스 가능
+            logger.warning("vector index not loaded: %s", e)
+    if settings.LEXICAL_INDEX_ENABLED and not len(get_lexical_index()):
+        try:
+            lex = await load_lexical_index()
+            logger.info("lexical index loaded: %d books", len(lex))
+        except Exception as e:
+            logger.warning("lexical index not loaded: %s", e)
+    try:
+        yield
+    finally:
+        if _background:
+            await asyncio.gather(*_background, return_exceptions=True)
+        await get_cache().close()
+        await get_store().close()
+        await get_catalogue().close()
+        for pre in _prefetch.values():
+            pre.cancel()
+        _prefetch.clear()
+        await get_sessions().close()
+        if _warmup_task is not None and not _warmup_task.done():
+            _warmup_task.cancel()
+        await get_batcher().stop()
+        await openai_embed.close_clients()
+        await aladin.shutdown()
+
+router = APIRouter()
+
+# ---------- Health ----------
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readyz():
+    body = {
+        "ready": nlp.is_ready(),
+        "provider": nlp.resolve_provider(),
+        "timings": {**_startup, **nlp.timings},
+    }
+    if not body["ready"]:
+        raise HTTPException(status_code=503, detail=body)
+    return body
 
 # ---------- Interview API ----------
 class InterviewQuestionsOut(BaseModel):
     questions: List[Dict]
 
-@app.get("/interview/questions", response_model=InterviewQuestionsOut)
+@router.get("/interview/questions", response_model=InterviewQuestionsOut)
 async def interview_questions():
     return {"questions": QUESTIONS}
 
@@ -28,27 +123,99 @@ class ParseIn(BaseModel):
     narrative: str = ""
     structured: Optional[Dict] = None       # {"length": "..."} or {"recency": [...]} 등
     genres: Optional[List[str]] = None       # Q5 다중선택 값
+    session_id: Optional[str] = None         # 있으면 서버 세션 상태를 이어서 사용 (create 때 받은 token)
+    # 선행 후보 수집(prefetch)에 쓰는 키/설정
+    aladin_key: Optional[str] = None
+    embedding_provider: Optional[str] = None
+    openai_key: Optional[str] = None
 
 class ParseOut(BaseModel):
     constraints: Dict
     narrative: str
     negatives: List[str]
+    session_id: str
 
-@app.post("/interview/parse", response_model=ParseOut)
+_QIDS = [q["id"] for q in QUESTIONS]
+
+@router.post("/interview/parse", response_model=ParseOut)
 async def interview_parse(payload: ParseIn):
+    store = get_sessions()
+    sess = await store.get(payload.session_id) if payload.session_id is not None else None
+    if payload.session_id is not None and sess is None:
+        raise HTTPException(status_code=404, detail="Unknown session_id")
+    base_cons = sess["constraints"] if sess else payload.constraints
+    base_narr = sess["narrative"] if sess else payload.narrative
+
     cons, narr, negs = parse_answer(
         payload.answer,
-        payload.constraints,
-        payload.narrative,
+        base_cons,
+        base_narr,
         qid=payload.qid,
         structured=payload.structured,
         genre_selector=payload.genres,
     )
-    return {"constraints": cons, "narrative": narr, "negatives": negs}
+    all_negs = sorted(set((sess["negatives"] if sess else []) + negs))
+    if sess:
+        sid = sess["token"]
+        await store.update(sid, state=payload.qid, narrative=narr, constraints=cons, negatives=all_negs)
+    else:
+        sid = await store.create(state=payload.qid, narrative=narr, constraints=cons, negatives=all_negs)
+
+    # Q1(내러티브)과 Q5(장르)가 모이면 후보 수집·임베딩을 미리 시작
+    if (settings.PREFETCH_ENABLED and narr and payload.qid in _QIDS
+            and _QIDS.index(payload.qid) >= _QIDS.index("Q5_GENRE")):
+        _start_prefetch(sid, RecommendIn(
+            message=narr, constraints=cons, aladin_key=payload.aladin_key,
+            embedding_provider=payload.embedding_provider, openai_key=payload.openai_key,
+        ))
+    return {"constraints": cons, "narrative": narr, "negatives": negs, "session_id": sid}
+
+# ---------- Cache ----------
+@router.get("/cache/stats")
+async def cache_stats():
+    return get_cache().stats()
+
+@router.get("/cache/semantic/stats")
+async def semantic_cache_stats():
+    return get_semantic_cache().stats()
+
+@router.get("/aladin/guard/stats")
+async def aladin_guard_stats():
+    return get_guard().stats()
+
+@router.get("/lexical/stats")
+async def lexical_stats():
+    return get_lexical_index().stats()
+
+@router.get("/embedding/stats")
+async def embedding_stats():
+    return get_batcher().stats()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus 텍스트 포맷. 캐시/배처 카운터는 기존 dict를 그대로 노출"""
+    extra = metrics.render_counters(
+        "squin_aladin_cache_total", "Aladin response cache events", "event", get_cache().counters,
+    ) + metrics.render_counters(
+        "squin_aladin_singleflight_total", "Aladin upstream calls vs coalesced callers", "event",
+        aladin.flight_stats(),
+    ) + metrics.render_counters(
+        "squin_aladin_guard_total", "Aladin calls rejected by rate limit/quota/breaker and stale fallbacks",
+        "event", get_guard().counters,
+    ) + metrics.render_counters(
+        "squin_semantic_cache_total", "Recommendation semantic cache events", "event",
+        get_semantic_cache().counters,
+    ) + metrics.render_counters(
+        "squin_lexical_index_total", "BM25 lexical index updates and searches", "event",
+        get_lexical_index().counters,
+    ) + metrics.render_counters(
+        "squin_embed_worker_total", "Embedding batcher jobs/texts/batches/errors", "kind", get_batcher().counters,
+    )
+    return PlainTextResponse(metrics.render(extra), media_type="text/plain; version=0.0.4")
 
 # ---------- Recommend API ----------
 class RecommendIn(BaseModel):
-    message: str
+    message: str = ""  # session_id로 호출하면 세션 내러티브 사용
     constraints: Dict = {}
     query_type: Optional[str] = None
     category: Optional[str] = None
@@ -57,88 +224,568 @@ class RecommendIn(BaseModel):
     max_results: int = 40
     isbn: Optional[str] = None
     aladin_key: Optional[str] = None
-    embedding_provider: Optional[str] = None  # "sbert" or "openai"
+    embedding_provider: Optional[str] = None  # "sbert", "sbert-onnx" or "openai"
     openai_key: Optional[str] = None
+    retrieval: str = "aladin"  # "aladin"(실시간 검색), "index"(로컬 카탈로그 FAISS), "lexical"(BM25 색인)
+    retrieval_k: int = 200
+    pages: int = 1  # 카테고리별로 동시에 가져올 start 페이지 수
+    prefilter_n: Optional[int] = None  # 임베딩할 1단계 생존 후보 수 (None = PREFILTER_TOP_N, 0 = 전부)
+    semantic_cache: bool = True  # False면 의미 캐시 조회/저장을 건너뜀
 
 class RecommendOut(BaseModel):
     items: List[Dict]
 
-def _book_text(b: Dict) -> str:
-    sub = b.get("subInfo", {})
-    return b.get("description") or sub.get("description") or b.get("title") or ""
+# 설명/요약을 포함하도록 OptResult 지정
+_OPT_RESULT = "FullDescription,SubDescription,Description,Story,AuthorIntro,SubInfo"
 
-async def _collect_books(cli, payload: RecommendIn, cat_id: Optional[int]):
-    # 설명/요약을 포함하도록 OptResult 지정
-    opt = "FullDescription,SubDescription,Description,Story,AuthorIntro,SubInfo"
+async def _collect_books(cli, payload: RecommendIn, cat_id: Optional[int], start: Optional[int] = None):
+    with metrics.timed("collect_books"):
+        return await _query_books(cli, payload, cat_id, start or payload.start)
+
+async def _query_books(cli, payload: RecommendIn, cat_id: Optional[int], start: int):
     if payload.isbn:
-        return await cli.item_lookup(item_id=payload.isbn, item_id_type="ISBN13", opt_result=opt)
+        return await cli.item_lookup(item_id=payload.isbn, item_id_type="ISBN13", opt_result=_OPT_RESULT)
     if payload.query_type:
         return await cli.item_list(
-            query_type=payload.query_type, start=payload.start,
+            query_type=payload.query_type, start=start,
             max_results=max(payload.max_results, 10), category_id=cat_id,
-            opt_result=opt,
+            opt_result=_OPT_RESULT,
         )
     return await cli.item_search(
-        query=payload.message, start=payload.start,
+        query=payload.message, start=start,
         max_results=payload.max_results, category_id=cat_id,
-        opt_result=opt,
+        opt_result=_OPT_RESULT,
     )
 
-@app.post("/recommend", response_model=RecommendOut)
-async def recommend(payload: RecommendIn):
+def _dedupe(books: List[Dict]) -> List[Dict]:
+    seen = set()
+    out = []
+    for b in books:
+        key = b.get("isbn13") or b.get("itemId") or id(b)
+        if key not in seen:
+            seen.add(key)
+            out.append(b)
+    return out
+
+async def _persist_books(books: List[Dict], cat_id: Optional[int]) -> None:
+    """카탈로그 적재 (인덱스 재구축 시 후보로 사용) + BM25 색인. 실패해도 추천은 계속"""
     try:
-        cli = AladinClient(api_key=payload.aladin_key) if payload.aladin_key else get_client()
-
-        # Category 처리: 명시적 > 장르 후보
-        cat_id = payload.category_id
-        if not cat_id and payload.category:
-            cat_id = get_category_id(payload.category)
-        if not cat_id and isinstance(payload.constraints, dict):
-            cand = payload.constraints.get("genre_candidates")
-            if isinstance(cand, list) and cand:
-                cat_id = get_category_id(cand[0])
-
-        # 1차 시도
-        books = await _collect_books(cli, payload, cat_id)
-        # 결과 없음 → 완화(카테고리 제거) → 그래도 없음 → 베스트셀러 fallback
-        if not books:
-            books = await _collect_books(cli, payload, None)
-        if not books:
-            books = await cli.item_list(query_type="Bestseller", max_results=50, category_id=None)
+        await get_catalogue().upsert_books(books, category_id=cat_id)
+    except Exception as e:
+        logger.warning("catalogue upsert failed: %s", e)
+    if settings.LEXICAL_INDEX_ENABLED:
+        # 토큰화 + 검색 스레드와 공유하는 락: 이벤트 루프를 막지 않도록 실행기에서
+        await asyncio.get_running_loop().run_in_executor(
+            None, index_books, [{**b, "categoryId": cat_id} for b in books])
+
+def _spawn_background(coro) -> asyncio.Task:
+    """요청과 무관하게 끝까지 실행할 작업 (종료 시 drain, 예외는 로그만)"""
+    task = asyncio.get_running_loop().create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background_done)
+    return task
+
+def _background_done(t: asyncio.Task) -> None:
+    _background.discard(t)
+    if not t.cancelled() and t.exception() is not None:
+        logger.warning("background task failed: %s", t.exception())
+
+async def _collect_candidates(cli, payload: RecommendIn, cat_ids: List[int]) -> List[Dict]:
+    """
+    선택된 모든 카테고리 × 페이지를 동시에 조회하고, 완화 검색/베스트셀러 fallback은
+    빈 결과를 기다리지 않고 미리(speculative) 띄운다. 전체 단계에 deadline 적용.
+    """
+    sem = asyncio.Semaphore(max(1, settings.COLLECT_MAX_CONCURRENCY))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.COLLECT_DEADLINE_S
+
+    async def _fetch(coro_fn, cat_id: Optional[int]) -> List[Dict]:
+        async with sem:
+            books = await coro_fn()
+        # 적재는 deadline 밖에서: 응답이 오면 바로 반환
+        _spawn_background(_persist_books(books, cat_id))
+        return books
+
+    def _spawn(coro_fn, cat_id: Optional[int]) -> asyncio.Task:
+        return loop.create_task(_fetch(coro_fn, cat_id))
+
+    pages = 1 if payload.isbn else max(1, payload.pages)
+    cats: List[Optional[int]] = [None] if payload.isbn or not cat_ids else list(cat_ids)
+    primary = [
+        _spawn(functools.partial(_collect_books, cli, payload, c, payload.start + p), c)
+        for c in cats for p in range(pages)
+    ]
+    # 결과 없음 → 완화(카테고리 제거) → 그래도 없음 → 베스트셀러 fallback
+    stages = [primary]
+    names = ["primary"]
+    if cats != [None]:
+        stages.append([_spawn(functools.partial(_collect_books, cli, payload, None), None)])
+        names.append("relaxed")
+    stages.append([_spawn(functools.partial(
+        cli.item_list, query_type="Bestseller", max_results=50, category_id=None,
+    ), None)])
+    names.append("bestseller")
+
+    first_error: Optional[BaseException] = None
+    try:
+        for name, tasks in zip(names, stages):
+            timeout = max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait(tasks, timeout=timeout)
+            books: List[Dict] = []
+            for t in tasks:
+                if t not in done:
+                    continue
+                if t.exception() is not None:
+                    first_error = first_error or t.exception()
+                    continue
+                books.extend(t.result())
+            if books:
+                metrics.COLLECT_FALLBACK.inc(stage=name)
+                return _dedupe(books)
+    finally:
+        for tasks in stages:
+            for t in tasks:
+                t.cancel()
+    metrics.COLLECT_FALLBACK.inc(stage="error" if first_error is not None else "empty")
+    if first_error is not None:
+        raise first_error
+    return []
+
+def _category_ids(payload: RecommendIn) -> List[int]:
+    """Category 처리: 명시적 > 장르 후보(전체)"""
+    if payload.category_id:
+        return [payload.category_id]
+    if payload.category and get_category_id(payload.category):
+        return [get_category_id(payload.category)]
+    ids: List[int] = []
+    if isinstance(payload.constraints, dict):
+        cand = payload.constraints.get("genre_candidates")
+        if isinstance(cand, list):
+            ids = [c for c in (get_category_id(g) for g in cand) if c]
+    return ids
+
+def _to_item(b: Dict) -> Dict:
+    subinfo = b.get("subInfo", {}) or {}
+    return {
+        "title": b.get("title"),
+        "author": b.get("author"),
+        "isbn13": b.get("isbn13"),
+        "category": b.get("categoryName"),
+        "pubdate": b.get("pubDate"),
+        "cover": b.get("cover"),
+        "link": b.get("link"),
+        "scores": b.get("_scores"),
+        # 설명 계열 필드 그대로 전달하여 프런트에서 3~5문장으로 요약 노출
+        "description": b.get("description") or subinfo.get("description"),
+        "overview": b.get("overview") or subinfo.get("overview"),
+        "fullDescription": b.get("fullDescription") or subinfo.get("fullDescription"),
+        "subDescription": subinfo.get("subDescription"),
+        # 여전히 제공하되 UI는 사용하지 않음
+    }
+
+# ---------- Speculative prefetch (interview sessions) ----------
+class _Prefetch:
+    __slots__ = ("key", "candidates", "narrative")
+
+    def __init__(self, key: Tuple, candidates: asyncio.Task, narrative: asyncio.Task):
+        self.key = key
+        self.candidates = candidates
+        self.narrative = narrative
+
+    def cancel(self) -> None:
+        self.candidates.cancel()
+        self.narrative.cancel()
+
+_prefetch: "OrderedDict[str, _Prefetch]" = OrderedDict()
+
+def _key_digest(key: Optional[str]) -> Optional[str]:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest() if key else None
+
+def _prefetch_key(payload: RecommendIn) -> Tuple:
+    # 호출자 자격 증명도 포함: 다른 키로 수집·임베딩한 결과를 넘겨주지 않음
+    # 제약도 포함: 1단계 prefilter가 그 제약으로 후보를 걸렀으므로 제약이 바뀌면 재사용하지 않음
+    return (payload.message, tuple(_category_ids(payload)), nlp.resolve_provider(payload.embedding_provider),
+            payload.aladin_key, _key_digest(payload.openai_key), payload.query_type, payload.pages,
+            payload.prefilter_n, constraints_key(payload.constraints))
 
+def _consume_exception(t: asyncio.Task) -> None:
+    if not t.cancelled() and t.exception() is not None:
+        logger.info("prefetch failed: %s", t.exception())
+
+async def _fetch_and_embed(payload: RecommendIn):
+    cli = get_client(payload.aladin_key)
+    books = await _collect_candidates(cli, payload, _category_ids(payload))
+    if not books:
+        return [], None, 0
+    pool = len(books)
+    books, _ = _prefilter(payload, books, await _lexical_scores(payload, books))
+    bvecs = await get_store().embed_books(
+        books, [book_text(b) for b in books],
+        provider=payload.embedding_provider, openai_key=payload.openai_key,
+    )
+    return books, bvecs, pool
+
+def _start_prefetch(session_id: str, payload: RecommendIn) -> None:
+    key = _prefetch_key(payload)
+    cur = _prefetch.get(session_id)
+    if cur is not None and cur.key == key:
+        _prefetch.move_to_end(session_id)
+        return
+    if cur is not None:
+        cur.cancel()
+    loop = asyncio.get_running_loop()
+    cand = loop.create_task(_fetch_and_embed(payload))
+    narr = loop.create_task(get_batcher().embed(
+        [payload.message], provider=payload.embedding_provider, openai_key=payload.openai_key,
+    ))
+    for t in (cand, narr):
+        t.add_done_callback(_consume_exception)
+    _prefetch[session_id] = _Prefetch(key, cand, narr)
+    _prefetch.move_to_end(session_id)
+    while len(_prefetch) > settings.PREFETCH_MAX_SESSIONS:
+        _, old = _prefetch.popitem(last=False)
+        old.cancel()
+
+async def _take_prefetch(session_id: str, payload: RecommendIn):
+    """세션의 선행 결과가 현재 요청과 일치하면 (books, bvecs, narr_vec, pool), 아니면 None"""
+    pre = _prefetch.get(session_id)
+    if pre is None or pre.key != _prefetch_key(payload):
+        metrics.PREFETCH.inc(result="miss")
+        return None
+    del _prefetch[session_id]
+    try:
+        (books, bvecs, pool), qvecs = await asyncio.wait_for(
+            asyncio.gather(pre.candidates, pre.narrative), timeout=settings.PREFETCH_WAIT_S,
+        )
+    except Exception:
+        pre.cancel()
+        metrics.PREFETCH.inc(result="failed")
+        return None
+    if not books:
+        metrics.PREFETCH.inc(result="empty")
+        return None
+    metrics.PREFETCH.inc(result="used")
+    return books, bvecs, qvecs[0], pool
+
+def _event(stage: str, top: List[Dict], timer: metrics.StageTimer, **extra) -> Dict:
+    return {"stage": stage, "items": [_to_item(b) for b in top], "timings": timer.snapshot(), **extra}
+
+def _semantic_key(payload: RecommendIn, cat_ids: List[int]) -> Optional[Tuple]:
+    """의미 캐시 키 (비활성/내러티브 없음이면 None). 후보 집합을 바꾸는 파라미터를 모두 포함"""
+    if not (settings.SEMANTIC_CACHE_ENABLED and payload.semantic_cache and payload.message):
+        return None
+    prov = nlp.resolve_provider(payload.embedding_provider)
+    return (constraints_key(payload.constraints), tuple(cat_ids), prov, nlp.model_name(prov),
+            payload.query_type, payload.isbn, payload.start, payload.max_results, payload.pages,
+            payload.retrieval, payload.retrieval_k, payload.prefilter_n)
+
+async def _lexical_scores(payload: RecommendIn, books: List[Dict]):
+    """후보별 BM25 점수 (색인 비활성/비어 있으면 None → 의미 점수만 사용). 채점은 스레드에서"""
+    lex = get_lexical_index()
+    if not (settings.LEXICAL_INDEX_ENABLED and payload.message and len(lex)):
+        return None
+    return await asyncio.get_running_loop().run_in_executor(None, lex.scores_for, payload.message, books)
+
+def _prefilter(payload: RecommendIn, books: List[Dict], lex_scores):
+    """
+    1단계: 메타데이터 점수 상위 N권과 그 BM25 점수만 남김 (임베딩 비용을 N권으로 고정).
+    기본 수집(1페이지 × 40권)은 N 이하라 그대로 통과: pages/장르를 늘린 요청이나 lexical 검색에서만 거름
+    """
+    n = settings.PREFILTER_TOP_N if payload.prefilter_n is None else payload.prefilter_n
+    keep = prefilter(books, payload.constraints, n, lexical=lex_scores)
+    if len(keep) == len(books):
+        return books, lex_scores
+    return [books[i] for i in keep], (None if lex_scores is None else lex_scores[keep])
+
+def _stage_counts(top: List[Dict], pool: int, embedded: int) -> List[Dict]:
+    """_scores에 단계별 후보 수 기록: pool(1단계 후보), embedded(의미 점수를 계산한 후보)"""
+    for b in top:
+        b["_scores"].update(pool=pool, embedded=embedded)
+    return top
+
+def _remember(key: Optional[Tuple], narr_vec, top: List[Dict]) -> None:
+    if key is not None:
+        get_semantic_cache().store(key, narr_vec, top)
+
+async def _recommend_events(
+    payload: RecommendIn, session_id: Optional[str], *,
+    progressive: bool = False, timer: Optional[metrics.StageTimer] = None,
+):
+    """
+    추천 파이프라인. {"stage", "items", "timings"} 이벤트를 순서대로 내보낸다.
+    progressive=True면 임베딩 전에 규칙+인기도만으로 만든 "preview"를 먼저 보낸다.
+    마지막 이벤트는 항상 "final".
+    """
+    timer = timer or metrics.StageTimer()
+    # 이후 생성되는 태스크(알라딘 호출 등)가 같은 타이머에 구간을 기록
+    metrics.current_timer.set(timer)
+    if session_id is not None:
+        sess = await get_sessions().get(session_id)
+        if sess is None:
+            raise HTTPException(status_code=404, detail="Unknown session_id")
+        payload = payload.model_copy(update={
+            "message": payload.message or sess["narrative"],
+            "constraints": payload.constraints or sess["constraints"],
+        })
+        pre = await _take_prefetch(session_id, payload)
+        timer.mark("prefetch")
+        if pre is not None:
+            # 면담 중 미리 수집·임베딩한 후보로 최종 재정렬만 수행
+            books, bvecs, narr_vec, pool = pre
+            top = rerank(narr_vec, books, bvecs, payload.constraints, topk=5,
+                         lexical=await _lexical_scores(payload, books))
+            _stage_counts(top, pool, len(books))
+            timer.mark("rank")
+            _remember(_semantic_key(payload, _category_ids(payload)), narr_vec, top)
+            yield _event("final", top, timer)
+            return
+
+    cat_ids = _category_ids(payload)
+    sem_key = _semantic_key(payload, cat_ids)
+    narr_vec = None
+    if sem_key is not None:
+        # 내러티브만 먼저 인코딩해 비슷한 요청의 결과가 있으면 알라딘 조회·책 임베딩을 생략
+        narr_vec = (await get_batcher().embed(
+            [payload.message], provider=payload.embedding_provider, openai_key=payload.openai_key,
+        ))[0]
+        timer.mark("embed_query")
+        hit = get_semantic_cache().lookup(sem_key, narr_vec)
+        timer.mark("semantic_cache")
+        if hit is not None:
+            top, sim = hit
+            yield _event("final", top, timer, cache={"semantic": round(sim, 4)})
+            return
+
+    # 로컬 인덱스 검색: 네트워크 없이 카탈로그에서 후보 추출
+    index = get_index() if payload.retrieval == "index" else None
+    if index is not None:
+        if narr_vec is None:
+            narr_vec = (await get_batcher().embed(
+                [payload.message], provider=payload.embedding_provider, openai_key=payload.openai_key,
+            ))[0]
+            timer.mark("embed")
+        if len(narr_vec) == index.dim:
+            books, bvecs, _ = index.search(narr_vec, payload.retrieval_k, category_ids=cat_ids)
+            timer.mark("retrieve")
+            if books:
+                top = rerank(narr_vec, books, bvecs, payload.constraints, topk=5,
+                             lexical=await _lexical_scores(payload, books))
+                _stage_counts(top, len(books), len(books))
+                timer.mark("rank")
+                _remember(sem_key, narr_vec, top)
+                yield _event("final", top, timer)
+                return
+
+    books: List[Dict] = []
+    lex_scores = None
+    if payload.retrieval == "lexical" and settings.LEXICAL_INDEX_ENABLED:
+        # 키워드 위주 질의: 로컬 BM25 색인에서 후보 추출 (알라딘 호출 없음)
+        books, lex_scores = await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+            get_lexical_index().search, payload.message, payload.retrieval_k, category_ids=cat_ids,
+            exclude_terms=(payload.constraints or {}).get("exclude_terms"),
+        ))
+        timer.mark("retrieve")
+    if not books:
+        cli = get_client(payload.aladin_key)
+        books = await _collect_candidates(cli, payload, cat_ids)
+        timer.mark("collect")
         if not books:
-            return {"items": []}
-
-        texts = [_book_text(b) for b in books]
-        bvecs = nlp.embed_texts(texts, provider=payload.embedding_provider, openai_key=payload.openai_key)
-        narr_vec = nlp.embed_texts([payload.message], provider=payload.embedding_provider, openai_key=payload.openai_key)[0]
-
-        top = rerank(narr_vec, books, bvecs, payload.constraints, topk=5)
-
-        out = []
-        for b in top:
-            subinfo = b.get("subInfo", {}) or {}
-            out.append({
-                "title": b.get("title"),
-                "author": b.get("author"),
-                "isbn13": b.get("isbn13"),
-                "category": b.get("categoryName"),
-                "pubdate": b.get("pubDate"),
-                "cover": b.get("cover"),
-                "link": b.get("link"),
-                "scores": b.get("_scores"),
-                # 설명 계열 필드 그대로 전달하여 프런트에서 3~5문장으로 요약 노출
-                "description": b.get("description") or subinfo.get("description"),
-                "overview": b.get("overview") or subinfo.get("overview"),
-                "fullDescription": b.get("fullDescription") or subinfo.get("fullDescription"),
-                "subDescription": subinfo.get("subDescription"),
-                # 여전히 제공하되 UI는 사용하지 않음
-            })
-        return {"items": out}
-
-    except AladinError as e:
-        raise HTTPException(status_code=502, detail=f"Aladin API error: {e}")
-    except RuntimeError as e:
-        raise HTTPException(status_code=500, detail=f"Embedding error: {e}")
+            yield _event("final", [], timer)
+            return
+        lex_scores = await _lexical_scores(payload, books)
+    if progressive:
+        yield _event("preview", rerank_metadata(books, payload.constraints, topk=5), timer)
+
+    # 2단계 랭킹: 큰 후보 풀은 임베딩 없이 걸러 상위 N권만 의미 점수 계산
+    pool = len(books)
+    books, lex_scores = _prefilter(payload, books, lex_scores)
+    if len(books) < pool:
+        timer.mark("prefilter")
+    texts = [book_text(b) for b in books]
+    if narr_vec is None:
+        # 책 미스분과 내러티브를 한 배치로 인코딩 (이벤트 루프 밖 스레드에서 실행)
+        bvecs, qvecs = await get_store().embed_books_and_queries(
+            books, texts, [payload.message],
+            provider=payload.embedding_provider, openai_key=payload.openai_key,
+        )
+        narr_vec = qvecs[0]
+    else:
+        bvecs = await get_store().embed_books(
+            books, texts, provider=payload.embedding_provider, openai_key=payload.openai_key,
+        )
+    timer.mark("embed")
+
+    top = rerank(narr_vec, books, bvecs, payload.constraints, topk=5, lexical=lex_scores)
+    _stage_counts(top, pool, len(books))
+    timer.mark("rank")
+    _remember(sem_key, narr_vec, top)
+    _startup.setdefault("first_recommend_s", time.perf_counter() - _T_START)
+    yield _event("final", top, timer)
+
+def _http_error(e: Exception) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, AladinError):
+        return HTTPException(status_code=502, detail=f"Aladin API error: {e}")
+    if isinstance(e, RuntimeError):
+        return HTTPException(status_code=500, detail=f"Embedding error: {e}")
+    return HTTPException(status_code=500, detail=f"Server error: {e}")
+
+@router.post("/recommend", response_model=RecommendOut)
+async def recommend(payload: RecommendIn, response: Response, session_id: Optional[str] = None):
+    timer = metrics.StageTimer()
+    status = 200
+    try:
+        final = {"items": []}
+        async for ev in _recommend_events(payload, session_id, timer=timer):
+            final = ev
+        response.headers["Server-Timing"] = timer.server_timing()
+        return {"items": final["items"]}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Server error: {e}")
+        err = _http_error(e)
+        status = err.status_code
+        err.headers = {"Server-Timing": timer.server_timing()}
+        raise err
+    finally:
+        metrics.REQUEST_SECONDS.observe(timer.elapsed(), endpoint="recommend", status=str(status))
+
+@router.post("/recommend/stream")
+async def recommend_stream(payload: RecommendIn, session_id: Optional[str] = None):
+    """
+    NDJSON 스트림: preview(규칙+인기도) → final(의미 유사도 포함) 순으로 한 줄씩 전송.
+    헤더가 먼저 나가므로 Server-Timing 대신 각 이벤트의 timings를 사용
+    """
+    async def _lines():
+        timer = metrics.StageTimer()
+        status = 200
+        try:
+            async for ev in _recommend_events(payload, session_id, progressive=True, timer=timer):
+                yield json.dumps(ev, ensure_ascii=False) + "\n"
+        except Exception as e:
+            err = _http_error(e)
+            status = err.status_code
+            yield json.dumps({"stage": "error", "status": err.status_code, "detail": err.detail},
+                             ensure_ascii=False) + "\n"
+        finally:
+            metrics.REQUEST_SECONDS.observe(timer.elapsed(), endpoint="recommend_stream", status=str(status))
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+# ---------- Batch recommend (뉴스레터 등 다수 독자) ----------
+class BatchProfile(BaseModel):
+    id: Optional[str] = None
+    message: str
+    constraints: Dict = {}
+    category: Optional[str] = None
+    category_id: Optional[int] = None
+
+class BatchIn(BaseModel):
+    profiles: List[BatchProfile]
+    # 후보 풀은 카테고리 조합별로 한 번만 ItemList로 수집 (내러티브별 검색 대신)
+    query_type: str = "Bestseller"
+    max_results: int = 50
+    pages: int = 2
+    topk: int = 5
+    aladin_key: Optional[str] = None
+    embedding_provider: Optional[str] = None
+    openai_key: Optional[str] = None
+
+def _group_profiles(batch: BatchIn) -> "OrderedDict[Tuple[int, ...], List[int]]":
+    """카테고리 집합(순서 무관)이 같은 프로필끼리 묶음. 값은 profiles 인덱스"""
+    groups: "OrderedDict[Tuple[int, ...], List[int]]" = OrderedDict()
+    for i, p in enumerate(batch.profiles):
+        probe = RecommendIn(message=p.message, constraints=p.constraints,
+                            category=p.category, category_id=p.category_id)
+        groups.setdefault(tuple(sorted(set(_category_ids(probe)))), []).append(i)
+    return groups
+
+async def _batch_pool(batch: BatchIn, cat_ids: Tuple[int, ...]):
+    """카테고리 조합의 후보 풀 수집 + 책 임베딩 (한 번)"""
+    pool = RecommendIn(query_type=batch.query_type, max_results=batch.max_results, pages=batch.pages,
+                       aladin_key=batch.aladin_key)
+    with metrics.timed("batch_collect"):
+        books = await _collect_candidates(get_client(batch.aladin_key), pool, list(cat_ids))
+    if not books:
+        return [], None
+    bvecs = await get_store().embed_books(
+        books, [book_text(b) for b in books],
+        provider=batch.embedding_provider, openai_key=batch.openai_key,
+    )
+    return books, bvecs
+
+async def recommend_batch(batch: BatchIn, *, chunk_size: Optional[int] = None):
+    """
+    여러 프로필 추천. 프로필마다 {"id", "items"} (실패 시 {"id", "error"})를 하나씩 내보낸다.
+    - 카테고리 조합별 후보 풀을 한 번만 수집·임베딩하고, 다음 조합의 풀은 채점하는 동안 미리 수집
+    - 내러티브는 chunk_size개씩 한 번에 인코딩해 (chunk × 후보) 행렬곱 한 번으로 채점
+    - 메모리는 후보 풀 2개와 chunk 하나 분량으로 제한
+    """
+    chunk_size = max(1, chunk_size or settings.BATCH_CHUNK_SIZE)
+    groups = list(_group_profiles(batch).items())
+    loop = asyncio.get_running_loop()
+    nxt = loop.create_task(_batch_pool(batch, groups[0][0])) if groups else None
+    try:
+        for g, (cat_ids, members) in enumerate(groups):
+            cur = nxt
+            nxt = loop.create_task(_batch_pool(batch, groups[g + 1][0])) if g + 1 < len(groups) else None
+            try:
+                books, bvecs = await cur
+            except Exception as e:
+                detail = _http_error(e).detail
+                for i in members:
+                    yield {"id": batch.profiles[i].id, "error": detail}
+                continue
+            if not books:
+                for i in members:
+                    yield {"id": batch.profiles[i].id, "items": []}
+                continue
+            cols = BookColumns(books)
+            lex = get_lexical_index()
+            # 후보 풀의 문서 번호는 한 번만 매핑하고 chunk마다 (chunk × 후보) BM25 행렬을 스레드에서 계산
+            lex_cands = lex.candidates(books) if settings.LEXICAL_INDEX_ENABLED and len(lex) else None
+            for s in range(0, len(members), chunk_size):
+                part = [batch.profiles[i] for i in members[s:s + chunk_size]]
+                messages = [p.message for p in part]
+                lex_fut = None if lex_cands is None else loop.run_in_executor(None, lex_cands.scores, messages)
+                qvecs = await get_batcher().embed(
+                    messages, provider=batch.embedding_provider, openai_key=batch.openai_key,
+                )
+                lexical = None if lex_fut is None else await lex_fut
+                with metrics.timed("batch_rank"):
+                    tops = rerank_batch(qvecs, cols, bvecs, [p.constraints for p in part],
+                                        topk=batch.topk, lexical=lexical)
+                for p, top in zip(part, tops):
+                    yield {"id": p.id, "items": [_to_item(b) for b in top]}
+    finally:
+        if nxt is not None:
+            nxt.cancel()
+
+@router.post("/recommend/batch")
+async def recommend_batch_endpoint(batch: BatchIn):
+    """NDJSON 스트림: 프로필별 결과를 카테고리 조합 순서로 한 줄씩 전송 (입력 순서와 다를 수 있음, id로 구분)"""
+    if len(batch.profiles) > settings.BATCH_MAX_PROFILES:
+        raise HTTPException(status_code=413, detail=f"Too many profiles (max {settings.BATCH_MAX_PROFILES})")
+
+    async def _lines():
+        timer = metrics.StageTimer()
+        metrics.current_timer.set(timer)
+        status = 200
+        try:
+            async for row in recommend_batch(batch):
+                yield json.dumps(row, ensure_ascii=False) + "\n"
+        except Exception as e:
+            err = _http_error(e)
+            status = err.status_code
+            yield json.dumps({"error": err.detail, "status": err.status_code}, ensure_ascii=False) + "\n"
+        finally:
+            metrics.REQUEST_SECONDS.observe(timer.elapsed(), endpoint="recommend_batch", status=str(status))
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+def create_app() -> FastAPI:
+    """앱 팩토리. 멀티 워커 런처(app.serve)는 모델·인덱스를 먼저 올린 뒤 호출해 fork 후 공유"""
+    application = FastAPI(title="SQUIN Book Agent", lifespan=lifespan)
+    application.include_router(router)
+    return application
+
+app = create_app()
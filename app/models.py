@@ -17,17 +17,32 @@ class Session(SQLModel, table=True):
     constraints_json: Optional[str] = None
     negatives_json: Optional[str] = None
     started_at: datetime = Field(default_factory=datetime.utcnow)
+    token: Optional[str] = Field(default=None, index=True, unique=True)  # 클라이언트에 주는 세션 id
 
 class BookCache(SQLModel, table=True):
     aladin_id: int = Field(primary_key=True)
+    isbn13: Optional[str] = Field(default=None, index=True)
     title: str
     author: Optional[str] = None
     category: Optional[str] = None
+    category_id: Optional[int] = Field(default=None, index=True)  # 수집 시 사용한 GENRE_TO_CATEGORY id
     pubdate: Optional[str] = None
+    pages: Optional[int] = None
     price: Optional[int] = None
     description: Optional[str] = None
     cover: Optional[str] = None
+    link: Optional[str] = None
     rating: Optional[float] = 0.0
     popularity: Optional[int] = 0
     embedding: Optional[bytes] = None
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class BookEmbedding(SQLModel, table=True):
+    """책 설명 임베딩 캐시. (isbn13|aladin_id, provider, model, 텍스트 해시) 단위로 저장"""
+    book_key: str = Field(primary_key=True)
+    provider: str = Field(primary_key=True)
+    model: str = Field(primary_key=True)
+    text_hash: str = Field(primary_key=True)
+    dim: int
+    embedding: bytes
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,164 @@
+"""
+운영용 멀티 워커 실행 (gunicorn + uvicorn 워커, preload)
+
+    python -m app.serve --workers 4 [--port 8000] [--threads-per-worker 2]
+
+- 마스터에서 임베딩 모델과 카탈로그 인덱스(FAISS/memmap, BM25)를 먼저 올리고 gc.freeze() 뒤 fork →
+  가중치·행렬 메모리를 워커들이 copy-on-write로 공유
+- 워커별 torch/BLAS/FAISS 스레드 수 = 코어 수 / 워커 수 (과다 구독 방지)
+- 마스터에서는 단일 스레드로만 모델을 다뤄 OpenMP 스레드 풀이 fork 전에 생기지 않게 함
+- gunicorn이 없으면(Windows 등) uvicorn --workers로 실행 (preload 공유 없음)
+- 기본 1 워커: 선행 수집(_prefetch)·캐시·BM25 색인은 워커마다 따로라 워커를 늘리면
+  면담 후속 요청이 다른 워커로 가서 선행 결과를 못 쓰고 캐시 적중률이 떨어짐 (README 참고)
+"""
+import argparse
+import gc
+import logging
+import os
+import sys
+from typing import Dict, Optional
+
+logger = logging.getLogger("app.serve")
+
+_THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def threads_per_worker(workers: int, override: Optional[int] = None) -> int:
+    if override:
+        return max(1, override)
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def set_thread_env(n: int) -> None:
+    """numpy/torch import 전에 호출해야 BLAS/OpenMP 풀 크기에 반영됨 (이미 지정된 값은 유지)"""
+    for var in _THREAD_ENV:
+        os.environ.setdefault(var, str(n))
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+
+def set_runtime_threads(n: int) -> None:
+    """이미 로드된 torch/faiss의 스레드 수 조정"""
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(n)
+    if "faiss" in sys.modules:
+        sys.modules["faiss"].omp_set_num_threads(n)
+
+
+def preload() -> Dict[str, float]:
+    """fork 전 마스터에서 모델·인덱스 로드. 이벤트 루프/DB 연결은 닫고 돌아옴"""
+    import asyncio
+
+    from app.config import settings
+    from app.core import nlp
+    from app.services import vector_index
+
+    prov = nlp.resolve_provider()
+    if prov == "sbert":
+        try:
+            nlp._get_sbert()  # 가중치만 로드 (인코딩 워밍업은 워커 lifespan에서)
+        except RuntimeError as e:
+            logger.warning("model preload failed (workers will retry): %s", e)
+    elif prov == "sbert-onnx":
+        # ONNX Runtime 세션은 스레드 풀을 품고 있어 fork 후 재사용하지 않음 → 워커마다 로드
+        logger.info("sbert-onnx encoder is loaded per worker (not fork-safe)")
+    if settings.VECTOR_INDEX_ON_STARTUP and settings.VECTOR_INDEX_TYPE.lower() != "mmap":
+        try:
+            vector_index._faiss()
+        except RuntimeError:
+            pass  # 인덱스 로드에서 경고
+    # torch/faiss가 import된 뒤에야 적용됨 → 인덱스 구축 전에 (fork 전 OpenMP 풀을 키우지 않도록)
+    set_runtime_threads(1)
+
+    async def _indexes() -> None:
+        from app.services.catalogue import get_catalogue
+        from app.services.lexical_index import load_lexical_index
+        try:
+            if settings.VECTOR_INDEX_ON_STARTUP:
+                index = await vector_index.load_index()
+                logger.info("preloaded vector index: %d books", len(index) if index else 0)
+            if settings.LEXICAL_INDEX_ENABLED:
+                lex = await load_lexical_index()
+                logger.info("preloaded lexical index: %d books", len(lex))
+        except Exception as e:
+            logger.warning("index preload failed (workers will retry): %s", e)
+        finally:
+            await get_catalogue().close()
+
+    asyncio.run(_indexes())
+    return dict(nlp.timings)
+
+
+def _run_gunicorn(args, threads: int) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    from app.main import create_app
+
+    def post_fork(server, worker) -> None:
+        set_runtime_threads(threads)
+
+    class _Server(BaseApplication):
+        def __init__(self, application, options: Dict):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self) -> None:
+            for k, v in self.options.items():
+                self.cfg.set(k, v)
+
+        def load(self):
+            return self.application
+
+    application = create_app()
+    # 이후 생성된 객체만 GC 대상으로 → 워커에서 GC가 공유 페이지를 건드리지 않음
+    gc.collect()
+    gc.freeze()
+    _Server(application, {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "post_fork": post_fork,
+        "timeout": args.timeout,
+        "graceful_timeout": 30,
+        "keepalive": 5,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests // 10 if args.max_requests else 0,
+        "loglevel": args.log_level,
+    }).run()
+
+
+def main(argv: Optional[list] = None) -> None:
+    ap = argparse.ArgumentParser(description="Run the API with multiple preloaded workers")
+    ap.add_argument("--host", default=os.getenv("APP_HOST", "0.0.0.0"))
+    ap.add_argument("--port", type=int, default=int(os.getenv("APP_PORT", 8000)))
+    ap.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 1)))
+    ap.add_argument("--threads-per-worker", type=int, default=int(os.getenv("THREADS_PER_WORKER", 0)))
+    ap.add_argument("--timeout", type=int, default=120)
+    ap.add_argument("--max-requests", type=int, default=0, help="워커 재시작 주기 (0 = 안 함)")
+    ap.add_argument("--no-preload", action="store_true")
+    ap.add_argument("--log-level", default="info")
+    args = ap.parse_args(argv)
+
+    threads = threads_per_worker(args.workers, args.threads_per_worker)
+    set_thread_env(threads)
+    # 워커가 읽는 settings.WEB_CONCURRENCY (프로세스별 알라딘 속도 제한을 워커 수로 나눔)
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    logging.basicConfig(level=args.log_level.upper())
+    logger.info("workers=%d threads/worker=%d", args.workers, threads)
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        import uvicorn
+        logger.warning("gunicorn not installed: falling back to uvicorn workers without preload sharing")
+        uvicorn.run("app.main:create_app", factory=True, host=args.host, port=args.port,
+                    workers=args.workers, log_level=args.log_level)
+        return
+    if not args.no_preload:
+        logger.info("preloaded before fork: %s", preload())
+    _run_gunicorn(args, threads)
+
+
+if __name__ == "__main__":
+    main()
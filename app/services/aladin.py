@@ -2,8 +2,15 @@
 알라딘 Open API 클라이언트
 """
 from typing import List, Dict, Optional, Literal
+from collections import OrderedDict
+import hashlib
+import json
 import httpx
 from app.config import settings
+from app.core import metrics
+from app.core.singleflight import SingleFlight
+from app.services.aladin_guard import PRIORITIES, GuardRejected, get_guard
+from app.services.cache import ResponseCache, get_cache, make_key
 
 BASE = "http://www.aladin.co.kr/ttb/api/"
 DEFAULT_VERSION = "20131101"
@@ -15,31 +22,132 @@ QueryType = Literal[
 ]
 
 class AladinError(RuntimeError):
-    pass
+    def __init__(self, message: str = "", *, transient: bool = False):
+        super().__init__(message)
+        self.transient = transient  # 타임아웃/연결 오류/5xx (서킷 브레이커 실패로 집계)
+
+class AladinUnavailable(AladinError):
+    """속도 제한·일일 쿼터·서킷 브레이커로 호출하지 않고 실패"""
+
+# ---------- 공유 HTTP 커넥션 풀 ----------
+_http: Optional[httpx.AsyncClient] = None
+
+def _new_http() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.ALADIN_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.ALADIN_MAX_KEEPALIVE,
+        keepalive_expiry=settings.ALADIN_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.ALADIN_CONNECT_TIMEOUT,
+        read=settings.ALADIN_READ_TIMEOUT,
+        write=settings.ALADIN_WRITE_TIMEOUT,
+        pool=settings.ALADIN_POOL_TIMEOUT,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+def get_http() -> httpx.AsyncClient:
+    """앱 전체가 공유하는 keep-alive AsyncClient. lifespan 밖에서 호출되면 지연 생성."""
+    global _http
+    if _http is None or _http.is_closed:
+        _http = _new_http()
+    return _http
+
+async def startup() -> None:
+    get_http()
+
+async def shutdown() -> None:
+    global _http, _client
+    _key_clients.clear()
+    _client = None
+    await get_guard().close()
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+
+# 동일 요청(키·정규화 파라미터) 동시 호출은 한 번만 전송
+_flight = SingleFlight("aladin")
+
+def flight_stats() -> Dict[str, int]:
+    return dict(_flight.counters)
+
+def _copy_json(data: Dict) -> Dict:
+    return json.loads(json.dumps(data, ensure_ascii=False))
 
 class AladinClient:
-    def __init__(self, api_key: Optional[str] = None, base: str = BASE):
+    def __init__(self, api_key: Optional[str] = None, base: Optional[str] = None,
+                 http: Optional[httpx.AsyncClient] = None,
+                 cache: Optional[ResponseCache] = None, use_cache: bool = True,
+                 priority: str = "interactive", use_guard: bool = True):
         self.api_key = api_key or settings.ALADIN_TTB_KEY
-        self.base = base.rstrip("/") + "/"
+        self.base = (base or settings.ALADIN_BASE_URL or BASE).rstrip("/") + "/"
+        self._http = http  # None이면 공유 풀 사용
+        self.cache = (cache or get_cache()) if use_cache else None
+        self._key_id = _key_hash(self.api_key) if self.api_key else ""
+        self.priority = PRIORITIES[priority]  # interactive(/recommend) | background(수집)
+        self.use_guard = use_guard  # False: 속도 제한/쿼터/브레이커 없이 바로 호출 (벤치마크 등 가짜 전송용)
 
     async def _get(self, path: str, params: Dict) -> Dict:
         if not self.api_key:
             raise AladinError("ALADIN_TTB_KEY is missing. Set it in .env")
+        with metrics.timed("aladin", metrics.ALADIN_SECONDS, path=path):
+            if self.cache is None:
+                return await self._shared_fetch(path, params)
+            try:
+                return await self.cache.get_or_fetch(path, params, lambda: self._shared_fetch(path, params))
+            except AladinError as e:
+                if not (e.transient or isinstance(e, AladinUnavailable)):
+                    raise
+                # 장애/제한 중에는 만료된 캐시라도 돌려줌
+                stale = await self.cache.get_stale(path, params)
+                if stale is None:
+                    raise
+                get_guard().counters["fallbacks"] += 1
+                return stale
+
+    def _shared_fetch(self, path: str, params: Dict):
+        # 키가 다르면 오류(잘못된 키 등)가 섞이지 않도록 따로 보냄
+        key = (self.base, self._key_id, make_key(path, params))
+        return _flight.do(key, lambda: self._fetch(path, params), copy=_copy_json)
+
+    async def _fetch(self, path: str, params: Dict) -> Dict:
+        if not self.use_guard:
+            return await self._request(path, params)
+        try:
+            breaker, probe = await get_guard().admit(self._key_id, self.base, self.priority)
+        except GuardRejected as e:
+            raise AladinUnavailable(f"Aladin call skipped for {path}: {e}") from e
+        try:
+            data = await self._request(path, params)
+        except AladinError as e:
+            metrics.ALADIN_ERRORS.inc(path=path)
+            # API 수준 오류(잘못된 키 등)는 업스트림이 살아 있다는 뜻
+            breaker.failure() if e.transient else breaker.success()
+            raise
+        except BaseException:
+            if probe:
+                breaker.release()
+            raise
+        breaker.success()
+        return data
+
+    async def _request(self, path: str, params: Dict) -> Dict:
         q = {
             "ttbkey": self.api_key,
             "output": "js",
             "Version": DEFAULT_VERSION,
             **params,
         }
+        client = self._http or get_http()
         try:
-            async with httpx.AsyncClient(timeout=25) as client:
-                r = await client.get(self.base + path, params=q)
-                r.raise_for_status()
-                data = r.json()
+            r = await client.get(self.base + path, params=q)
+            r.raise_for_status()
+            data = r.json()
         except httpx.HTTPStatusError as e:
-            raise AladinError(f"HTTP {e.response.status_code} from Aladin for {path}") from e
+            code = e.response.status_code
+            raise AladinError(f"HTTP {code} from Aladin for {path}", transient=code >= 500 or code == 429) from e
         except Exception as e:
-            raise AladinError(f"Request to Aladin failed for {path}: {e}") from e
+            raise AladinError(f"Request to Aladin failed for {path}: {e}", transient=True) from e
 
         if isinstance(data, dict) and "error" in data:
             raise AladinError(f"Aladin API error for {path}: {data.get('error')}")
@@ -104,8 +212,25 @@ class AladinClient:
         return data.get("item", [])
 
 _client: Optional[AladinClient] = None
-def get_client() -> AladinClient:
+# 사용자 키 → 클라이언트 (키 원문 대신 해시로 보관, 크기 제한 LRU)
+_key_clients: "OrderedDict[str, AladinClient]" = OrderedDict()
+
+def _key_hash(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+def get_client(api_key: Optional[str] = None) -> AladinClient:
     global _client
-    if _client is None:
-        _client = AladinClient()
-    return _client
+    if not api_key or api_key == settings.ALADIN_TTB_KEY:
+        if _client is None:
+            _client = AladinClient()
+        return _client
+    h = _key_hash(api_key)
+    cli = _key_clients.get(h)
+    if cli is not None:
+        _key_clients.move_to_end(h)
+        return cli
+    cli = AladinClient(api_key=api_key)
+    _key_clients[h] = cli
+    while len(_key_clients) > settings.ALADIN_KEY_CLIENTS_MAX:
+        _key_clients.popitem(last=False)
+    return cli
@@ -0,0 +1,306 @@
+"""
+알라딘 호출 보호
+- 키별 토큰 버킷 (초당 호출 수/버스트) + 일일 쿼터 카운터
+- 일일 쿼터는 ALADIN_QUOTA_DB(SQLite)의 (키, 날짜) 행을 원자적으로 증가시켜
+  서버 워커들과 수집(ingest) 프로세스가 함께 씀. 잔량이 예약분 이하면 background(수집)는 거절
+- 토큰 버킷과 서킷 브레이커는 프로세스 단위 (버킷 RATE/BURST는 서버 워커 수로 나눠 가짐)
+  우선순위(interactive가 먼저 토큰을 받음)는 같은 프로세스의 대기자 사이에서만 적용되고,
+  수집 프로세스의 속도는 ingest --rate로 따로 제한
+- 업스트림(base URL)별 서킷 브레이커: 연속 실패/타임아웃 시 open → 일정 시간 뒤 half-open 탐침
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.sqlite import LoopLock, connect, execute
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITIES = {"interactive": INTERACTIVE, "background": BACKGROUND}
+
+
+class GuardRejected(Exception):
+    """호출하지 않고 즉시 실패 (reason: rate_limited / quota_exceeded / breaker_open)"""
+
+    def __init__(self, reason: str, detail: str = ""):
+        super().__init__(f"{reason}{': ' + detail if detail else ''}")
+        self.reason = reason
+
+
+class TokenBucket:
+    """우선순위 대기열이 있는 토큰 버킷 (rate 0 = 무제한)"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _drain(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._waiters and self.tokens >= 1:
+            _, _, fut = heapq.heappop(self._waiters)
+            if fut.done():  # 취소/타임아웃된 대기자
+                continue
+            self.tokens -= 1
+            fut.set_result(None)
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        if self._waiters:
+            delay = (1 - self.tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(delay, self._drain)
+
+    async def acquire(self, priority: int = INTERACTIVE, max_wait: Optional[float] = None) -> None:
+        if self.rate <= 0:
+            return
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        if self._timer is None:
+            self._drain()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=max_wait)
+        except asyncio.TimeoutError:
+            fut.cancel()
+            raise GuardRejected("rate_limited", f"waited {max_wait:.1f}s for a token") from None
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+
+    def queued(self) -> int:
+        return sum(1 for _, _, f in self._waiters if not f.done())
+
+
+class QuotaStore:
+    """키·날짜별 알라딘 호출 수 (SQLite). 같은 DB를 여는 프로세스끼리 공유"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._db = None
+        self._lock = LoopLock()
+
+    async def _conn(self):
+        if self._db is None:
+            self._db = await connect(self.db_path)
+            await self._db.execute(
+                "CREATE TABLE IF NOT EXISTS aladin_quota ("
+                " key_id TEXT NOT NULL, day TEXT NOT NULL, used INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (key_id, day))"
+            )
+            await self._db.commit()
+        return self._db
+
+    async def take(self, key_id: str, day: str, cap: int) -> Tuple[bool, int]:
+        """used < cap이면 1 증가. (증가 여부, 현재 사용량)"""
+        async with self._lock.get():
+            db = await self._conn()
+            try:
+                # 첫 쓰기에서 잡은 쓰기 잠금을 commit까지 유지하므로 다른 프로세스와 겹쳐도 cap을 넘지 않음
+                await execute(db, "INSERT OR IGNORE INTO aladin_quota (key_id, day, used) VALUES (?, ?, 0)",
+                              (key_id, day))
+                cur = await db.execute(
+                    "UPDATE aladin_quota SET used = used + 1 WHERE key_id = ? AND day = ? AND used < ?",
+                    (key_id, day, cap),
+                )
+                taken = cur.rowcount == 1
+                await cur.close()
+                async with db.execute("SELECT used FROM aladin_quota WHERE key_id = ? AND day = ?",
+                                      (key_id, day)) as cur:
+                    used = (await cur.fetchone())[0]
+                await db.commit()
+            except BaseException:
+                await db.rollback()
+                raise
+        return taken, used
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+class DailyQuota:
+    """로컬 날짜 기준 일일 호출 수 (limit 0 = 무제한). store가 없으면 프로세스 단위"""
+
+    def __init__(self, limit: int, reserve: int = 0, store: Optional[QuotaStore] = None, key_id: str = ""):
+        self.limit = limit
+        self.reserve = reserve  # interactive 전용으로 남겨둘 호출 수
+        self.store = store
+        self.key_id = key_id
+        self.day = time.strftime("%Y-%m-%d")
+        self.used = 0  # store가 있으면 마지막으로 본 공유 사용량
+
+    def _roll(self) -> None:
+        today = time.strftime("%Y-%m-%d")
+        if today != self.day:
+            self.day, self.used = today, 0
+
+    def remaining(self) -> Optional[int]:
+        self._roll()
+        return None if self.limit <= 0 else max(0, self.limit - self.used)
+
+    def _cap(self, priority: int) -> int:
+        return self.limit - (self.reserve if priority == BACKGROUND else 0)
+
+    def _reject(self) -> GuardRejected:
+        return GuardRejected("quota_exceeded", f"{self.used}/{self.limit} calls used today")
+
+    def check(self, priority: int) -> None:
+        """마지막으로 본 사용량 기준 사전 확인 (토큰을 기다리기 전에)"""
+        self._roll()
+        if self.limit > 0 and self.used >= self._cap(priority):
+            raise self._reject()
+
+    async def take(self, priority: int) -> None:
+        self.check(priority)
+        if self.limit <= 0:
+            return
+        if self.store is not None:
+            try:
+                taken, self.used = await self.store.take(self.key_id, self.day, self._cap(priority))
+            except Exception:
+                # 쿼터 DB 장애로 알라딘 호출까지 막지는 않음 (이번 호출은 이 프로세스에서만 셈)
+                logger.warning("aladin quota store unavailable; counting locally", exc_info=True)
+            else:
+                if not taken:
+                    raise self._reject()
+                return
+        self.used += 1
+
+
+class CircuitBreaker:
+    """closed → (연속 실패 N회) open → (reset_s 경과) half-open 탐침 1건 → 성공 시 closed / 실패 시 open"""
+
+    def __init__(self, failures: int = 5, reset_s: float = 30.0):
+        self.failures = failures
+        self.reset_s = reset_s
+        self.state = "closed"
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.counters: Dict[str, int] = {"opened": 0, "rejected": 0, "probes": 0}
+
+    def allow(self) -> bool:
+        """통과하면 반환, 아니면 GuardRejected. half-open 탐침으로 통과했으면 True"""
+        if self.failures <= 0 or self.state == "closed":
+            return False
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_s:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            self.counters["probes"] += 1
+            return True
+        self.counters["rejected"] += 1
+        retry = max(0.0, self.reset_s - (time.monotonic() - self.opened_at))
+        raise GuardRejected("breaker_open", f"retry in {retry:.1f}s")
+
+    def success(self) -> None:
+        self.consecutive = 0
+        self._probing = False
+        self.state = "closed"
+
+    def failure(self) -> None:
+        self.consecutive += 1
+        was_probe = self._probing
+        self._probing = False
+        if self.failures > 0 and (was_probe or self.consecutive >= self.failures):
+            if self.state != "open":
+                self.counters["opened"] += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """결과를 판정하지 못한 탐침(취소 등)은 다음 호출이 다시 탐침하도록"""
+        self._probing = False
+
+
+class AladinGuard:
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._quotas: Dict[str, DailyQuota] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._store = QuotaStore(settings.ALADIN_QUOTA_DB) if settings.ALADIN_QUOTA_DB else None
+        self.counters: Dict[str, int] = {
+            "rate_limited": 0, "quota_exceeded": 0, "breaker_open": 0, "fallbacks": 0,
+        }
+
+    def bucket(self, key_id: str) -> TokenBucket:
+        b = self._buckets.get(key_id)
+        if b is None:
+            # RATE/BURST는 서버 전체 기준: 워커마다 1/N씩
+            workers = max(1, settings.WEB_CONCURRENCY)
+            b = self._buckets[key_id] = TokenBucket(settings.ALADIN_RATE_PER_S / workers,
+                                                    settings.ALADIN_RATE_BURST / workers)
+        return b
+
+    def quota(self, key_id: str) -> DailyQuota:
+        q = self._quotas.get(key_id)
+        if q is None:
+            q = self._quotas[key_id] = DailyQuota(settings.ALADIN_DAILY_QUOTA, settings.ALADIN_QUOTA_RESERVE,
+                                                store=self._store, key_id=key_id)
+        return q
+
+    def breaker(self, base: str) -> CircuitBreaker:
+        br = self._breakers.get(base)
+        if br is None:
+            br = self._breakers[base] = CircuitBreaker(settings.ALADIN_BREAKER_FAILURES, settings.ALADIN_BREAKER_RESET_S)
+        return br
+
+    async def admit(self, key_id: str, base: str, priority: int) -> Tuple[CircuitBreaker, bool]:
+        """호출 허가 (브레이커 → 쿼터 → 토큰 순). (브레이커, 탐침 여부) 반환, 거절 시 GuardRejected"""
+        br = self.breaker(base)
+        probe = False
+        try:
+            probe = br.allow()
+            quota = self.quota(key_id)
+            quota.check(priority)  # 토큰을 기다리기 전에 먼저 확인
+            max_wait = settings.ALADIN_RATE_MAX_WAIT_S if priority == INTERACTIVE else None
+            await self.bucket(key_id).acquire(priority, max_wait=max_wait)
+            await quota.take(priority)
+        except BaseException as e:
+            if probe:
+                br.release()
+            if isinstance(e, GuardRejected):
+                self.counters[e.reason] += 1
+            raise
+        return br, probe
+
+    def stats(self) -> Dict:
+        return {
+            **self.counters,
+            "breakers": {b: {"state": br.state, "consecutive_failures": br.consecutive, **br.counters}
+                         for b, br in self._breakers.items()},
+            "quota": {k[:8]: {"used": q.used, "limit": q.limit, "day": q.day} for k, q in self._quotas.items()},
+            "queued": sum(b.queued() for b in self._buckets.values()),
+        }
+
+    async def close(self) -> None:
+        if self._store is not None:
+            await self._store.close()
+
+
+_guard: Optional[AladinGuard] = None
+
+def get_guard() -> AladinGuard:
+    global _guard
+    if _guard is None:
+        _guard = AladinGuard()
+    return _guard
@@ -0,0 +1,240 @@
+"""
+알라딘 응답 캐시
+- 1차: 메모리 LRU (항목 수/바이트 제한)
+- 2차: 선택적 SQLite (ALADIN_CACHE_DB 지정 시)
+- QueryType별 TTL, 목록(ItemList)은 만료 후에도 stale 응답을 즉시 주고 백그라운드 갱신
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.sqlite import LoopLock, connect, execute
+
+# 캐시 키에서 제외할 파라미터 (사용자별 키가 달라도 같은 응답을 공유)
+_EXCLUDED_PARAMS = {"ttbkey"}
+
+# ItemList QueryType별 TTL(초). 자주 바뀌는 목록은 짧게.
+TTL_BY_QUERY_TYPE: Dict[str, int] = {
+    "Bestseller": 10 * 60,
+    "ItemNew": 10 * 60,
+    "ItemNewAll": 10 * 60,
+    "ItemNewSpecial": 10 * 60,
+    "ItemNewHot": 10 * 60,
+    "BlogBest": 30 * 60,
+    "ItemEditorChoice": 60 * 60,
+    "Recommend": 60 * 60,
+}
+LIST_DEFAULT_TTL = 30 * 60
+SEARCH_TTL = 60 * 60
+LOOKUP_TTL = 7 * 24 * 60 * 60
+
+
+def make_key(path: str, params: Dict) -> str:
+    """정규화된 요청 파라미터(ttbkey 제외)로 캐시 키 생성"""
+    norm = sorted(
+        (str(k).lower(), str(v).strip())
+        for k, v in params.items()
+        if v is not None and str(k).lower() not in _EXCLUDED_PARAMS
+    )
+    raw = path.lower() + "?" + json.dumps(norm, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def ttl_for(path: str, params: Dict) -> Tuple[int, int]:
+    """(ttl, stale 허용 구간) 반환. stale 허용은 목록 조회에만 적용"""
+    p = path.lower()
+    if p.startswith("itemlookup"):
+        return LOOKUP_TTL, 0
+    if p.startswith("itemlist"):
+        qt = params.get("QueryType") or "Bestseller"
+        return TTL_BY_QUERY_TYPE.get(qt, LIST_DEFAULT_TTL), settings.ALADIN_CACHE_SWR_SECONDS
+    return SEARCH_TTL, 0
+
+
+class _Entry:
+    __slots__ = ("payload", "expires_at", "stale_until")
+
+    def __init__(self, payload: str, expires_at: float, stale_until: float):
+        self.payload = payload          # 직렬화된 JSON (반환 시 새 객체로 역직렬화 → 호출측 변형이 캐시에 새지 않음)
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int = 2000,
+        max_bytes: int = 64 * 1024 * 1024,
+        db_path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.db_path = db_path or None
+        self._mem: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._db = None
+        self._db_lock = LoopLock()
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.counters: Dict[str, int] = {
+            "hits": 0, "misses": 0, "stale_hits": 0, "l2_hits": 0,
+            "refreshes": 0, "refresh_errors": 0, "evictions": 0, "fallback_hits": 0,
+        }
+
+    # ---------- 1차(메모리) ----------
+    def _mem_get(self, key: str) -> Optional[_Entry]:
+        e = self._mem.get(key)
+        if e is not None:
+            self._mem.move_to_end(key)
+        return e
+
+    def _mem_put(self, key: str, e: _Entry) -> None:
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old.payload)
+        if len(e.payload) > self.max_bytes:
+            return
+        self._mem[key] = e
+        self._bytes += len(e.payload)
+        while self._mem and (len(self._mem) > self.max_entries or self._bytes > self.max_bytes):
+            _, ev = self._mem.popitem(last=False)
+            self._bytes -= len(ev.payload)
+            self.counters["evictions"] += 1
+
+    # ---------- 2차(SQLite) ----------
+    async def _conn(self):
+        if not self.db_path:
+            return None
+        async with self._db_lock.get():
+            if self._db is None:
+                self._db = await connect(self.db_path)
+                await self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS aladin_cache ("
+                    " key TEXT PRIMARY KEY, payload TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL, stale_until REAL NOT NULL)"
+                )
+                await self._db.commit()
+        return self._db
+
+    async def _db_get(self, key: str, any_age: bool = False) -> Optional[_Entry]:
+        db = await self._conn()
+        if db is None:
+            return None
+        async with db.execute(
+            "SELECT payload, expires_at, stale_until FROM aladin_cache WHERE key = ?", (key,)
+        ) as cur:
+            row = await cur.fetchone()
+        if row is None or (row[2] < time.time() and not any_age):
+            return None
+        return _Entry(row[0], row[1], row[2])
+
+    async def _db_put(self, key: str, e: _Entry) -> None:
+        db = await self._conn()
+        if db is None:
+            return
+        await execute(
+            db,
+            "INSERT OR REPLACE INTO aladin_cache (key, payload, expires_at, stale_until) VALUES (?, ?, ?, ?)",
+            (key, e.payload, e.expires_at, e.stale_until),
+        )
+        await db.commit()
+
+    # ---------- 공개 API ----------
+    async def get_or_fetch(self, path: str, params: Dict, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        key = make_key(path, params)
+        now = time.time()
+        e = self._mem_get(key)
+        if e is None:
+            e = await self._db_get(key)
+            if e is not None:
+                self.counters["l2_hits"] += 1
+                self._mem_put(key, e)
+        if e is not None:
+            if now < e.expires_at:
+                self.counters["hits"] += 1
+                return json.loads(e.payload)
+            if now < e.stale_until:
+                self.counters["stale_hits"] += 1
+                self._revalidate(key, path, params, fetch)
+                return json.loads(e.payload)
+
+        self.counters["misses"] += 1
+        value = await fetch()
+        await self._store(key, path, params, value)
+        return value
+
+    async def get_stale(self, path: str, params: Dict) -> Optional[Any]:
+        """만료 여부와 무관하게 남아 있는 응답 (알라딘 장애/쿼터 소진 시 fallback)"""
+        key = make_key(path, params)
+        e = self._mem_get(key) or await self._db_get(key, any_age=True)
+        if e is None:
+            return None
+        self.counters["fallback_hits"] += 1
+        return json.loads(e.payload)
+
+    async def _store(self, key: str, path: str, params: Dict, value: Any) -> None:
+        ttl, swr = ttl_for(path, params)
+        now = time.time()
+        e = _Entry(json.dumps(value, ensure_ascii=False), now + ttl, now + ttl + swr)
+        self._mem_put(key, e)
+        await self._db_put(key, e)
+
+    def _revalidate(self, key: str, path: str, params: Dict, fetch: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def _run():
+            try:
+                value = await fetch()
+                await self._store(key, path, params, value)
+                self.counters["refreshes"] += 1
+            except Exception:
+                # 갱신 실패 시 stale 값을 그대로 유지
+                self.counters["refresh_errors"] += 1
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(_run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> Dict:
+        c = self.counters
+        lookups = c["hits"] + c["stale_hits"] + c["misses"]
+        return {
+            **c,
+            "entries": len(self._mem),
+            "bytes": self._bytes,
+            "hit_rate": (c["hits"] + c["stale_hits"]) / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        self._mem.clear()
+        self._bytes = 0
+
+    async def close(self) -> None:
+        for t in list(self._tasks):
+            t.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+_cache: Optional[ResponseCache] = None
+
+def get_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(
+            max_entries=settings.ALADIN_CACHE_MAX_ENTRIES,
+            max_bytes=settings.ALADIN_CACHE_MAX_BYTES,
+            db_path=settings.ALADIN_CACHE_DB,
+        )
+    return _cache
@@ -0,0 +1,175 @@
+"""
+로컬 도서 카탈로그 (aiosqlite, BookCache 테이블)
+- 알라딘 응답(dict) ↔ BookCache 행 변환
+- 벡터 인덱스 구축용으로 BookEmbedding과 (book_key, 현재 텍스트 해시)로 맞춰 로드
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.embedding_store import book_key, book_text, text_hash
+from app.services.sqlite import LoopLock, connect, execute, executemany
+
+_TABLE = "bookcache"  # SQLModel 기본 테이블명 (app.models.BookCache)
+_COLUMNS = (
+    "aladin_id", "isbn13", "title", "author", "category", "category_id", "pubdate",
+    "pages", "price", "description", "cover", "link", "rating", "popularity",
+)
+
+
+def book_to_row(book: Dict, category_id: Optional[int] = None) -> Optional[Dict]:
+    sub = book.get("subInfo", {}) or {}
+    if not book.get("itemId"):
+        return None
+    return {
+        "aladin_id": int(book["itemId"]),
+        "isbn13": book.get("isbn13") or None,
+        "title": book.get("title") or "",
+        "author": book.get("author"),
+        "category": book.get("categoryName"),
+        "category_id": category_id,
+        "pubdate": book.get("pubDate"),
+        "pages": sub.get("itemPage"),
+        "price": book.get("priceStandard"),
+        "description": book.get("description") or sub.get("description"),
+        "cover": book.get("cover"),
+        "link": book.get("link"),
+        "rating": book.get("customerReviewRank") or 0,
+        "popularity": book.get("salesPoint") or 0,
+    }
+
+
+def row_to_book(row: Dict) -> Dict:
+    """랭커가 기대하는 알라딘 응답 형태로 복원"""
+    return {
+        "itemId": row["aladin_id"],
+        "isbn13": row["isbn13"],
+        "title": row["title"],
+        "author": row["author"],
+        "categoryName": row["category"],
+        "categoryId": row["category_id"],
+        "pubDate": row["pubdate"],
+        "priceStandard": row["price"],
+        "description": row["description"],
+        "cover": row["cover"],
+        "link": row["link"],
+        "customerReviewRank": row["rating"] or 0,
+        "salesPoint": row["popularity"] or 0,
+        "subInfo": {"itemPage": row["pages"]} if row["pages"] else {},
+    }
+
+
+class Catalogue:
+    def __init__(self, db_path: Optional[str] = None, embedding_db_path: Optional[str] = None):
+        self.db_path = db_path or None
+        self.embedding_db_path = embedding_db_path or self.db_path
+        self._db = None
+        self._lock = LoopLock()
+
+    async def _conn(self):
+        if not self.db_path:
+            return None
+        async with self._lock.get():
+            if self._db is None:
+                self._db = await connect(self.db_path)
+                await self._db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {_TABLE} ("
+                    " aladin_id INTEGER PRIMARY KEY, isbn13 TEXT, title TEXT NOT NULL,"
+                    " author TEXT, category TEXT, category_id INTEGER, pubdate TEXT,"
+                    " pages INTEGER, price INTEGER, description TEXT, cover TEXT, link TEXT,"
+                    " rating REAL DEFAULT 0, popularity INTEGER DEFAULT 0, embedding BLOB,"
+                    " updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+                )
+                await self._db.execute(f"CREATE INDEX IF NOT EXISTS ix_{_TABLE}_isbn13 ON {_TABLE} (isbn13)")
+                await self._db.execute(f"CREATE INDEX IF NOT EXISTS ix_{_TABLE}_category_id ON {_TABLE} (category_id)")
+                await self._db.commit()
+        return self._db
+
+    async def upsert_books(self, books: List[Dict], *, category_id: Optional[int] = None) -> int:
+        db = await self._conn()
+        if db is None:
+            return 0
+        rows = [r for r in (book_to_row(b, category_id) for b in books) if r]
+        if not rows:
+            return 0
+        cols = ", ".join(_COLUMNS)
+        marks = ", ".join("?" * len(_COLUMNS))
+        # category_id는 기존 값이 있으면 유지 (장르 없는 검색 결과로 덮어쓰지 않음)
+        updates = ", ".join(
+            f"{c} = COALESCE(excluded.{c}, {c})" if c == "category_id" else f"{c} = excluded.{c}"
+            for c in _COLUMNS if c != "aladin_id"
+        )
+        await executemany(
+            db,
+            f"INSERT INTO {_TABLE} ({cols}) VALUES ({marks})"
+            f" ON CONFLICT(aladin_id) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP",
+            [tuple(r[c] for c in _COLUMNS) for r in rows],
+        )
+        await db.commit()
+        return len(rows)
+
+    async def load_with_embeddings(
+        self, *, provider: str, model: str
+    ) -> Tuple[List[Dict], np.ndarray]:
+        """
+        현재 텍스트(book_text)의 임베딩이 있는 카탈로그 도서와 (n, d) float32 행렬.
+        설명/형식이 바뀐 뒤 아직 다시 임베딩하지 않은 도서는 옛 벡터를 쓰지 않고 제외
+        """
+        db = await self._conn()
+        if db is None:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        catalogue = await self.load_books()
+        wanted = [(book_key(b), text_hash(book_text(b))) for b in catalogue]
+        keyset = set(wanted)
+        emb = "bookembedding"
+        if self.embedding_db_path and self.embedding_db_path != self.db_path:
+            await execute(db, "ATTACH DATABASE ? AS emb", (self.embedding_db_path,))
+            emb = "emb.bookembedding"
+        try:
+            vecs: Dict[Tuple[str, str], np.ndarray] = {}
+            async with db.execute(
+                f"SELECT book_key, text_hash, embedding FROM {emb} WHERE provider = ? AND model = ?",
+                (provider, model),
+            ) as cur:
+                async for bk, th, blob in cur:
+                    if (bk, th) in keyset:
+                        vecs[(bk, th)] = np.frombuffer(blob, dtype=np.float32)
+        except Exception:
+            vecs = {}  # 임베딩 테이블이 아직 없음
+        finally:
+            if emb.startswith("emb."):
+                await execute(db, "DETACH DATABASE emb")
+
+        books: List[Dict] = []
+        mats: List[np.ndarray] = []
+        for b, k in zip(catalogue, wanted):
+            v = vecs.get(k)
+            if v is not None:
+                books.append(b)
+                mats.append(v)
+        if not mats:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        return books, np.stack(mats).astype(np.float32, copy=False)
+
+    async def load_books(self) -> List[Dict]:
+        """카탈로그 전체 (aladin_id 순)"""
+        db = await self._conn()
+        if db is None:
+            return []
+        async with db.execute(f"SELECT {', '.join(_COLUMNS)} FROM {_TABLE} ORDER BY aladin_id") as cur:
+            return [row_to_book(dict(zip(_COLUMNS, r))) async for r in cur]
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+_catalogue: Optional[Catalogue] = None
+
+def get_catalogue() -> Catalogue:
+    global _catalogue
+    if _catalogue is None:
+        _catalogue = Catalogue(settings.CATALOGUE_DB, settings.EMBEDDING_DB)
+    return _catalogue
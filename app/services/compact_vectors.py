@@ -0,0 +1,197 @@
+"""
+카탈로그 임베딩 압축 저장소 (memmap)
+- <dir>/vectors.npy: (n, d) float16 또는 int8 — np.load(mmap_mode="r")로 복사 없이 열어
+  여러 uvicorn 워커가 페이지 캐시를 공유
+- <dir>/scales.npy: int8일 때 행별 float32 scale (v ≈ q * scale)
+- <dir>/meta.json: 행 번호 → book_key, dtype/dim/provider/model
+- 내적은 블록 단위로 양자화된 값에 바로 계산하고 int8은 scale을 나중에 곱함
+
+    python -m app.services.compact_vectors --out models/catalogue-int8 --dtype int8
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DTYPES = ("int8", "float16")
+_BLOCK = 256  # 변환한 float32 블록이 L2 캐시에 머무는 크기 (768차원 ≈ 768KiB)
+
+
+def quantize(vecs: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(양자화 행렬, 행별 scale 또는 None)"""
+    x = np.asarray(vecs, dtype=np.float32)
+    if dtype == "float16":
+        return x.astype(np.float16), None
+    if dtype != "int8":
+        raise ValueError(f"unsupported dtype: {dtype}")
+    scales = np.abs(x).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    q = np.clip(np.rint(x / scales[:, None]), -127, 127).astype(np.int8)
+    return q, scales.astype(np.float32)
+
+
+class RebuildLock:
+    """
+    <out_dir>.lock 파일 잠금: 여러 워커가 동시에 모델 변경을 감지해도 교체·재구축을 한 번에 하나씩.
+    fcntl이 없는 플랫폼(Windows)에서는 잠그지 않음
+    """
+
+    def __init__(self, out_dir: str):
+        self.path = f"{out_dir.rstrip('/')}.lock"
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> None:
+        if fcntl is None:
+            return
+        parent = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(parent, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "RebuildLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def write(out_dir: str, keys: List[str], vecs: np.ndarray, *, dtype: str = "int8",
+          provider: str = "", model: str = "", lock: bool = True) -> None:
+    """
+    임시 디렉터리에 쓴 뒤 교체 (읽는 프로세스가 반쯤 쓰인 파일을 보지 않도록).
+    교체는 RebuildLock 안에서 (lock=False는 호출자가 이미 잠근 경우)
+    """
+    if len(keys) != len(vecs):
+        raise ValueError("keys and vecs length mismatch")
+    data, scales = quantize(vecs, dtype)
+    tmp = f"{out_dir.rstrip('/')}.tmp{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "vectors.npy"), data)
+    if scales is not None:
+        np.save(os.path.join(tmp, "scales.npy"), scales)
+    meta = {"dtype": dtype, "dim": int(data.shape[1]) if data.ndim == 2 else 0,
+            "provider": provider, "model": model, "keys": list(keys)}
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    old = f"{tmp}.old"
+    with (RebuildLock(out_dir) if lock else contextlib.nullcontext()):
+        if os.path.exists(out_dir):
+            os.replace(out_dir, old)
+        os.replace(tmp, out_dir)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+class CompactVectors:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dtype: str = meta["dtype"]
+        self.provider: str = meta.get("provider", "")
+        self.model: str = meta.get("model", "")
+        self.keys: List[str] = meta["keys"]
+        self.row: Dict[str, int] = {k: i for i, k in enumerate(self.keys)}
+        self.data = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.scales = (np.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+                       if self.dtype == "int8" else None)
+        self.dim = int(self.data.shape[1]) if len(self.keys) else int(meta.get("dim", 0))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    def rows_for(self, keys: List[str]) -> np.ndarray:
+        """존재하는 키의 행 번호 (없는 키는 -1)"""
+        return np.fromiter((self.row.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+    def dequantize(self, rows: np.ndarray) -> np.ndarray:
+        x = np.asarray(self.data[rows], dtype=np.float32)
+        if self.scales is not None:
+            x *= np.asarray(self.scales[rows])[:, None]
+        return x
+
+    def scores(self, qvec: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """질의(float32)와의 내적. rows가 없으면 전체 행"""
+        q = np.asarray(qvec, dtype=np.float32).reshape(-1)
+        n = len(self) if rows is None else len(rows)
+        out = np.empty(n, dtype=np.float32)
+        for s in range(0, n, _BLOCK):
+            blk = self.data[s:s + _BLOCK] if rows is None else self.data[rows[s:s + _BLOCK]]
+            out[s:s + len(blk)] = blk.astype(np.float32) @ q
+        if self.scales is not None:
+            out *= self.scales if rows is None else self.scales[rows]
+        return out
+
+    def search(self, qvec: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(행 번호, 점수) 내림차순 상위 k"""
+        s = self.scores(qvec, rows)
+        k = min(k, len(s))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        top = np.argpartition(-s, k - 1)[:k]
+        top = top[np.argsort(-s[top], kind="stable")]
+        return (top if rows is None else rows[top]), s[top]
+
+
+async def build_from_catalogue(out_dir: str, *, dtype: str = "int8", provider: Optional[str] = None,
+                               lock: bool = True) -> int:
+    """카탈로그(BookCache + BookEmbedding)의 float32 벡터를 압축 저장소로 내보냄"""
+    from app.core import nlp
+    from app.services.catalogue import get_catalogue
+    from app.services.embedding_store import book_key
+
+    prov = nlp.resolve_provider(provider)
+    model = nlp.model_name(prov)
+    books, vecs = await get_catalogue().load_with_embeddings(provider=prov, model=model)
+    if books:
+        write(out_dir, [book_key(b) for b in books], vecs, dtype=dtype, provider=prov, model=model, lock=lock)
+    return len(books)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Export catalogue embeddings to a memory-mapped quantized store")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--dtype", choices=DTYPES, default="int8")
+    ap.add_argument("--provider", default=None)
+    args = ap.parse_args(argv)
+
+    async def _run() -> int:
+        from app.services.catalogue import get_catalogue
+        try:
+            return await build_from_catalogue(args.out, dtype=args.dtype, provider=args.provider)
+        finally:
+            await get_catalogue().close()
+
+    n = asyncio.run(_run())
+    print(f"wrote {n} vectors to {args.out}" if n else "no catalogue embeddings found")
+
+
+if __name__ == "__main__":
+    main()
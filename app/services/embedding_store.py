@@ -0,0 +1,162 @@
+"""
+책 임베딩 영구 저장소 (aiosqlite, BookEmbedding 테이블)
+- 키: (isbn13 또는 aladin itemId, provider, model, 텍스트 sha1)
+- 배치 조회 후 미스만 인코딩해서 upsert
+"""
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.core import metrics, nlp, textprep
+from app.core.embed_worker import get_batcher
+from app.services.sqlite import LoopLock, connect, executemany
+
+_TABLE = "bookembedding"  # SQLModel 기본 테이블명 (app.models.BookEmbedding)
+_SQLITE_MAX_VARS = 900
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def book_text(book: Dict) -> str:
+    """임베딩 대상 텍스트 (서빙/수집이 같은 텍스트 → 같은 해시로 저장소 공유). 형식은 app.core.textprep"""
+    return textprep.book_text(book)
+
+
+def book_key(book: Dict) -> str:
+    if book.get("isbn13"):
+        return str(book["isbn13"])
+    if book.get("itemId"):
+        return f"aladin:{book['itemId']}"
+    return ""  # 식별자 없는 책은 텍스트 해시만으로 주소 지정
+
+
+class EmbeddingStore:
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or None
+        self._db = None
+        self._lock = LoopLock()
+
+    async def _conn(self):
+        if not self.db_path:
+            return None
+        async with self._lock.get():
+            if self._db is None:
+                self._db = await connect(self.db_path)
+                await self._db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {_TABLE} ("
+                    " book_key TEXT NOT NULL, provider TEXT NOT NULL, model TEXT NOT NULL,"
+                    " text_hash TEXT NOT NULL, dim INTEGER NOT NULL, embedding BLOB NOT NULL,"
+                    " updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
+                    " PRIMARY KEY (book_key, provider, model, text_hash))"
+                )
+                await self._db.commit()
+        return self._db
+
+    async def get_many(
+        self, keys: List[Tuple[str, str]], *, provider: str, model: str
+    ) -> Dict[Tuple[str, str], np.ndarray]:
+        """keys: [(book_key, text_hash)] → 저장된 벡터"""
+        db = await self._conn()
+        if db is None or not keys:
+            return {}
+        keyset = set(keys)
+        wanted = sorted(keyset)
+        found: Dict[Tuple[str, str], np.ndarray] = {}
+        # (book_key, provider, model, text_hash) 기본키를 타도록 book_key와 text_hash 양쪽을 IN으로 제한
+        step = (_SQLITE_MAX_VARS - 2) // 2
+        for i in range(0, len(wanted), step):
+            chunk = wanted[i:i + step]
+            bks = sorted({bk for bk, _ in chunk})
+            hs = sorted({h for _, h in chunk})
+            async with db.execute(
+                f"SELECT book_key, text_hash, embedding FROM {_TABLE}"
+                f" WHERE book_key IN ({','.join('?' * len(bks))}) AND provider = ? AND model = ?"
+                f" AND text_hash IN ({','.join('?' * len(hs))})",
+                (*bks, provider, model, *hs),
+            ) as cur:
+                async for bk, th, blob in cur:
+                    if (bk, th) in keyset:
+                        found[(bk, th)] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    async def put_many(
+        self, rows: List[Tuple[str, str, np.ndarray]], *, provider: str, model: str
+    ) -> None:
+        """rows: [(book_key, text_hash, vec)]"""
+        db = await self._conn()
+        if db is None or not rows:
+            return
+        await executemany(
+            db,
+            f"INSERT INTO {_TABLE} (book_key, provider, model, text_hash, dim, embedding)"
+            " VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(book_key, provider, model, text_hash)"
+            " DO UPDATE SET embedding = excluded.embedding, dim = excluded.dim,"
+            " updated_at = CURRENT_TIMESTAMP",
+            [
+                (bk, provider, model, th, int(v.shape[-1]), np.asarray(v, dtype=np.float32).tobytes())
+                for bk, th, v in rows
+            ],
+        )
+        await db.commit()
+
+    async def embed_books(
+        self, books: List[Dict], texts: List[str], *,
+        provider: Optional[str] = None, openai_key: Optional[str] = None,
+    ) -> np.ndarray:
+        """books[i]의 texts[i] 임베딩. 저장소에 없는 것만 인코딩"""
+        bvecs, _ = await self.embed_books_and_queries(
+            books, texts, [], provider=provider, openai_key=openai_key,
+        )
+        return bvecs
+
+    async def embed_books_and_queries(
+        self, books: List[Dict], texts: List[str], queries: List[str], *,
+        provider: Optional[str] = None, openai_key: Optional[str] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """책 미스분과 질의(내러티브)를 한 번의 encode 배치로 처리"""
+        prov = nlp.resolve_provider(provider)
+        model = nlp.model_name(prov)
+        keys = [(book_key(b), text_hash(t)) for b, t in zip(books, texts)]
+        cached = await self.get_many(keys, provider=prov, model=model)
+
+        miss_idx: List[int] = []
+        seen: Dict[Tuple[str, str], int] = {}
+        for i, k in enumerate(keys):
+            if k not in cached and k not in seen:
+                seen[k] = i
+                miss_idx.append(i)
+        metrics.EMBED_STORE.inc(len(keys) - len(miss_idx), result="hit")
+        metrics.EMBED_STORE.inc(len(miss_idx), result="miss")
+        to_encode = [texts[i] for i in miss_idx] + list(queries)
+        qvecs = np.zeros((0, 0), dtype=np.float32)
+        if to_encode:
+            vecs = await get_batcher().embed(to_encode, provider=prov, openai_key=openai_key)
+            qvecs = vecs[len(miss_idx):]
+            rows = []
+            for i, v in zip(miss_idx, vecs[:len(miss_idx)]):
+                cached[keys[i]] = v
+                rows.append((keys[i][0], keys[i][1], v))
+            await self.put_many(rows, provider=prov, model=model)
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32), qvecs
+        return np.stack([cached[k] for k in keys]).astype(np.float32, copy=False), qvecs
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+_store: Optional[EmbeddingStore] = None
+
+def get_store() -> EmbeddingStore:
+    global _store
+    if _store is None:
+        _store = EmbeddingStore(settings.EMBEDDING_DB)
+    return _store
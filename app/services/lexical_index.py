@@ -0,0 +1,388 @@
+"""
+카탈로그 도서 어휘(BM25) 역색인
+- 토큰: 공백/기호로 나눈 어절의 문자 bigram (한 글자 어절은 그대로) → 형태소 분석 없이 조사·활용형에 강함
+- 포스팅: 용어별 문서 번호 차분(delta)을 varint로 압축한 bytearray + tf(uint8)
+- 문서 번호는 추가 순으로만 증가 → 새 도서는 포스팅 끝에 이어 붙여 증분 갱신,
+  내용이 바뀐 도서는 이전 번호를 지우고(tombstone) 새로 추가, 지운 비율이 크면 압축 재구성
+- 카테고리 필터와 제외어(모든 bigram을 포함한 문서 제거) 지원
+- 검색·채점은 이벤트 루프 밖 스레드에서 실행: 갱신과 겹치지 않게 한 시점의 스냅숏을 읽음
+"""
+import asyncio
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.core.textprep import clean
+from app.services.embedding_store import book_key
+
+_WORD = re.compile(r"[0-9a-z가-힣ㄱ-ㅎㅏ-ㅣ]+")
+_TF_MAX = 255
+
+
+def tokenize(text: str) -> List[str]:
+    """어절별 문자 bigram (중복 포함)"""
+    return [w[i:i + 2] if len(w) > 1 else w
+            for w in _WORD.findall((text or "").lower()) for i in range(max(1, len(w) - 1))]
+
+
+def doc_text(book: Dict) -> str:
+    """색인 대상: 제목 + 저자 + 설명 + 카테고리명"""
+    sub = book.get("subInfo", {}) or {}
+    return " ".join(filter(None, (
+        book.get("title"), book.get("author"),
+        clean(book.get("description") or sub.get("description")), book.get("categoryName"),
+    )))
+
+
+def _varint(n: int, out: bytearray) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _decode_varints(buf: bytes) -> np.ndarray:
+    """varint 바이트열 → int64 배열 (벡터화)"""
+    b = np.frombuffer(buf, dtype=np.uint8)
+    if not (b >= 0x80).any():  # 흔한 경우: 모든 차분이 1바이트
+        return b.astype(np.int64)
+    ends = np.flatnonzero(b < 0x80)
+    if not len(ends):
+        return np.zeros(0, dtype=np.int64)
+    b = b[:ends[-1] + 1]  # 덧붙이는 중인 마지막 varint는 버림
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    shift = np.arange(len(b)) - np.repeat(starts, ends - starts + 1)
+    vals = (b & 0x7F).astype(np.int64) << (7 * shift)
+    return np.add.reduceat(vals, starts)
+
+
+class _Postings:
+    __slots__ = ("docs", "tfs", "last")
+
+    def __init__(self):
+        self.docs = bytearray()  # varint(doc - 이전 doc)
+        self.tfs = bytearray()   # min(tf, 255)
+        self.last = -1
+
+    def append(self, doc: int, tf: int) -> None:
+        delta = doc - self.last if self.last >= 0 else doc
+        if delta < 0x80:  # 대부분 1바이트
+            self.docs.append(delta)
+        else:
+            _varint(delta, self.docs)
+        self.tfs.append(tf if tf < _TF_MAX else _TF_MAX)
+        self.last = doc
+
+    def decode(self) -> Tuple[np.ndarray, np.ndarray]:
+        # 다른 스레드가 append하는 중일 수 있어 docs/tfs 양쪽에 모두 있는 항목까지만
+        docs = _decode_varints(bytes(self.docs))
+        tfs = np.frombuffer(bytes(self.tfs), dtype=np.uint8)
+        n = min(len(docs), len(tfs))
+        return np.cumsum(docs[:n]), tfs[:n]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.docs) + len(self.tfs)
+
+
+class LexicalIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_docs: int = 0):
+        self.k1 = k1
+        self.b = b
+        self.max_docs = max_docs  # 0 = 무제한 (초과분 증분 추가는 건너뜀)
+        self._terms: Dict[str, _Postings] = {}
+        self._books: List[Dict] = []             # 문서 번호 → 도서 (지운 문서도 압축 전까지 유지)
+        self._alive = bytearray()
+        self._sig: List[int] = []                # 내용 해시 (변경 감지)
+        self._len = array("I")                   # 문서 길이 (토큰 수)
+        self._cat = array("q")                   # categoryId (-1 = 없음)
+        self._doc_of: Dict[str, int] = {}        # book_key → 문서 번호
+        self._total_len = 0
+        self._dead = 0
+        self._mutex = threading.RLock()          # 갱신 ↔ 스냅숏 (둘 다 실행기 스레드에서)
+        self.counters: Dict[str, int] = {"added": 0, "updated": 0, "skipped": 0, "compactions": 0, "searches": 0}
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    def _add_doc(self, key: str, book: Dict, text: str, sig: int) -> None:
+        doc = len(self._books)
+        toks = tokenize(text)
+        terms = self._terms
+        for t, c in Counter(toks).items():
+            p = terms.get(t)
+            if p is None:
+                p = terms[t] = _Postings()
+            p.append(doc, c)
+        cid = book.get("categoryId")
+        self._books.append(book)
+        self._alive.append(1)
+        self._sig.append(sig)
+        self._len.append(len(toks))
+        self._cat.append(int(cid) if cid else -1)
+        self._doc_of[key] = doc
+        self._total_len += len(toks)
+
+    def _remove_doc(self, doc: int) -> None:
+        self._alive[doc] = 0
+        self._total_len -= self._len[doc]
+        self._dead += 1
+
+    def add_books(self, books: Iterable[Dict]) -> int:
+        """새 도서/내용이 바뀐 도서만 색인 (categoryId는 카탈로그의 category_id 기준). 추가·갱신한 수 반환"""
+        with self._mutex:
+            return self._add_books(books)
+
+    def _add_books(self, books: Iterable[Dict]) -> int:
+        n = 0
+        for b in books:
+            key = book_key(b)
+            if not key:
+                continue
+            text = doc_text(b)
+            sig = hash((text, b.get("categoryId")))
+            old = self._doc_of.get(key)
+            if old is not None:
+                if self._sig[old] == sig:
+                    continue
+                if not b.get("categoryId") and self._cat[old] >= 0:
+                    # 장르 없는 검색 결과로 기존 카테고리를 지우지 않음 (카탈로그 upsert와 동일)
+                    b = {**b, "categoryId": self._cat[old]}
+                    sig = hash((text, b["categoryId"]))  # 본문은 그대로, 카테고리만 바뀜
+                    if self._sig[old] == sig:
+                        continue
+                self._remove_doc(old)
+                self.counters["updated"] += 1
+            elif self.max_docs and len(self._doc_of) >= self.max_docs:
+                self.counters["skipped"] += 1
+                continue
+            else:
+                self.counters["added"] += 1
+            self._add_doc(key, b, text, sig)
+            n += 1
+        if self._dead > 1000 and self._dead > len(self._books) // 4:
+            self._compact()
+        return n
+
+    def compact(self) -> None:
+        """지운 문서를 빼고 문서 번호를 다시 매겨 포스팅 재압축 (기존 객체는 고치지 않고 새로 만들어 교체)"""
+        with self._mutex:
+            self._compact()
+
+    def _compact(self) -> None:
+        alive = np.frombuffer(bytes(self._alive), dtype=bool)
+        remap = np.cumsum(alive) - 1
+        terms: Dict[str, _Postings] = {}
+        for t, p in self._terms.items():
+            docs, tfs = p.decode()
+            keep = alive[docs]
+            if not keep.any():
+                continue
+            q = terms[t] = _Postings()
+            for d, c in zip(remap[docs[keep]].tolist(), tfs[keep].tolist()):
+                q.append(d, c)
+        idx = np.flatnonzero(alive).tolist()
+        self._terms = terms
+        self._books = [self._books[i] for i in idx]
+        self._alive = bytearray(b"\x01" * len(idx))
+        self._sig = [self._sig[i] for i in idx]
+        self._len = array("I", (self._len[i] for i in idx))
+        self._cat = array("q", (self._cat[i] for i in idx))
+        self._doc_of = {book_key(b): i for i, b in enumerate(self._books)}
+        self._dead = 0
+        self.counters["compactions"] += 1
+
+    def _snapshot(self) -> "_Snapshot":
+        with self._mutex:
+            return _Snapshot(self)
+
+    def search(
+        self, query: str, k: int, *,
+        category_ids: Optional[Iterable[int]] = None, exclude_terms: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict], np.ndarray]:
+        """(도서 얕은 복사본, BM25 점수) 내림차순 상위 k. 점수 0인 문서는 제외"""
+        self.counters["searches"] += 1
+        snap = self._snapshot()
+        scores = snap.bm25(tokenize(query))
+        if not len(scores):
+            return [], scores
+        scores[~snap.alive] = 0
+        if category_ids:
+            scores[~np.isin(snap.cat, list(category_ids))] = 0
+        for term in exclude_terms or []:
+            toks = tokenize(term)
+            if toks:
+                scores[snap.containing_all(toks)] = 0
+        hits = np.flatnonzero(scores > 0)
+        if not len(hits):
+            return [], np.zeros(0, dtype=np.float32)
+        if 0 < k < len(hits):
+            # 전체 정렬 대신 k번째 점수 이상만 남겨 정렬 (동점은 문서 번호 순 유지)
+            kth = np.partition(scores[hits], len(hits) - k)[len(hits) - k]
+            hits = hits[scores[hits] >= kth]
+        top = hits[np.argsort(-scores[hits], kind="stable")[:k]]
+        return [dict(snap.books[i]) for i in top], scores[top]
+
+    def candidates(self, books: Sequence[Dict]) -> "Candidates":
+        """후보 도서 집합 채점기 (문서 번호 매핑은 한 번만)"""
+        return Candidates(self._snapshot(), books)
+
+    def scores_for(self, query: str, books: Sequence[Dict]) -> np.ndarray:
+        """후보 도서별 BM25 점수 (색인에 없는 도서는 0). rerank 융합용"""
+        return self.candidates(books).scores([query])[0]
+
+    def stats(self) -> Dict:
+        return {
+            **self.counters,
+            "docs": len(self._doc_of),
+            "dead": self._dead,
+            "terms": len(self._terms),
+            "postings_bytes": sum(p.nbytes for p in self._terms.values()),
+        }
+
+
+class _Snapshot:
+    """
+    한 시점의 색인 읽기 전용 뷰. compact()는 포스팅·배열을 새 객체로 교체하고 이후 추가는
+    포스팅 끝에만 붙으므로, 참조와 문서 수(n)를 고정해 두면 락 없이 일관되게 읽을 수 있음
+    """
+
+    def __init__(self, index: LexicalIndex):
+        self.k1 = index.k1
+        self.b = index.b
+        self.terms = index._terms
+        self.books = index._books
+        self.doc_of = index._doc_of
+        self.n = len(index._books)
+        self.live = len(index._doc_of)
+        self.avgdl = max(1.0, index._total_len / self.live) if self.live else 1.0
+        # array.array를 frombuffer로 물고 있으면 루프 쪽 append가 BufferError → 복사본
+        self.dl = np.frombuffer(bytes(index._len), dtype=np.uint32)[:self.n].astype(np.float32)
+        self.alive = np.frombuffer(bytes(index._alive), dtype=bool)[:self.n]
+        self.cat = np.frombuffer(bytes(index._cat), dtype=np.int64)[:self.n]
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """스냅숏 이후 추가된 문서를 뺀 (문서 번호, tf)"""
+        p = self.terms.get(term)
+        if p is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint8)
+        docs, tfs = p.decode()
+        end = int(np.searchsorted(docs, self.n))
+        return docs[:end], tfs[:end]
+
+    def idf(self, df: int) -> float:
+        return math.log(1 + (self.live - df + 0.5) / (df + 0.5))
+
+    def bm25(self, terms: Sequence[str]) -> np.ndarray:
+        """문서 번호별 BM25 점수 (용어 단위 누적)"""
+        scores = np.zeros(self.n, dtype=np.float32)
+        if not self.live:
+            return scores
+        norm = self.k1 * (1 - self.b + self.b * self.dl / self.avgdl)
+        for t in set(terms):
+            docs, tfs = self.postings(t)
+            if not len(docs):
+                continue
+            tf = tfs.astype(np.float32)
+            scores[docs] += self.idf(len(docs)) * tf * (self.k1 + 1) / (tf + norm[docs])
+        return scores
+
+    def containing_all(self, terms: Sequence[str]) -> np.ndarray:
+        """모든 용어를 포함한 문서 마스크 (제외어 필터용)"""
+        mask = np.ones(self.n, dtype=bool)
+        for t in set(terms):
+            docs = self.postings(t)[0]
+            if not len(docs):
+                return np.zeros(self.n, dtype=bool)
+            m = np.zeros(self.n, dtype=bool)
+            m[docs] = True
+            mask &= m
+        return mask
+
+
+class Candidates:
+    """
+    후보 도서 집합에 대한 BM25 채점. 전체 색인 대신 후보 문서만 채점하며, 용어별 포스팅은
+    한 번만 풀어 후보 위치와 점수 기여분을 캐시 → 여러 질의(배치 chunk)가 공유
+    """
+
+    def __init__(self, snap: _Snapshot, books: Sequence[Dict]):
+        self._snap = snap
+        rows = np.fromiter((snap.doc_of.get(book_key(b), -1) for b in books), dtype=np.int64, count=len(books))
+        self.size = len(books)
+        self._cols = np.flatnonzero(rows >= 0)                 # 색인에 있는 후보 위치
+        self._docs, self._inv = np.unique(rows[self._cols], return_inverse=True)
+        self._norm = snap.k1 * (1 - snap.b + snap.b * snap.dl[self._docs] / snap.avgdl)
+        self._terms: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _term(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(term을 포함한 후보 문서의 _docs 위치, BM25 기여분)"""
+        hit = self._terms.get(term)
+        if hit is None:
+            snap = self._snap
+            docs, tfs = snap.postings(term)
+            pos = np.searchsorted(docs, self._docs)
+            found = pos < len(docs)
+            found[found] = docs[pos[found]] == self._docs[found]
+            at = np.flatnonzero(found)
+            tf = tfs[pos[at]].astype(np.float32)
+            hit = self._terms[term] = (
+                at, snap.idf(len(docs)) * tf * (snap.k1 + 1) / (tf + self._norm[at]))
+        return hit
+
+    def scores(self, queries: Sequence[str]) -> np.ndarray:
+        """(질의 수, 후보 수) float32 BM25 점수 (색인에 없는 도서는 0)"""
+        out = np.zeros((len(queries), self.size), dtype=np.float32)
+        if not len(self._docs):
+            return out
+        acc = np.zeros(len(self._docs), dtype=np.float32)
+        for i, q in enumerate(queries):
+            acc[:] = 0
+            for t in set(tokenize(q)):
+                at, contrib = self._term(t)
+                acc[at] += contrib
+            out[i, self._cols] = acc[self._inv]
+        return out
+
+
+_lexical: Optional[LexicalIndex] = None
+_swap = threading.Lock()  # 요청 경로의 증분 추가 ↔ load_lexical_index의 색인 교체
+
+def get_lexical_index() -> LexicalIndex:
+    global _lexical
+    if _lexical is None:
+        _lexical = LexicalIndex(settings.LEXICAL_BM25_K1, settings.LEXICAL_BM25_B, settings.LEXICAL_INDEX_MAX_DOCS)
+    return _lexical
+
+def index_books(books: Iterable[Dict]) -> int:
+    """현재 색인에 증분 추가 (실행기 스레드용). 교체 직전의 옛 색인에 추가해 잃어버리지 않도록 교체와 직렬화"""
+    with _swap:
+        return get_lexical_index().add_books(books)
+
+async def load_lexical_index() -> LexicalIndex:
+    """카탈로그 전체로 새 색인을 스레드에서 구축한 뒤 교체"""
+    from app.services.catalogue import get_catalogue
+
+    books = await get_catalogue().load_books()
+    index = LexicalIndex(settings.LEXICAL_BM25_K1, settings.LEXICAL_BM25_B, settings.LEXICAL_INDEX_MAX_DOCS)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, index.add_books, books)
+
+    def swap() -> None:
+        global _lexical
+        with _swap:
+            if _lexical is not None:
+                # 구축 중 요청 경로에서 추가된 도서 반영
+                index.add_books(b for b, alive in zip(_lexical._books, _lexical._alive) if alive)
+            _lexical = index
+
+    await loop.run_in_executor(None, swap)
+    return index
@@ -0,0 +1,144 @@
+"""
+추천 결과 의미 캐시
+- 키: 정규화된 제약(max_pages, min_pubyear, genre_candidates, exclude_terms) + 후보 수집 파라미터
+- 같은 키 안에서 내러티브 벡터 코사인 유사도가 임계값 이상이면 저장된 top-k를 그대로 사용
+- 전체 항목 수 LRU 제한 + TTL
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+
+def constraints_key(cons: Optional[Dict]) -> Tuple:
+    """랭킹에 영향을 주는 제약만 순서 무관하게 정규화"""
+    cons = cons or {}
+    return (
+        cons.get("max_pages") or None,
+        cons.get("min_pubyear") or None,
+        tuple(sorted(set(cons.get("genre_candidates") or []))),
+        tuple(sorted({t for t in cons.get("exclude_terms") or [] if t})),
+    )
+
+
+class _Entry:
+    __slots__ = ("bucket", "vec", "top", "expires_at")
+
+    def __init__(self, bucket: Hashable, vec: np.ndarray, top: List[Dict], expires_at: float):
+        self.bucket = bucket
+        self.vec = vec
+        self.top = top
+        self.expires_at = expires_at
+
+
+class _Bucket:
+    """같은 키의 항목들과 (m, d) 벡터 행렬 (변경 시 지연 재구성)"""
+
+    __slots__ = ("ids", "_mat")
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self._mat: Optional[np.ndarray] = None
+
+    def matrix(self, entries: "OrderedDict[int, _Entry]") -> np.ndarray:
+        if self._mat is None:
+            self._mat = np.stack([entries[i].vec for i in self.ids])
+        return self._mat
+
+    def add(self, eid: int) -> None:
+        self.ids.append(eid)
+        self._mat = None
+
+    def remove(self, eid: int) -> None:
+        self.ids.remove(eid)
+        self._mat = None
+
+
+class SemanticCache:
+    def __init__(self, max_entries: int = 2000, ttl_s: float = 600.0, threshold: float = 0.92):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.threshold = threshold
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[Hashable, _Bucket] = {}
+        self._next_id = 0
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+
+    @staticmethod
+    def _unit(vec: np.ndarray) -> np.ndarray:
+        v = np.asarray(vec, dtype=np.float32).reshape(-1)
+        n = float(np.linalg.norm(v))
+        return v / n if n > 0 else v
+
+    def _drop(self, eid: int) -> None:
+        e = self._entries.pop(eid)
+        b = self._buckets[e.bucket]
+        b.remove(eid)
+        if not b.ids:
+            del self._buckets[e.bucket]
+
+    def lookup(self, key: Hashable, vec: np.ndarray) -> Optional[Tuple[List[Dict], float]]:
+        """(저장된 top-k 복사본, 유사도) 또는 None"""
+        b = self._buckets.get(key)
+        if b is not None:
+            now = time.time()
+            for eid in [i for i in b.ids if self._entries[i].expires_at <= now]:
+                self._drop(eid)
+                self.counters["expired"] += 1
+            b = self._buckets.get(key)
+        if b is not None:
+            q = self._unit(vec)
+            mat = b.matrix(self._entries)
+            if mat.shape[1] == q.shape[0]:
+                sims = mat @ q
+                j = int(np.argmax(sims))
+                if sims[j] >= self.threshold:
+                    eid = b.ids[j]
+                    self._entries.move_to_end(eid)
+                    self.counters["hits"] += 1
+                    return [dict(x) for x in self._entries[eid].top], float(sims[j])
+        self.counters["misses"] += 1
+        return None
+
+    def store(self, key: Hashable, vec: np.ndarray, top: List[Dict]) -> None:
+        if not top:
+            return
+        eid = self._next_id
+        self._next_id += 1
+        self._entries[eid] = _Entry(key, self._unit(vec), [dict(x) for x in top], time.time() + self.ttl_s)
+        self._buckets.setdefault(key, _Bucket()).add(eid)
+        self.counters["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def stats(self) -> Dict:
+        c = self.counters
+        lookups = c["hits"] + c["misses"]
+        return {
+            **c,
+            "entries": len(self._entries),
+            "buckets": len(self._buckets),
+            "threshold": self.threshold,
+            "hit_rate": c["hits"] / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._buckets.clear()
+
+
+_semantic: Optional[SemanticCache] = None
+
+def get_semantic_cache() -> SemanticCache:
+    global _semantic
+    if _semantic is None:
+        _semantic = SemanticCache(
+            max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+            ttl_s=settings.SEMANTIC_CACHE_TTL_S,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        )
+    return _semantic
@@ -0,0 +1,106 @@
+"""
+면담 세션 저장소 (aiosqlite, Session 테이블)
+- 클라이언트에는 추측할 수 없는 token만 노출 (정수 id는 내부용)
+- state: 마지막으로 처리한 질문 id
+- constraints/negatives는 JSON 문자열로 보관
+"""
+import json
+import secrets
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.sqlite import LoopLock, connect, execute
+
+_TABLE = '"session"'  # SQLModel 기본 테이블명 (app.models.Session)
+
+
+class SessionStore:
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or ":memory:"
+        self._db = None
+        self._lock = LoopLock()
+
+    async def _conn(self):
+        async with self._lock.get():
+            if self._db is None:
+                self._db = await connect(self.db_path)
+                await self._db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {_TABLE} ("
+                    " id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,"
+                    " state TEXT NOT NULL, narrative TEXT, constraints_json TEXT,"
+                    " negatives_json TEXT, started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, token TEXT)"
+                )
+                async with self._db.execute(f"PRAGMA table_info({_TABLE})") as cur:
+                    cols = {row[1] for row in await cur.fetchall()}
+                if "token" not in cols:
+                    # token 이전에 만든 DB: 열만 추가 (기존 세션은 token이 없어 조회되지 않음)
+                    await self._db.execute(f"ALTER TABLE {_TABLE} ADD COLUMN token TEXT")
+                await self._db.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS ix_session_token ON {_TABLE} (token)")
+                await self._db.commit()
+        return self._db
+
+    async def create(
+        self, *, state: str, narrative: str = "", constraints: Optional[Dict] = None,
+        negatives: Optional[List[str]] = None, user_id: int = 0,
+    ) -> str:
+        """새 세션의 token 반환"""
+        db = await self._conn()
+        token = secrets.token_urlsafe(24)
+        await execute(
+            db,
+            f"INSERT INTO {_TABLE} (user_id, state, narrative, constraints_json, negatives_json, token)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, state, narrative, json.dumps(constraints or {}, ensure_ascii=False),
+             json.dumps(negatives or [], ensure_ascii=False), token),
+        )
+        await db.commit()
+        return token
+
+    async def get(self, token: str) -> Optional[Dict]:
+        if not token:
+            return None
+        db = await self._conn()
+        async with db.execute(
+            f"SELECT id, user_id, state, narrative, constraints_json, negatives_json, token FROM {_TABLE}"
+            " WHERE token = ?", (token,),
+        ) as cur:
+            row = await cur.fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "user_id": row[1],
+            "state": row[2],
+            "narrative": row[3] or "",
+            "constraints": json.loads(row[4] or "{}"),
+            "negatives": json.loads(row[5] or "[]"),
+            "token": row[6],
+        }
+
+    async def update(
+        self, token: str, *, state: str, narrative: str,
+        constraints: Dict, negatives: List[str],
+    ) -> None:
+        db = await self._conn()
+        await execute(
+            db,
+            f"UPDATE {_TABLE} SET state = ?, narrative = ?, constraints_json = ?, negatives_json = ?"
+            " WHERE token = ?",
+            (state, narrative, json.dumps(constraints, ensure_ascii=False),
+             json.dumps(negatives, ensure_ascii=False), token),
+        )
+        await db.commit()
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+_sessions: Optional[SessionStore] = None
+
+def get_sessions() -> SessionStore:
+    global _sessions
+    if _sessions is None:
+        _sessions = SessionStore(settings.SESSION_DB)
+    return _sessions
@@ -0,0 +1,52 @@
+"""
+aiosqlite 연결 공통 설정
+- 세션/카탈로그/임베딩 저장소가 기본으로 같은 파일(squin.db)을 각자의 연결로 쓰므로
+  WAL(읽기가 쓰기를 막지 않음) + busy_timeout(쓰기끼리는 잠깐 기다림)으로 연다
+- 결과 없는 문장은 execute()/executemany()로 실행: 버린 커서가 이벤트 루프 스레드에서 GC되면
+  같은 연결의 작업 스레드가 실행 중인 캐시 문장을 리셋해 SQLITE_MISUSE가 날 수 있음
+- 연결을 여는 락은 LoopLock: serve.preload의 asyncio.run에서 쓴 저장소를 fork한 워커의 루프에서도 씀
+"""
+import asyncio
+from typing import Iterable, Optional, Sequence
+
+from app.config import settings
+
+
+class LoopLock:
+    """
+    실행 중인 이벤트 루프마다 새로 만드는 asyncio.Lock.
+    asyncio.Lock은 처음 사용한 루프에 묶여(3.9는 생성 시점) 다른 루프에서 기다리면 RuntimeError
+    """
+
+    def __init__(self):
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+
+    def get(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+
+async def connect(path: str):
+    import aiosqlite
+
+    timeout = settings.SQLITE_BUSY_TIMEOUT_S
+    db = await aiosqlite.connect(path, timeout=timeout)
+    await db.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+    if path != ":memory:":
+        await db.execute("PRAGMA journal_mode = WAL")
+        await db.execute("PRAGMA synchronous = NORMAL")
+    return db
+
+
+async def execute(db, sql: str, params: Sequence = ()) -> None:
+    cur = await db.execute(sql, params)
+    await cur.close()
+
+
+async def executemany(db, sql: str, rows: Iterable[Sequence]) -> None:
+    cur = await db.executemany(sql, rows)
+    await cur.close()
@@ -0,0 +1,205 @@
+"""
+카탈로그 임베딩 FAISS 인덱스 (내적 = 코사인, 벡터는 정규화 가정)
+- 유형: flat / hnsw / ivf / ivfpq (VECTOR_INDEX_TYPE)
+- mmap: FAISS 대신 양자화 memmap 저장소(compact_vectors)를 정확 검색
+- GENRE_TO_CATEGORY id 기준 카테고리 필터 (IDSelector)
+"""
+import asyncio
+import os
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.config import settings
+from app.services.compact_vectors import CompactVectors
+
+
+def _faiss():
+    try:
+        import faiss
+    except ImportError as e:
+        raise RuntimeError("faiss-cpu is not installed") from e
+    return faiss
+
+
+def _category_rows(books: List[Dict], rows: Iterable[int]) -> Dict[int, np.ndarray]:
+    """카테고리 id → 행 번호"""
+    by_cat: Dict[int, List[int]] = {}
+    for b, r in zip(books, rows):
+        cid = b.get("categoryId")
+        if cid:
+            by_cat.setdefault(int(cid), []).append(r)
+    return {c: np.asarray(ids, dtype=np.int64) for c, ids in by_cat.items()}
+
+
+def _empty(dim: int) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+    return [], np.zeros((0, dim), dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+
+class VectorIndex:
+    def __init__(self, books: List[Dict], vecs: np.ndarray, *, kind: Optional[str] = None):
+        faiss = _faiss()
+        self.books = books
+        self.kind = (kind or settings.VECTOR_INDEX_TYPE).lower()
+        x = np.ascontiguousarray(vecs, dtype=np.float32)
+        n, d = x.shape
+        self.dim = d
+
+        # IVF 학습에 필요한 표본이 부족하면 flat으로 강등
+        nlist = settings.VECTOR_INDEX_NLIST
+        if self.kind in ("ivf", "ivfpq") and n < nlist * 39:
+            self.kind = "flat"
+
+        if self.kind == "hnsw":
+            index = faiss.IndexHNSWFlat(d, settings.VECTOR_INDEX_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = max(40, settings.VECTOR_INDEX_EF_SEARCH)
+        elif self.kind in ("ivf", "ivfpq"):
+            quantizer = faiss.IndexFlatIP(d)
+            if self.kind == "ivfpq":
+                index = faiss.IndexIVFPQ(quantizer, d, nlist, settings.VECTOR_INDEX_PQ_M, 8,
+                                         faiss.METRIC_INNER_PRODUCT)
+            else:
+                index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(x)
+        else:
+            index = faiss.IndexFlatIP(d)
+        index.add(x)
+        if self.kind in ("ivf", "ivfpq"):
+            index.make_direct_map()  # reconstruct_batch 용
+        self.index = index
+        self._quantizer = index.quantizer if self.kind in ("ivf", "ivfpq") else None
+
+        self.by_category = _category_rows(books, range(len(books)))
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def _params(self, ids: Optional[np.ndarray]):
+        faiss = _faiss()
+        sel = faiss.IDSelectorBatch(ids) if ids is not None else None
+        if self.kind == "hnsw":
+            return faiss.SearchParametersHNSW(sel=sel, efSearch=settings.VECTOR_INDEX_EF_SEARCH)
+        if self.kind in ("ivf", "ivfpq"):
+            return faiss.SearchParametersIVF(sel=sel, nprobe=settings.VECTOR_INDEX_NPROBE)
+        return faiss.SearchParameters(sel=sel) if sel is not None else None
+
+    def search(
+        self, qvec: np.ndarray, k: int, *, category_ids: Optional[Iterable[int]] = None
+    ) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+        """상위 k권의 (books 복사본, 벡터, 점수)"""
+        ids = None
+        if category_ids:
+            parts = [self.by_category[c] for c in category_ids if c in self.by_category]
+            if not parts:
+                return _empty(self.dim)
+            ids = np.unique(np.concatenate(parts))
+            k = min(k, len(ids))
+        k = min(k, len(self.books))
+        if k <= 0:
+            return _empty(self.dim)
+
+        q = np.ascontiguousarray(np.asarray(qvec, dtype=np.float32).reshape(1, -1))
+        params = self._params(ids)
+        if params is None:
+            D, I = self.index.search(q, k)
+        else:
+            D, I = self.index.search(q, k, params=params)
+        keep = I[0] >= 0
+        rows, scores = I[0][keep], D[0][keep]
+        vecs = self.index.reconstruct_batch(rows) if len(rows) else np.zeros((0, self.dim), dtype=np.float32)
+        # rerank가 _scores를 써넣으므로 얕은 복사본을 돌려준다
+        return [dict(self.books[i]) for i in rows], np.asarray(vecs, dtype=np.float32), scores
+
+
+class CompactIndex:
+    """
+    CompactVectors(memmap) 위의 정확 검색. 벡터는 파일에 두고 페이지 캐시로 공유하며
+    books는 저장소 행과 book_key로 맞춘 카탈로그 메타데이터만 보관
+    """
+
+    kind = "mmap"
+
+    def __init__(self, books: List[Dict], store: CompactVectors):
+        from app.services.embedding_store import book_key
+
+        rows = store.rows_for([book_key(b) for b in books])
+        keep = rows >= 0
+        self.store = store
+        self.dim = store.dim
+        self.books = [b for b, k in zip(books, keep) if k]
+        self.rows = rows[keep]
+        # 저장소 행 → books 위치
+        self._pos = np.full(len(store), -1, dtype=np.int64)
+        self._pos[self.rows] = np.arange(len(self.rows))
+        self.by_category = _category_rows(self.books, self.rows)
+        # 카탈로그에서 사라진 행이 있으면 전체 검색 대신 유효 행만
+        self._all = None if len(self.rows) == len(store) else np.sort(self.rows)
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def search(
+        self, qvec: np.ndarray, k: int, *, category_ids: Optional[Iterable[int]] = None
+    ) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+        rows = self._all
+        if category_ids:
+            parts = [self.by_category[c] for c in category_ids if c in self.by_category]
+            if not parts:
+                return _empty(self.dim)
+            rows = np.unique(np.concatenate(parts))
+        if k <= 0 or not self.books:
+            return _empty(self.dim)
+        top, scores = self.store.search(qvec, k, rows)
+        books = [dict(self.books[i]) for i in self._pos[top]]
+        return books, self.store.dequantize(top), scores
+
+
+_index: Optional[Union[VectorIndex, CompactIndex]] = None
+
+def get_index() -> Optional[Union[VectorIndex, CompactIndex]]:
+    return _index
+
+def _open_compact(path: str, prov: str, model: str) -> Optional[CompactVectors]:
+    """현재 provider/model로 만든 저장소면 열고, 없거나 다른 모델이면 None"""
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        return None
+    store = CompactVectors(path)
+    return store if (store.provider, store.model) == (prov, model) else None
+
+async def _load_compact(prov: str, model: str) -> Optional[CompactIndex]:
+    from app.services.catalogue import get_catalogue
+    from app.services.compact_vectors import RebuildLock, build_from_catalogue
+
+    path = settings.VECTOR_STORE_DIR
+    store = _open_compact(path, prov, model)
+    if store is None:
+        # 처음이거나 모델이 바뀌었으면 카탈로그에서 다시 내보냄. 여러 워커가 동시에 감지하면
+        # 잠금을 먼저 잡은 쪽만 구축하고 나머지는 그 결과를 그대로 사용
+        lock = RebuildLock(path)
+        await asyncio.get_running_loop().run_in_executor(None, lock.acquire)
+        try:
+            store = _open_compact(path, prov, model)
+            if store is None:
+                if not await build_from_catalogue(path, dtype=settings.VECTOR_STORE_DTYPE, provider=prov,
+                                                  lock=False):
+                    return None
+                store = CompactVectors(path)
+        finally:
+            lock.release()
+    books = await get_catalogue().load_books()
+    return CompactIndex(books, store) if len(store) else None
+
+async def load_index(provider: Optional[str] = None) -> Optional[Union[VectorIndex, CompactIndex]]:
+    """카탈로그(BookCache + BookEmbedding)에서 인덱스를 구축해 전역으로 등록"""
+    global _index
+    from app.core import nlp
+    from app.services.catalogue import get_catalogue
+
+    prov = nlp.resolve_provider(provider)
+    model = nlp.model_name(prov)
+    if settings.VECTOR_INDEX_TYPE.lower() == "mmap":
+        _index = await _load_compact(prov, model)
+        return _index
+    books, vecs = await get_catalogue().load_with_embeddings(provider=prov, model=model)
+    _index = VectorIndex(books, vecs) if books else None
+    return _index
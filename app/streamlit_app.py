@@ -1,8 +1,15 @@
 import os
 import sys
 import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 
 
 # 안전한 import 경로
@@ -35,6 +42,98 @@ def _get_api_base() -> str:
 
 API = _get_api_base()
 st.set_page_config(page_title="SQUIN Book Agent", page_icon="📚")
+
+# ---------- HTTP 연결 재사용 / 캐시 (브라우저 세션 간 공유) ----------
+RESULT_TTL_S = 600
+RESULT_MAX = 256
+
+@st.cache_resource
+def _http() -> requests.Session:
+    """keep-alive 커넥션 풀을 재실행(rerun)·세션 간에 공유"""
+    sess = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+    return sess
+
+@st.cache_resource
+def _executor() -> ThreadPoolExecutor:
+    """Q8 제출 후 추천을 미리 요청하는 백그라운드 스레드"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="squin-reco")
+
+class _ResultCache:
+    """같은 추천 요청의 결과를 재사용 (TTL + LRU, 스레드 안전)"""
+
+    def __init__(self):
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is None or hit[0] < time.time():
+                self._items.pop(key, None)
+                return None
+            self._items.move_to_end(key)
+            return hit[1]
+
+    def put(self, key: str, items: list) -> None:
+        with self._lock:
+            self._items[key] = (time.time() + RESULT_TTL_S, items)
+            self._items.move_to_end(key)
+            while len(self._items) > RESULT_MAX:
+                self._items.popitem(last=False)
+
+@st.cache_resource
+def _results() -> _ResultCache:
+    return _ResultCache()
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_questions(api: str) -> list:
+    # 실패는 예외로 올려 캐시에 남기지 않음
+    resp = _http().get(f"{api}/interview/questions", timeout=10)
+    resp.raise_for_status()
+    return resp.json().get("questions", [])
+
+@st.cache_data(show_spinner=False)
+def _genre_options() -> list:
+    return list_genre_options()
+
+def _reco_payload() -> dict:
+    return {
+        "message": st.session_state.narrative,
+        "constraints": st.session_state.constraints,
+        "aladin_key": st.session_state.get("user_aladin_key", None),
+        "embedding_provider": st.session_state.get("embedding_provider", None),
+        "openai_key": st.session_state.get("openai_key", None),
+    }
+
+def _reco_key(payload: dict) -> str:
+    # 키 값은 해시에만 쓰이고 저장되지 않음
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _fetch_recommend(http: requests.Session, results: _ResultCache, payload: dict, session_id, key: str) -> list:
+    """백그라운드 스레드에서 실행 (스크립트 컨텍스트가 없으므로 st.* 대신 인자로 받은 객체만 사용)"""
+    params = {"session_id": session_id} if session_id else None
+    resp = http.post(f"{API}/recommend", json=payload, params=params, timeout=90)
+    resp.raise_for_status()
+    items = resp.json().get("items", [])
+    if items:
+        results.put(key, items)
+    return items
+
+def _start_recommend() -> None:
+    """면담 종료 직후 추천 요청을 미리 시작 (같은 요청이 캐시에 있으면 생략)"""
+    payload = _reco_payload()
+    key = _reco_key(payload)
+    pending = st.session_state.get("reco_pending")
+    if _results().get(key) is not None or (pending is not None and pending[0] == key):
+        return
+    fut: Future = _executor().submit(
+        _fetch_recommend, _http(), _results(), payload, st.session_state.get("session_id"), key,
+    )
+    st.session_state.reco_pending = (key, fut)
+
 # 결과 설명 선택 및 요약 함수
 def _pick_description(item: dict, *, min_sentences: int = 3, max_sentences: int = 5) -> str:
     candidates_keys = [
@@ -66,6 +165,44 @@ def _pick_description(item: dict, *, min_sentences: int = 3, max_sentences: int
     clipped = " ".join(sentences[:take]).rstrip()
     return clipped + " …"
 
+def _render_items(items: list) -> None:
+    for it in items:
+        with st.container(border=True):
+            cols = st.columns([1,3])
+            with cols[0]:
+                if it.get("cover"): st.image(it["cover"], use_column_width=True)
+            with cols[1]:
+                st.markdown(f"**{it['title']}**")
+                st.caption(f"{it.get('author','')} · {it.get('category','')} · {it.get('pubdate','')} · {it.get('isbn13','')}")
+                st.write(_pick_description(it))
+                if it.get("link"): st.link_button("알라딘에서 보기", it["link"])
+
+def _stream_recommend(payload: dict, key: str, status, placeholder) -> list:
+    """NDJSON 스트림: preview → final 순으로 도착하는 대로 다시 그림. final 결과는 캐시에 저장"""
+    params = {"session_id": st.session_state.session_id} if st.session_state.get("session_id") else None
+    items = []
+    status.info("추천 생성 중… 먼저 인기/조건 기준 결과를 보여드리고, 취향 분석이 끝나면 갱신해요.")
+    try:
+        with _http().post(f"{API}/recommend/stream", json=payload, params=params,
+                          timeout=90, stream=True) as r:
+            for line in r.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                ev = json.loads(line)
+                if ev.get("stage") == "error":
+                    st.error(f"추천 중 오류가 발생했어요: {ev.get('detail')}")
+                    break
+                items = ev.get("items", [])
+                with placeholder.container():
+                    _render_items(items)
+                if ev.get("stage") == "preview":
+                    status.info("취향에 맞게 다시 정렬하는 중…")
+                elif ev.get("stage") == "final" and items:
+                    _results().put(key, items)
+    except Exception:
+        st.error("추천 서버에 연결할 수 없습니다. 나중에 다시 시도해주세요.")
+    return items
+
 # 세션 상태
 if "constraints" not in st.session_state:
     st.session_state.constraints = {}
@@ -77,7 +214,7 @@ if "questions" not in st.session_state:
     desired_order = [q["id"] for q in DEFAULT_QUESTIONS]
     defaults_by_id = {q["id"]: q for q in DEFAULT_QUESTIONS}
     try:
-        api_questions = requests.get(f"{API}/interview/questions").json().get("questions", [])
+        api_questions = _fetch_questions(API)
         api_by_id = {q.get("id"): q for q in api_questions if q.get("id")}
         # 고정 순서로 정렬하고 누락은 기본 문항으로 보완
         ordered = [api_by_id.get(qid, defaults_by_id[qid]) for qid in desired_order]
@@ -120,11 +257,17 @@ def _parse(qid: str, answer: str = "", structured=None, genres=None):
         "narrative": st.session_state.narrative,
         "structured": structured,
         "genres": genres,
+        # 서버 세션: 면담 도중 후보 수집을 미리 시작하기 위해 키/제공자도 함께 전달
+        "session_id": st.session_state.get("session_id"),
+        "aladin_key": st.session_state.get("user_aladin_key", None),
+        "embedding_provider": st.session_state.get("embedding_provider", None),
+        "openai_key": st.session_state.get("openai_key", None),
     }
     try:
-        parsed = requests.post(f"{API}/interview/parse", json=payload, timeout=60).json()
+        parsed = _http().post(f"{API}/interview/parse", json=payload, timeout=60).json()
         st.session_state.constraints = parsed.get("constraints", st.session_state.constraints)
         st.session_state.narrative = parsed.get("narrative", st.session_state.narrative)
+        st.session_state.session_id = parsed.get("session_id", st.session_state.get("session_id"))
     except Exception:
         # 오프라인/백엔드 오류 시 최소한의 로컬 업데이트로 계속 진행
         if answer:
@@ -172,7 +315,7 @@ if st.session_state.step < total:
             st.rerun()
 
     elif q["id"] == "Q5_GENRE":
-        genres = st.multiselect("장르(대분류) 선택", list_genre_options())
+        genres = st.multiselect("장르(대분류) 선택", _genre_options())
         st.caption("복수 선택 가능합니다. 비워두면 장르 제약 없이 검색합니다.")
         if st.button("다음"):
             _parse(q["id"], genres=genres)
@@ -198,6 +341,8 @@ if st.session_state.step < total:
         if st.button("추천 받기 🎯"):
             _parse(q["id"], answer=ans)
             st.session_state.step += 1
+            # 결과 화면의 버튼을 누르기 전에 서버 추천을 미리 시작
+            _start_recommend()
             st.rerun()
 
     else:
@@ -222,34 +367,31 @@ else:
     st.success("면담이 끝났어요. 조금만 기다려주세요!")
     # 추천 실행
     if st.button("취향 맞는 책 추천받기"):
-        payload = {
-            "message": st.session_state.narrative,
-            "constraints": st.session_state.constraints,
-            "aladin_key": st.session_state.get("user_aladin_key", None),
-            "embedding_provider": st.session_state.get("embedding_provider", None),
-            "openai_key": st.session_state.get("openai_key", None),
-        }
-        with st.spinner("추천 생성 중…"):
+        payload = _reco_payload()
+        key = _reco_key(payload)
+        status = st.empty()
+        placeholder = st.empty()
+        items = _results().get(key) or []
+        pending = st.session_state.pop("reco_pending", None)
+        if not items and pending is not None and pending[0] == key:
+            # 면담 종료 때 시작한 요청 결과를 기다림 (실패하면 스트리밍으로 다시 요청)
             try:
-                resp = requests.post(f"{API}/recommend", json=payload, timeout=90).json()
+                with st.spinner("추천을 마무리하는 중…"):
+                    items = pending[1].result(timeout=90)
             except Exception:
-                st.error("추천 서버에 연결할 수 없습니다. 나중에 다시 시도해주세요.")
-                resp = {"items": []}
-        items = resp.get("items", [])
+                items = []
+        if items:
+            with placeholder.container():
+                _render_items(items)
+        else:
+            items = _stream_recommend(payload, key, status, placeholder)
+        status.empty()
         if not items:
             st.warning("조건에 맞는 결과가 없어요. 제약을 더 완화해 보세요.")
-        for it in items:
-            with st.container(border=True):
-                cols = st.columns([1,3])
-                with cols[0]:
-                    if it.get("cover"): st.image(it["cover"], use_column_width=True)
-                with cols[1]:
-                    st.markdown(f"**{it['title']}**")
-                    st.caption(f"{it.get('author','')} · {it.get('category','')} · {it.get('pubdate','')} · {it.get('isbn13','')}")
-                    st.write(_pick_description(it))
-                    if it.get("link"): st.link_button("알라딘에서 보기", it["link"])
     if st.button("다시 면담하기"):
         st.session_state.step = 0
         st.session_state.constraints = {}
         st.session_state.narrative = ""
+        st.session_state.session_id = None
+        st.session_state.pop("reco_pending", None)
         st.rerun()
@@ -0,0 +1,98 @@
+"""
+오프라인 테스트용 알라딘 TTB API 스텁 서버
+
+    python -m benchmarks.aladin_stub --port 8766 [--per-category 300] [--latency-ms 20] [--error-every 7]
+    ALADIN_BASE_URL=http://127.0.0.1:8766/ttb/api/ ALADIN_TTB_KEY=stub ...
+
+카테고리·QueryType·페이지마다 결정적인 합성 도서를 돌려준다.
+"""
+import argparse
+import asyncio
+import random
+import zlib
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.fixtures import make_book
+
+
+def create_app(*, per_category: int = 300, latency_ms: float = 0.0, error_every: int = 0) -> FastAPI:
+    app = FastAPI(title="Aladin TTB stub")
+    app.state.requests = 0
+
+    def _page(seed_key: str, category_id: Optional[int], start: int, max_results: int, total: int):
+        first = (start - 1) * max_results
+        if first >= total:
+            return []
+        base = zlib.crc32(seed_key.encode("utf-8")) % 1_000_000 * 1000
+        rnd = random.Random(f"{seed_key}:{start}")
+        n = min(max_results, total - first)
+        return [make_book(base + first + i, rnd, category_id=category_id) for i in range(n)]
+
+    async def _common(request: Request):
+        app.state.requests += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000.0)
+        if error_every and app.state.requests % error_every == 0:
+            return None, JSONResponse({"errorCode": 500}, status_code=500)
+        q = request.query_params
+        if not q.get("ttbkey"):
+            return None, JSONResponse({"errorCode": 100, "errorMessage": "ttbkey missing", "error": "ttbkey"})
+        return q, None
+
+    @app.get("/ttb/api/ItemList.aspx")
+    async def item_list(request: Request):
+        q, err = await _common(request)
+        if err is not None:
+            return err
+        cat = int(q.get("CategoryId", 0)) or None
+        key = f"list:{q.get('QueryType', 'Bestseller')}:{cat}"
+        items = _page(key, cat, int(q.get("start", 1)), int(q.get("MaxResults", 50)), per_category)
+        return {"totalResults": per_category, "item": items}
+
+    @app.get("/ttb/api/ItemSearch.aspx")
+    async def item_search(request: Request):
+        q, err = await _common(request)
+        if err is not None:
+            return err
+        cat = int(q.get("CategoryId", 0)) or None
+        key = f"search:{q.get('Query', '')}:{cat}"
+        items = _page(key, cat, int(q.get("start", 1)), int(q.get("MaxResults", 40)), 200)
+        return {"totalResults": 200, "item": items}
+
+    @app.get("/ttb/api/ItemLookUp.aspx")
+    async def item_lookup(request: Request):
+        q, err = await _common(request)
+        if err is not None:
+            return err
+        item_id = q.get("ItemId", "0")
+        rnd = random.Random(item_id)
+        book = make_book(int(item_id[-9:] or 0), rnd)
+        book["isbn13"] = item_id
+        book["fullDescription"] = book["description"] + " (상세)"
+        return {"item": [book]}
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--per-category", type=int, default=300)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--error-every", type=int, default=0)
+    args = ap.parse_args()
+    uvicorn.run(create_app(per_category=args.per_category, latency_ms=args.latency_ms,
+                           error_every=args.error_every), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+압축(memmap) 벡터 저장소: float32 대비 recall@k, 크기, 질의 지연
+
+    python -m benchmarks.bench_compact [-n 100000] [--dim 768] [--queries 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.compact_vectors import DTYPES, CompactVectors, write
+
+
+def make_vectors(n: int, dim: int, seed: int = 0, clusters: int = 256) -> np.ndarray:
+    """군집 구조가 있는 정규화 벡터 (문장 임베딩처럼 이웃 간 점수 차가 작도록)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    x = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def recall(ref: np.ndarray, got: np.ndarray) -> float:
+    return float(np.mean([len(np.intersect1d(r, g)) / len(r) for r, g in zip(ref, got)]))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("-k", type=int, nargs="+", default=[10, 200])
+    args = ap.parse_args()
+
+    x = make_vectors(args.n, args.dim)
+    qs = make_vectors(args.queries, args.dim, seed=1)
+    keys = [str(i) for i in range(args.n)]
+    kmax = max(args.k)
+
+    exact = np.argsort(-(qs @ x.T), axis=1)[:, :kmax]
+    # 기준 지연: 같은 방식(질의 1개씩 전체 내적 + 상위 k)의 float32
+    t = time.perf_counter()
+    for q in qs:
+        s = x @ q
+        np.argpartition(-s, kmax - 1)[:kmax]
+    t_f32 = (time.perf_counter() - t) / args.queries
+    print(f"n={args.n} dim={args.dim}  float32 {x.nbytes / 2**20:8.1f} MiB  {t_f32 * 1e3:7.2f} ms/query")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in DTYPES:
+            path = os.path.join(tmp, dtype)
+            write(path, keys, x, dtype=dtype)
+            store = CompactVectors(path)
+            got = []
+            t = time.perf_counter()
+            for q in qs:
+                rows, _ = store.search(q, kmax)
+                got.append(rows)
+            t_q = (time.perf_counter() - t) / args.queries
+            got = np.stack(got)
+            rec = "  ".join(f"recall@{k} {recall(exact[:, :k], got[:, :k]):.4f}" for k in args.k)
+            print(f"{dtype:>8}  {store.nbytes / 2**20:8.1f} MiB  {t_q * 1e3:7.2f} ms/query  {rec}")
+            del store
+
+
+if __name__ == "__main__":
+    main()
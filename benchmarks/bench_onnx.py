@@ -0,0 +1,67 @@
+"""
+SBERT(PyTorch) vs ONNX Runtime 인코더: 코사인 일치도 + 처리량
+
+    python -m app.core.onnx_encoder --out models/kr-sbert-onnx
+    python -m benchmarks.bench_onnx --model-dir models/kr-sbert-onnx [--fp32] [--threads 4]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.core.nlp import SBERT_MODEL
+from app.core.onnx_encoder import OnnxEncoder
+
+WORDS = ["따뜻한", "위로", "일상", "잔혹한", "철학적인", "성장", "가족", "여행", "추리", "우정",
+         "소설", "에세이", "이야기", "주인공", "마음", "기억", "사랑", "도시", "바다", "시간"]
+
+
+def make_texts(n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    return [" ".join(rnd.choices(WORDS, k=rnd.randint(5, 80))) for _ in range(n)]
+
+
+def _throughput(fn, texts, repeat: int = 3) -> float:
+    fn(texts[:8])  # 워밍업
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - t)
+    return len(texts) / best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model-dir", default="models/kr-sbert-onnx")
+    ap.add_argument("--fp32", action="store_true", help="양자화되지 않은 model.onnx 사용")
+    ap.add_argument("--threads", type=int, default=0)
+    ap.add_argument("-n", type=int, default=256)
+    ap.add_argument("--min-cos", type=float, default=0.98)
+    args = ap.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    st = SentenceTransformer(SBERT_MODEL, device="cpu")
+    onnx = OnnxEncoder(args.model_dir, quantized=not args.fp32, intra_op_threads=args.threads)
+    texts = make_texts(args.n)
+
+    ref = np.asarray(st.encode(texts, normalize_embeddings=True), dtype=np.float32)
+    got = onnx.encode(texts)
+    cos = (ref * got).sum(axis=1)
+    print(f"model: {onnx.model_path}  quantized={onnx.quantized}")
+    print(f"cosine vs torch: mean {cos.mean():.5f}  min {cos.min():.5f}")
+    # 검색 결과 일치도: 각 문장의 최근접 이웃이 같은지
+    nn_ref = np.argsort(-(ref @ ref.T), axis=1)[:, 1]
+    nn_got = np.argsort(-(got @ got.T), axis=1)[:, 1]
+    print(f"nearest-neighbour agreement: {(nn_ref == nn_got).mean():.3f}")
+
+    tp_torch = _throughput(lambda t: st.encode(t, normalize_embeddings=True), texts)
+    tp_onnx = _throughput(onnx.encode, texts)
+    print(f"throughput: torch {tp_torch:.1f} texts/s  onnx {tp_onnx:.1f} texts/s  (x{tp_onnx / tp_torch:.2f})")
+
+    assert cos.min() >= args.min_cos, f"cosine parity below {args.min_cos}"
+
+
+if __name__ == "__main__":
+    main()
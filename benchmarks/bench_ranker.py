@@ -0,0 +1,66 @@
+"""
+ranker 벤치마크: 기존 루프 구현 vs 컬럼형 구현 (50 / 5k / 100k 후보)
+
+    python -m benchmarks.bench_ranker
+"""
+import time
+
+import numpy as np
+
+from app.core.ranker import BookColumns, mix_score, popularity, rerank, rerank_batch, rule_score
+from benchmarks.fixtures import make_books
+
+CONS = {"max_pages": 300, "min_pubyear": 2019, "exclude_terms": ["잔혹", "철학적"]}
+
+
+def rerank_loop(narr_vec, books, book_vecs, cons, topk=5):
+    """벡터화 이전 구현 (기준값)"""
+    sims = (narr_vec @ book_vecs.T).tolist()
+    ranked = []
+    for i, b in enumerate(books):
+        sem = sims[i]
+        rule = rule_score(b, cons)
+        pop = popularity(b)
+        ranked.append((mix_score(sem, rule, pop), sem, rule, pop, b))
+    ranked.sort(key=lambda x: x[0], reverse=True)
+    return [(b["itemId"], {"final": s, "semantic": se, "rule": r, "pop": p})
+            for s, se, r, p, b in ranked[:topk]]
+
+
+def _vecs(n: int, d: int = 768, seed: int = 0) -> np.ndarray:
+    v = np.random.default_rng(seed).standard_normal((n, d)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main() -> None:
+    for n in (50, 5_000, 100_000):
+        books = make_books(n)
+        bvecs = _vecs(n)
+        q = _vecs(1, seed=1)[0]
+
+        ref = rerank_loop(q, books, bvecs, CONS)
+        got = [(b["itemId"], b["_scores"]) for b in rerank(q, books, bvecs, CONS)]
+        assert ref == got, f"mismatch at n={n}"
+
+        repeat = 20 if n <= 5_000 else 3
+        t_loop = _time(lambda: rerank_loop(q, books, bvecs, CONS), repeat)
+        t_vec = _time(lambda: rerank(q, books, bvecs, CONS), repeat)
+        cols = BookColumns(books)
+        t_cols = _time(lambda: rerank_batch(q, cols, bvecs, CONS), repeat)
+        qs = _vecs(32, seed=2)
+        t_batch = _time(lambda: rerank_batch(qs, cols, bvecs, CONS), repeat)
+        print(f"n={n:>7}  loop {t_loop*1e3:9.2f} ms  vectorized {t_vec*1e3:8.2f} ms  "
+              f"pre-columnized {t_cols*1e3:8.2f} ms  32 queries {t_batch*1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
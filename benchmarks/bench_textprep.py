@@ -0,0 +1,76 @@
+"""
+임베딩 전처리 효과: 원문 설명 그대로(도착 순서) vs 정제·토큰 예산 절단·길이 정렬
+
+    python -m benchmarks.bench_textprep [-n 2000] [--batch 32] [--sbert | --onnx]
+
+- 기본: 모델 없이 토큰 수를 근사해 배치별 패딩 포함 토큰 수(= 인코더 연산량의 대리 지표)를 비교
+- --sbert / --onnx: 실제 인코더로 같은 도서를 두 방식으로 인코딩해 시간 비교
+"""
+import argparse
+import time
+from typing import Callable, List
+
+from app.core import nlp, textprep
+from benchmarks.fixtures import make_realistic_books
+
+MODEL_MAX_TOKENS = 128  # 인코더가 어차피 잘라내는 길이
+
+
+def raw_text(book) -> str:
+    """이전 방식: 설명(없으면 제목)을 그대로"""
+    sub = book.get("subInfo", {}) or {}
+    return book.get("description") or sub.get("description") or book.get("title") or ""
+
+
+def _timed(fn: Callable[[], object], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=2000)
+    ap.add_argument("--batch", type=int, default=32)
+    g = ap.add_mutually_exclusive_group()
+    g.add_argument("--sbert", action="store_true")
+    g.add_argument("--onnx", action="store_true")
+    args = ap.parse_args()
+
+    books = make_realistic_books(args.n, seed=7)
+    raw = [raw_text(b) for b in books]
+    t_prep = _timed(lambda: [textprep.book_text(b) for b in books])
+    new = [textprep.book_text(b) for b in books]
+    order = textprep.length_order(new)
+
+    def _tokens(texts: List[str]) -> List[int]:
+        return [min(MODEL_MAX_TOKENS, textprep.estimate_tokens(t)) for t in texts]
+
+    raw_tok = _tokens(raw)
+    new_tok = _tokens(new)
+    rows = [
+        ("raw, arrival order", sum(len(t) for t in raw), textprep.padded_tokens(raw_tok, args.batch)),
+        ("clean+truncate, arrival order", sum(len(t) for t in new), textprep.padded_tokens(new_tok, args.batch)),
+        ("clean+truncate, length-sorted", sum(len(t) for t in new),
+         textprep.padded_tokens([new_tok[i] for i in order], args.batch)),
+    ]
+    print(f"n={args.n} batch={args.batch}  preprocessing {t_prep / args.n * 1e6:.1f} us/book")
+    print(f"html entities/tags in raw: {sum(('<' in t or '&' in t) for t in raw)} books,"
+          f" longest raw {max(len(t) for t in raw)} chars")
+    print(f"{'pipeline':<32} {'chars':>10} {'padded tokens':>14} {'vs raw':>7}")
+    for name, chars, padded in rows:
+        print(f"{name:<32} {chars:>10} {padded:>14} {rows[0][2] / padded:>6.2f}x")
+
+    if args.sbert or args.onnx:
+        prov = "sbert" if args.sbert else "sbert-onnx"
+        nlp.warmup(prov)
+        t_raw = _timed(lambda: nlp._encode_local(raw, prov), repeat=1)
+        t_new = _timed(lambda: nlp.embed_texts(new, provider=prov), repeat=1)
+        print(f"{prov}: raw {t_raw:.2f}s  prepared {t_new:.2f}s  speedup {t_raw / t_new:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+워커 수에 따른 메모리(RSS/PSS)와 처리량 측정 (Linux /proc 사용)
+
+    python -m benchmarks.aladin_stub --port 8766 &
+    ALADIN_BASE_URL=http://127.0.0.1:8766/ttb/api/ ALADIN_TTB_KEY=stub \\
+        python -m benchmarks.bench_workers --workers 1 2 4 [--duration 20] [--concurrency 32] [--no-preload]
+
+- 워커 수마다 `python -m app.serve`를 띄우고 /readyz가 200이 될 때까지 대기
+- /recommend에 동시 요청을 보내 req/s, p50/p99 측정 (요청 본문은 --message/--category-id)
+- 마스터와 워커 프로세스의 RSS와 PSS(공유 페이지를 나눠 계산)를 합산:
+  preload가 효과적이면 워커가 늘어도 PSS 합계는 RSS 합계보다 훨씬 천천히 늘어남
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+
+def _children(pid: int) -> List[int]:
+    out: List[int] = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                out.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return out
+
+
+def memory_kib(pid: int) -> Dict[str, int]:
+    """smaps_rollup의 Rss/Pss (KiB)"""
+    mem = {"rss": 0, "pss": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    mem[key.lower()] = int(rest.split()[0])
+    except OSError:
+        pass
+    return mem
+
+
+async def _wait_ready(base: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as c:
+        while time.monotonic() < deadline:
+            try:
+                if (await c.get(f"{base}/readyz", timeout=2)).status_code == 200:
+                    return True
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    return False
+
+
+async def _load(base: str, body: Dict, duration: float, concurrency: int) -> Dict:
+    lat: List[float] = []
+    errors = 0
+    stop = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as c:
+        async def _user() -> None:
+            nonlocal errors
+            while time.monotonic() < stop:
+                t = time.perf_counter()
+                try:
+                    r = await c.post("/recommend", json=body)
+                    r.raise_for_status()
+                    lat.append(time.perf_counter() - t)
+                except httpx.HTTPError:
+                    errors += 1
+        t0 = time.perf_counter()
+        await asyncio.gather(*[_user() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - t0
+    lat.sort()
+    return {
+        "rps": len(lat) / elapsed,
+        "p50_ms": statistics.median(lat) * 1e3 if lat else 0.0,
+        "p99_ms": lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1e3 if lat else 0.0,
+        "errors": errors,
+    }
+
+
+def run_one(workers: int, args) -> Dict:
+    port = args.port
+    base = f"http://127.0.0.1:{port}"
+    cmd = [sys.executable, "-m", "app.serve", "--workers", str(workers), "--port", str(port),
+           "--host", "127.0.0.1", "--log-level", "warning"] + (["--no-preload"] if args.no_preload else [])
+    proc = subprocess.Popen(cmd)
+    try:
+        if not asyncio.run(_wait_ready(base, args.ready_timeout)):
+            raise RuntimeError(f"server with {workers} workers not ready in {args.ready_timeout}s")
+        body = {"message": args.message, "category_id": args.category_id, "semantic_cache": False}
+        asyncio.run(_load(base, body, 2.0, args.concurrency))  # 워밍업 (캐시/커넥션)
+        res = asyncio.run(_load(base, body, args.duration, args.concurrency))
+        pids = [proc.pid] + _children(proc.pid)
+        mems = [memory_kib(p) for p in pids]
+        res.update(workers=workers,
+                   rss_mib=sum(m["rss"] for m in mems) / 1024,
+                   pss_mib=sum(m["pss"] for m in mems) / 1024,
+                   worker_rss_mib=[round(m["rss"] / 1024, 1) for m in mems[1:]])
+        return res
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--port", type=int, default=8791)
+    ap.add_argument("--duration", type=float, default=20.0)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--ready-timeout", type=float, default=300.0)
+    ap.add_argument("--message", default="따뜻한 위로가 되는 일상 이야기")
+    ap.add_argument("--category-id", type=int, default=1)
+    ap.add_argument("--no-preload", action="store_true", help="비교용: 워커마다 모델을 따로 로드")
+    args = ap.parse_args()
+
+    print(f"{'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'err':>5} {'RSS MiB':>9} {'PSS MiB':>9}  worker RSS")
+    for n in args.workers:
+        r = run_one(n, args)
+        print(f"{r['workers']:>7} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>5}"
+              f" {r['rss_mib']:>9.1f} {r['pss_mib']:>9.1f}  {r['worker_rss_mib']}")
+
+
+if __name__ == "__main__":
+    main()
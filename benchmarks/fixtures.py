@@ -0,0 +1,59 @@
+"""
+벤치마크/스텁 서버 공용 합성 데이터 (알라딘 응답 형태)
+"""
+import random
+from typing import Dict, List, Optional
+
+WORDS = ["따뜻한", "위로", "일상", "잔혹", "철학적", "성장", "가족", "여행", "추리", "우정",
+         "소설", "에세이", "이야기", "주인공", "마음", "기억", "사랑", "도시", "바다", "시간"]
+CATEGORY_NAMES = ["국내도서>소설/시/희곡", "국내도서>에세이", "국내도서>인문학", "국내도서>과학"]
+
+
+def make_book(i: int, rnd: random.Random, *, category_id: Optional[int] = None) -> Dict:
+    return {
+        "itemId": i + 1,
+        "isbn13": f"979{i:010d}",
+        "title": f"책 {i}",
+        "author": f"저자 {i % 97}",
+        "description": " ".join(rnd.choices(WORDS, k=rnd.randint(8, 60))),
+        "categoryId": category_id or rnd.randint(1, 60000),
+        "categoryName": rnd.choice(CATEGORY_NAMES),
+        "pubDate": f"{rnd.randint(1990, 2025)}-0{rnd.randint(1, 9)}-01",
+        "priceStandard": rnd.randint(8, 40) * 1000,
+        "cover": f"https://image.example/{i}.jpg",
+        "link": f"https://www.aladin.co.kr/shop/wproduct.aspx?ItemId={i + 1}",
+        "customerReviewRank": rnd.randint(0, 10),
+        "salesPoint": rnd.randint(0, 50000),
+        "subInfo": {"itemPage": rnd.randint(80, 900)} if rnd.random() > 0.1 else {},
+    }
+
+
+def make_books(n: int, seed: int = 0, *, offset: int = 0, category_id: Optional[int] = None) -> List[Dict]:
+    rnd = random.Random(seed)
+    return [make_book(offset + i, rnd, category_id=category_id) for i in range(n)]
+
+
+_HTML_BITS = ["<br/>", "<br>", "<b>", "</b>", "&lt;", "&gt;", "&quot;", "&#39;", "&middot;", "&amp;lt;b&amp;gt;",
+              "<p>", "</p>", "&nbsp;"]
+
+
+def realistic_description(rnd: random.Random) -> str:
+    """알라딘 설명처럼 HTML 태그/엔티티가 섞이고 길이가 들쭉날쭉한 텍스트 (대부분 짧고 일부는 수천 자)"""
+    n = min(1200, max(3, int(rnd.lognormvariate(3.2, 1.0))))
+    out = []
+    for _ in range(n):
+        out.append(rnd.choice(WORDS))
+        if rnd.random() < 0.08:
+            out.append(rnd.choice(_HTML_BITS))
+    return " ".join(out)
+
+
+def make_realistic_books(n: int, seed: int = 0) -> List[Dict]:
+    rnd = random.Random(seed)
+    books = []
+    for i in range(n):
+        b = make_book(i, rnd)
+        b["description"] = realistic_description(rnd) if rnd.random() > 0.05 else ""
+        b["categoryName"] = rnd.choice(CATEGORY_NAMES) + ">" + rnd.choice(["한국소설", "일본소설", "과학일반", "에세이"])
+        books.append(b)
+    return books
@@ -0,0 +1,84 @@
+"""
+오프라인 테스트/벤치마크용 OpenAI 임베딩 스텁 서버
+
+    python -m benchmarks.openai_stub --port 8765 [--fail-every 3] [--latency-ms 50]
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub EMBEDDING_PROVIDER=openai ...
+
+텍스트 해시로 시드를 정해 결정적인 벡터를 돌려준다. --fail-every N 이면 N번째 요청마다 429,
+--error-every N 이면 503을 돌려 재시도 경로를 확인할 수 있다.
+"""
+import argparse
+import asyncio
+import hashlib
+from typing import List, Optional, Union
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+FULL_DIM = 3072
+
+
+class EmbeddingsIn(BaseModel):
+    model: str
+    input: Union[str, List[str]]
+    dimensions: Optional[int] = None
+    encoding_format: Optional[str] = None
+
+
+def stub_vector(text: str, dim: int = FULL_DIM) -> List[float]:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    v = np.random.default_rng(seed).standard_normal(dim)
+    return (v / np.linalg.norm(v)).tolist()
+
+
+def create_app(*, fail_every: int = 0, error_every: int = 0, latency_ms: float = 0.0) -> FastAPI:
+    app = FastAPI(title="OpenAI embeddings stub")
+    app.state.requests = 0
+    app.state.batch_sizes = []
+
+    @app.post("/v1/embeddings")
+    async def embeddings(payload: EmbeddingsIn):
+        app.state.requests += 1
+        n = app.state.requests
+        if fail_every and n % fail_every == 0:
+            return JSONResponse({"error": {"message": "rate limited", "type": "rate_limit"}},
+                                status_code=429, headers={"retry-after": "0.01"})
+        if error_every and n % error_every == 0:
+            return JSONResponse({"error": {"message": "unavailable"}}, status_code=503)
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000.0)
+        texts = [payload.input] if isinstance(payload.input, str) else payload.input
+        app.state.batch_sizes.append(len(texts))
+        dim = payload.dimensions or FULL_DIM
+        return {
+            "object": "list",
+            "model": payload.model,
+            "data": [{"object": "embedding", "index": i, "embedding": stub_vector(t, dim)}
+                     for i, t in enumerate(texts)],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests, "batch_sizes": app.state.batch_sizes}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--fail-every", type=int, default=0)
+    ap.add_argument("--error-every", type=int, default=0)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    args = ap.parse_args()
+    uvicorn.run(create_app(fail_every=args.fail_every, error_every=args.error_every,
+                           latency_ms=args.latency_ms), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+오프라인 마이크로벤치마크 모음 (ranker / 면담 파싱 / 임베딩 / 알라딘 클라이언트 / BM25 색인)
+- 합성 알라딘 도서(benchmarks.fixtures), 결정적 가짜 임베더, httpx MockTransport 사용 → 네트워크 불필요
+- 케이스별 ops/sec, p50/p99 지연, 최대 메모리(tracemalloc)를 측정해 JSON으로 저장
+- --baseline으로 이전 결과와 p50을 비교
+
+    python -m benchmarks.suite --out bench-base.json
+    python -m benchmarks.suite --baseline bench-base.json --out bench-new.json [--only ranker aladin] [--sbert]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import zlib
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.fixtures import make_books
+
+CONS = {"max_pages": 300, "min_pubyear": 2019, "exclude_terms": ["잔혹", "철학적"]}
+DIM = 768
+ANSWERS = [
+    "잔혹한 장면이나 폭력적인 묘사는 빼주세요",
+    "철학적인 주제는 싫고 로맨스 X",
+    "딱히 없어요",
+    "고어 요소, 형이상학적인 이야기, 연애 싫어요",
+    "너무 무겁지 않은 따뜻한 이야기면 좋겠어요 " * 4,
+]
+
+
+# ---------- 측정 ----------
+def _summary(times: List[float], peak: int) -> Dict:
+    arr = np.asarray(times)
+    return {
+        "iters": len(times),
+        "ops_per_s": float(len(times) / arr.sum()),
+        "mean_ms": float(arr.mean() * 1e3),
+        "p50_ms": float(np.percentile(arr, 50) * 1e3),
+        "p99_ms": float(np.percentile(arr, 99) * 1e3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def _keep_going(times: List[float], started: float, min_time: float, max_iters: int) -> bool:
+    return len(times) < max_iters and (len(times) < 5 or time.perf_counter() - started < min_time)
+
+
+def measure(fn: Callable[[], object], *, min_time: float, max_iters: int, warmup: int = 2) -> Dict:
+    for _ in range(warmup):
+        fn()
+    times: List[float] = []
+    started = time.perf_counter()
+    while _keep_going(times, started, min_time, max_iters):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    # tracemalloc은 실행을 느리게 하므로 지연 측정과 분리해 한 번만
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _summary(times, peak)
+
+
+async def ameasure(fn: Callable[[], Awaitable[object]], *, min_time: float, max_iters: int, warmup: int = 2) -> Dict:
+    for _ in range(warmup):
+        await fn()
+    times: List[float] = []
+    started = time.perf_counter()
+    while _keep_going(times, started, min_time, max_iters):
+        t = time.perf_counter()
+        await fn()
+        times.append(time.perf_counter() - t)
+    tracemalloc.start()
+    await fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _summary(times, peak)
+
+
+# ---------- 가짜 임베더 ----------
+class FakeEncoder:
+    """SentenceTransformer.encode 흉내: 텍스트 CRC로 시드한 정규화 벡터 (같은 입력 → 같은 출력)"""
+
+    def __init__(self, dim: int = DIM):
+        self.dim = dim
+
+    def encode(self, texts, normalize_embeddings: bool = True, **_):
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            out[i] = np.random.default_rng(zlib.crc32(t.encode("utf-8"))).standard_normal(self.dim)
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out
+
+
+def _unit_vecs(n: int, seed: int) -> np.ndarray:
+    v = np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+# ---------- 케이스 ----------
+def bench_ranker(sizes: List[int], opts: Dict) -> Dict[str, Dict]:
+    from app.core.ranker import BookColumns, rerank, rerank_batch, rerank_metadata
+
+    out = {}
+    for n in sizes:
+        books = make_books(n)
+        bvecs = _unit_vecs(n, seed=0)
+        q = _unit_vecs(1, seed=1)[0]
+        qs = _unit_vecs(32, seed=2)
+        cols = BookColumns(books)
+        out[f"ranker.rerank[n={n}]"] = measure(lambda: rerank(q, books, bvecs, CONS), **opts)
+        out[f"ranker.rerank_metadata[n={n}]"] = measure(lambda: rerank_metadata(books, CONS), **opts)
+        out[f"ranker.rerank_batch[q=32,n={n}]"] = measure(lambda: rerank_batch(qs, cols, bvecs, CONS), **opts)
+    return out
+
+
+def bench_lexical(sizes: List[int], opts: Dict) -> Dict[str, Dict]:
+    from app.services.lexical_index import LexicalIndex
+
+    out = {}
+    for n in sizes:
+        books = make_books(n)
+        index = LexicalIndex()
+        index.add_books(books)
+        out[f"lexical.search[n={n}]"] = measure(lambda: index.search(ANSWERS[4], 200), **opts)
+        out[f"lexical.scores_for[n={n}]"] = measure(lambda: index.scores_for(ANSWERS[4], books[:200]), **opts)
+    out["lexical.build[n=1000]"] = measure(lambda: LexicalIndex().add_books(make_books(1000)), **opts)
+    return out
+
+
+def bench_interview(sizes: List[int], opts: Dict) -> Dict[str, Dict]:
+    from app.core.interview import _extract_negatives, parse_answer
+
+    def _negatives():
+        for a in ANSWERS:
+            _extract_negatives(a)
+
+    def _interview():
+        cons, narr = {}, ""
+        cons, narr, _ = parse_answer(ANSWERS[4], cons, narr, qid="Q1_SQUIN")
+        cons, narr, _ = parse_answer("", cons, narr, qid="Q2_LENGTH", structured={"length": "짧음(~200쪽)"})
+        cons, narr, _ = parse_answer("", cons, narr, qid="Q3_RECENCY",
+                                     structured={"recency": ["비교적 최근(3년 이내)"]})
+        cons, narr, _ = parse_answer("", cons, narr, qid="Q5_GENRE", genre_selector=["소설", "에세이"])
+        cons, narr, _ = parse_answer(ANSWERS[1], cons, narr, qid="Q7_NEG")
+        parse_answer("위로, 일상", cons, narr, qid="Q8_END")
+
+    return {
+        f"interview._extract_negatives[x{len(ANSWERS)}]": measure(_negatives, **opts),
+        "interview.parse_answer[Q7_NEG]": measure(lambda: parse_answer(ANSWERS[3], {}, "", qid="Q7_NEG"), **opts),
+        "interview.parse_answer[full]": measure(_interview, **opts),
+    }
+
+
+def _embed_cases(label: str, batches: List[int], opts: Dict) -> Dict[str, Dict]:
+    from app.core import nlp
+    from app.services.embedding_store import book_text
+
+    books = make_books(max(batches), seed=3)
+    texts = [book_text(b) for b in books]
+    return {
+        f"embed.{label}[batch={b}]": measure(lambda b=b: nlp.embed_texts(texts[:b], provider="sbert"), **opts)
+        for b in batches
+    }
+
+
+def bench_embed(sizes: List[int], opts: Dict, *, sbert: bool = False) -> Dict[str, Dict]:
+    from app.core import nlp
+
+    batches = [1, 32, 256]
+    saved = nlp._sbert_model
+    nlp._sbert_model = FakeEncoder()
+    try:
+        out = _embed_cases("fake", batches, opts)
+    finally:
+        nlp._sbert_model = saved
+    if sbert:
+        try:
+            nlp._get_sbert()
+        except RuntimeError as e:
+            print(f"skip real SBERT: {e}", file=sys.stderr)
+        else:
+            # 실제 모델은 느리므로 반복 횟수를 줄임
+            out.update(_embed_cases("sbert", batches, {**opts, "max_iters": min(opts["max_iters"], 50)}))
+    return out
+
+
+async def _bench_aladin(opts: Dict) -> Dict[str, Dict]:
+    import httpx
+    from app.services.aladin import AladinClient
+    from app.services.cache import ResponseCache
+
+    payload = json.dumps({"totalResults": 50, "item": make_books(50, seed=4)}, ensure_ascii=False).encode("utf-8")
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=payload, headers={"content-type": "application/json"})
+
+    base = "http://aladin.test/ttb/api/"
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as http:
+        # 가짜 전송이므로 속도 제한/쿼터를 거치지 않음 (클라이언트·캐시·single-flight 비용만 측정)
+        raw = AladinClient(api_key="bench", base=base, http=http, use_cache=False, use_guard=False)
+        cached = AladinClient(api_key="bench", base=base, http=http, cache=ResponseCache(), use_guard=False)
+
+        async def _fanout():
+            await asyncio.gather(*[raw.item_search(f"질의 {i}", category_id=i) for i in range(16)])
+
+        return {
+            "aladin.item_list[no-cache]": await ameasure(lambda: raw.item_list(category_id=1), **opts),
+            "aladin.item_list[cache-hit]": await ameasure(lambda: cached.item_list(category_id=1), **opts),
+            "aladin.item_search[gather=16]": await ameasure(_fanout, **opts),
+        }
+
+
+def bench_aladin(sizes: List[int], opts: Dict) -> Dict[str, Dict]:
+    return asyncio.run(_bench_aladin(opts))
+
+
+GROUPS = {
+    "ranker": bench_ranker, "interview": bench_interview, "embed": bench_embed, "aladin": bench_aladin,
+    "lexical": bench_lexical,
+}
+
+
+# ---------- 저장/비교 ----------
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _meta() -> Dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": _git_rev(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[Dict]:
+    rows = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = cur["p50_ms"] / base["p50_ms"] if base["p50_ms"] else float("inf")
+        verdict = "regressed" if ratio > 1 + threshold else "improved" if ratio < 1 - threshold else "same"
+        rows.append({"name": name, "base_p50_ms": base["p50_ms"], "p50_ms": cur["p50_ms"],
+                     "ratio": round(ratio, 3), "verdict": verdict})
+    return rows
+
+
+def _print_results(results: Dict[str, Dict]) -> None:
+    print(f"{'case':<40} {'ops/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak KiB':>10}")
+    for name, r in results.items():
+        print(f"{name:<40} {r['ops_per_s']:>12.1f} {r['p50_ms']:>10.3f} {r['p99_ms']:>10.3f} {r['peak_kib']:>10.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Offline microbenchmarks")
+    ap.add_argument("--only", nargs="+", choices=sorted(GROUPS), default=None)
+    ap.add_argument("--sizes", nargs="+", type=int, default=[50, 1000, 10000], help="ranker 후보 수")
+    ap.add_argument("--min-time", type=float, default=0.5, help="케이스별 최소 측정 시간(초)")
+    ap.add_argument("--max-iters", type=int, default=2000)
+    ap.add_argument("--sbert", action="store_true", help="실제 SBERT 모델도 측정 (모델 다운로드 필요)")
+    ap.add_argument("--out", default=None, help="결과 JSON 경로")
+    ap.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    ap.add_argument("--threshold", type=float, default=0.10, help="p50 변화 허용 비율")
+    ap.add_argument("--fail-on-regression", action="store_true")
+    args = ap.parse_args(argv)
+
+    opts = {"min_time": args.min_time, "max_iters": args.max_iters}
+    results: Dict[str, Dict] = {}
+    for name in args.only or list(GROUPS):
+        if name == "embed":
+            results.update(bench_embed(args.sizes, opts, sbert=args.sbert))
+        else:
+            results.update(GROUPS[name](args.sizes, opts))
+    _print_results(results)
+
+    report = {"meta": _meta(), "results": results}
+    regressed = False
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        rows = compare(results, base.get("results", {}), args.threshold)
+        report["comparison"] = {"baseline": base.get("meta"), "threshold": args.threshold, "rows": rows}
+        print(f"\nvs {args.baseline} (git {base.get('meta', {}).get('git')})")
+        for r in rows:
+            print(f"{r['name']:<40} {r['base_p50_ms']:>10.3f} -> {r['p50_ms']:>10.3f} ms  x{r['ratio']:<6} {r['verdict']}")
+        regressed = any(r["verdict"] == "regressed" for r in rows)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+공통 테스트 설정
+- app.config는 import 시점에 환경변수를 읽으므로 앱 모듈보다 먼저 기본값을 지정
+- 기본은 DB/워밍업/외부 호출 없이 (필요한 테스트가 settings 속성을 monkeypatch)
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.update({
+    "ALADIN_TTB_KEY": "test-key",
+    "EMBEDDING_DB": "",
+    "CATALOGUE_DB": "",
+    "SESSION_DB": "",
+    "ALADIN_CACHE_DB": "",
+    "EMBEDDING_WARMUP": "0",
+    "VECTOR_INDEX_ON_STARTUP": "0",
+    "ALADIN_RATE_PER_S": "1000",
+    "ALADIN_RATE_BURST": "1000",
+})
+
+import zlib  # noqa: E402
+from typing import Callable, Dict, List, Optional  # noqa: E402
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+
+class FakeEncoder:
+    """SentenceTransformer 대역: 어절 해시 bag-of-words (결정적, 정규화)"""
+
+    dim = 64
+
+    def __init__(self):
+        self.calls: List[int] = []
+
+    def encode(self, texts, normalize_embeddings=True, **kw):
+        self.calls.append(len(texts))
+        out = np.zeros((len(texts), self.dim), np.float32)
+        for i, t in enumerate(texts):
+            for w in t.split():
+                out[i, zlib.crc32(w.encode()) % self.dim] += 1
+        return out / np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-9)
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    from app.core import nlp
+    enc = FakeEncoder()
+    monkeypatch.setattr(nlp, "_sbert_model", enc)
+    return enc
+
+
+def aladin_books(req: httpx.Request, n: int = 50) -> Dict:
+    """알라딘 ItemSearch/ItemList 응답 흉내: (카테고리, start)별로 다른 도서"""
+    cat = int(req.url.params.get("CategoryId") or 0)
+    start = int(req.url.params.get("Start") or 1)
+    base = (cat % 1000) * 100000 + start * 1000
+    return {"item": [{
+        "itemId": base + i, "isbn13": str(9790000000000 + base + i), "title": f"책 {base + i}",
+        "description": f"따뜻한 위로 일상 {i} " + "이야기 " * (i % 30),
+        "categoryName": "국내도서>소설/시/희곡>한국소설", "pubDate": f"{2000 + i % 25}-01-01",
+        "customerReviewRank": i % 10, "salesPoint": i * 100, "subInfo": {"itemPage": 100 + i * 7},
+    } for i in range(n)]}
+
+
+def settle(timeout: float = 10.0) -> None:
+    """요청 뒤 백그라운드 작업(카탈로그 적재·색인)이 끝날 때까지 대기"""
+    import time
+
+    from app import main
+    end = time.monotonic() + timeout
+    while main._background and time.monotonic() < end:
+        time.sleep(0.01)
+    assert not main._background, "background tasks still running"
+
+
+@pytest.fixture
+def api(monkeypatch, encoder):
+    """
+    앱 + 가짜 알라딘(MockTransport) + 가짜 인코더. 싱글턴 저장소는 테스트마다 새로 만듦.
+    make(handler=..., **settings) → TestClient
+    """
+    from fastapi.testclient import TestClient
+
+    from app import main
+    from app.config import settings
+    from app.services import (aladin, aladin_guard, cache, catalogue, embedding_store, lexical_index,
+                              semantic_cache, sessions)
+
+    clients = []
+
+    def make(handler: Optional[Callable] = None, **overrides) -> TestClient:
+        for k, v in overrides.items():
+            monkeypatch.setattr(settings, k, v)
+        for mod, name in ((sessions, "_sessions"), (catalogue, "_catalogue"), (embedding_store, "_store"),
+                          (cache, "_cache"), (lexical_index, "_lexical"), (aladin, "_client"),
+                          (aladin_guard, "_guard"), (semantic_cache, "_semantic")):
+            monkeypatch.setattr(mod, name, None)
+        monkeypatch.setattr(aladin, "_key_clients", type(aladin._key_clients)())
+        main._prefetch.clear()
+        client = TestClient(main.create_app())
+        client.__enter__()
+        aladin._http = httpx.AsyncClient(transport=httpx.MockTransport(
+            handler or (lambda req: httpx.Response(200, json=aladin_books(req)))))
+        clients.append(client)
+        return client
+
+    yield make
+    for c in clients:
+        c.__exit__(None, None, None)
@@ -0,0 +1,173 @@
+"""알라딘 호출 보호: 토큰 버킷 보충·우선순위, 쿼터 예약분, 서킷 브레이커 상태 전이"""
+import asyncio
+
+import pytest
+
+from app.services import aladin_guard
+from app.services.aladin_guard import (BACKGROUND, INTERACTIVE, CircuitBreaker, DailyQuota, GuardRejected,
+                                       QuotaStore, TokenBucket)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    # time 모듈 전체가 아니라 aladin_guard가 보는 time.monotonic만 교체 (이벤트 루프 시계는 그대로)
+    fake = type("time", (), {"monotonic": staticmethod(c), "strftime": staticmethod(aladin_guard.time.strftime)})
+    monkeypatch.setattr(aladin_guard, "time", fake)
+    return c
+
+
+def test_bucket_refills_at_rate_up_to_burst(clock):
+    bucket = TokenBucket(rate=4, burst=2)
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire(max_wait=0)
+
+    asyncio.run(take(2))
+    assert bucket.tokens == 0
+    clock.now += 0.25  # 1개 보충
+    bucket._refill()
+    assert bucket.tokens == pytest.approx(1)
+    clock.now += 10  # 버스트 이상은 쌓이지 않음
+    bucket._refill()
+    assert bucket.tokens == 2
+
+
+def test_bucket_rate_is_split_across_workers(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "ALADIN_RATE_PER_S", 10)
+    monkeypatch.setattr(settings, "ALADIN_RATE_BURST", 20)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    bucket = aladin_guard.AladinGuard().bucket("k")
+    assert (bucket.rate, bucket.burst) == (2.5, 5)
+
+
+def test_bucket_rejects_after_max_wait():
+    async def run():
+        bucket = TokenBucket(rate=1, burst=1)
+        await bucket.acquire()
+        with pytest.raises(GuardRejected) as e:
+            await bucket.acquire(max_wait=0.05)
+        assert e.value.reason == "rate_limited" and bucket.queued() == 0
+
+    asyncio.run(run())
+
+
+def test_interactive_waiters_get_tokens_before_background():
+    async def run():
+        bucket = TokenBucket(rate=50, burst=1)
+        await bucket.acquire()  # 버킷을 비워 모두 대기열로
+        order = []
+
+        async def call(name, priority):
+            await bucket.acquire(priority)
+            order.append(name)
+
+        tasks = [asyncio.create_task(call(f"bg{i}", BACKGROUND)) for i in range(3)]
+        await asyncio.sleep(0)  # background가 먼저 줄을 섬
+        tasks += [asyncio.create_task(call(f"ui{i}", INTERACTIVE)) for i in range(2)]
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["ui0", "ui1", "bg0", "bg1", "bg2"]
+
+
+def test_quota_reserve_refuses_background_only():
+    async def run():
+        quota = DailyQuota(limit=10, reserve=3)
+        for _ in range(7):
+            await quota.take(BACKGROUND)
+        with pytest.raises(GuardRejected) as e:
+            await quota.take(BACKGROUND)
+        assert e.value.reason == "quota_exceeded"
+        # 남은 예약분은 interactive가 사용
+        for _ in range(3):
+            await quota.take(INTERACTIVE)
+        assert quota.remaining() == 0
+        with pytest.raises(GuardRejected):
+            await quota.take(INTERACTIVE)
+
+    asyncio.run(run())
+
+
+def _take_all(path: str, priority: int, n: int, q) -> None:
+    async def run():
+        store = QuotaStore(path)
+        quota = DailyQuota(limit=20, reserve=5, store=store, key_id="k")
+        taken = 0
+        for _ in range(n):
+            try:
+                await quota.take(priority)
+                taken += 1
+            except GuardRejected:
+                pass
+        await store.close()
+        return taken
+
+    q.put(asyncio.run(run()))
+
+
+def test_quota_is_shared_across_processes(tmp_path):
+    import multiprocessing as mp
+
+    path = str(tmp_path / "quota.db")
+    ctx = mp.get_context("fork")
+    q = ctx.Queue()
+    # 수집 프로세스 여러 개가 같은 DB로 예약분 직전까지만 사용
+    procs = [ctx.Process(target=_take_all, args=(path, BACKGROUND, 10, q)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    taken = [q.get(timeout=60) for _ in procs]
+    for p in procs:
+        p.join(60)
+    assert sum(taken) == 15
+    # 서버(다른 프로세스)는 공유 사용량을 보고 예약분만 사용
+    _take_all(path, INTERACTIVE, 10, q)
+    assert q.get(timeout=5) == 5
+
+
+def test_breaker_open_half_open_closed(clock):
+    br = CircuitBreaker(failures=2, reset_s=30)
+    assert br.allow() is False
+    br.failure()
+    assert br.state == "closed"
+    br.failure()
+    assert br.state == "open"
+    with pytest.raises(GuardRejected) as e:
+        br.allow()
+    assert e.value.reason == "breaker_open"
+
+    clock.now += 30
+    assert br.allow() is True and br.state == "half_open"
+    with pytest.raises(GuardRejected):  # 탐침은 한 건만
+        br.allow()
+    br.success()
+    assert br.state == "closed" and br.allow() is False
+    assert br.counters == {"opened": 1, "rejected": 2, "probes": 1}
+
+
+def test_breaker_failed_probe_reopens(clock):
+    br = CircuitBreaker(failures=3, reset_s=10)
+    for _ in range(3):
+        br.failure()
+    clock.now += 10
+    assert br.allow() is True
+    br.failure()  # 탐침 실패는 한 번으로 다시 open
+    assert br.state == "open" and br.opened_at == clock.now
+    with pytest.raises(GuardRejected):
+        br.allow()
+    # 판정 없이 끝난 탐침(취소)은 다음 호출이 다시 탐침
+    clock.now += 10
+    assert br.allow() is True
+    br.release()
+    assert br.allow() is True
@@ -0,0 +1,41 @@
+"""카탈로그 + 저장된 임베딩으로 인덱스 입력 구성"""
+import asyncio
+
+import numpy as np
+
+from app.services.catalogue import Catalogue
+from app.services.embedding_store import EmbeddingStore, book_key, book_text, text_hash
+
+
+def _book(i: int, desc: str):
+    return {"itemId": i, "isbn13": f"979{i:010d}", "title": f"책 {i}", "description": desc,
+            "categoryName": "국내도서>에세이"}
+
+
+def test_load_with_embeddings_skips_stale_text(tmp_path):
+    db = str(tmp_path / "squin.db")
+    cat, store = Catalogue(db, db), EmbeddingStore(db)
+    old = [_book(i, f"처음 설명 {i}") for i in range(1, 4)]
+    vec = {i: np.full(4, i, dtype=np.float32) for i in range(1, 6)}
+
+    async def run():
+        await cat.upsert_books(old)
+        await store.put_many([(book_key(b), text_hash(book_text(b)), vec[b["itemId"]]) for b in old],
+                             provider="sbert", model="m")
+        # 2번 설명이 바뀜 → 새 텍스트로는 아직 임베딩 없음
+        await cat.upsert_books([_book(2, "바뀐 설명")])
+        before = await cat.load_with_embeddings(provider="sbert", model="m")
+        new = _book(2, "바뀐 설명")
+        await store.put_many([(book_key(new), text_hash(book_text(new)), vec[5])], provider="sbert", model="m")
+        after = await cat.load_with_embeddings(provider="sbert", model="m")
+        other = await cat.load_with_embeddings(provider="openai", model="m")
+        await cat.close()
+        await store.close()
+        return before, after, other
+
+    (b1, v1), (b2, v2), (b3, _) = asyncio.run(run())
+    assert [b["itemId"] for b in b1] == [1, 3]
+    np.testing.assert_array_equal(v1[:, 0], [1, 3])
+    assert [b["itemId"] for b in b2] == [1, 2, 3]
+    np.testing.assert_array_equal(v2[:, 0], [1, 5, 3])
+    assert b3 == []
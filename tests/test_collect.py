@@ -0,0 +1,29 @@
+"""후보 수집 단계: 카탈로그 적재·색인은 deadline 밖 백그라운드에서"""
+import asyncio
+import time
+
+from conftest import settle
+
+
+def test_slow_catalogue_write_does_not_hit_collect_deadline(api, tmp_path, monkeypatch):
+    from app.services import catalogue
+    from app.services.catalogue import get_catalogue
+    from app.services.lexical_index import get_lexical_index
+
+    upsert = catalogue.Catalogue.upsert_books
+
+    async def slow_upsert(self, books, category_id=None):
+        await asyncio.sleep(1.5)  # 잠긴 DB에서 busy_timeout 대기 흉내
+        return await upsert(self, books, category_id=category_id)
+
+    monkeypatch.setattr(catalogue.Catalogue, "upsert_books", slow_upsert)
+    client = api(CATALOGUE_DB=str(tmp_path / "c.db"), COLLECT_DEADLINE_S=0.5, PREFILTER_TOP_N=20)
+    t = time.perf_counter()
+    r = client.post("/recommend", json={"message": "따뜻한 위로 일상 이야기"})
+    assert r.status_code == 200, r.text
+    assert r.json()["items"]
+    assert time.perf_counter() - t < 1.5
+    # 응답 뒤에도 적재는 끝까지 진행
+    settle()
+    books = client.portal.call(get_catalogue().load_books)
+    assert len(books) == 50 and len(get_lexical_index()) == 50
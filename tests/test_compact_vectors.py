@@ -0,0 +1,131 @@
+"""압축(memmap) 벡터 저장소: float32 대비 recall, 모델 변경 시 재구축"""
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from app.services import catalogue, compact_vectors, vector_index
+from app.services.compact_vectors import CompactVectors, write
+from benchmarks.bench_compact import make_vectors, recall
+
+# 20k×768 군집 벡터, 질의 200개 기준 측정값: int8 0.981, float16 0.9995
+MIN_RECALL = {"int8": 0.97, "float16": 0.995}
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    x = make_vectors(20_000, 768)
+    qs = make_vectors(200, 768, seed=1)
+    s = qs @ x.T
+    top = np.argpartition(-s, 9, axis=1)[:, :10]
+    return x, qs, top
+
+
+@pytest.mark.parametrize("dtype", sorted(MIN_RECALL))
+def test_recall_at_10_vs_float32(corpus, tmp_path, dtype):
+    x, qs, exact = corpus
+    path = str(tmp_path / dtype)
+    write(path, [str(i) for i in range(len(x))], x, dtype=dtype)
+    store = CompactVectors(path)
+    got = np.stack([store.search(q, 10)[0] for q in qs])
+    assert recall(exact, got) >= MIN_RECALL[dtype]
+
+
+class _Catalogue:
+    def __init__(self, books):
+        self.books = books
+
+    async def load_books(self):
+        return self.books
+
+
+def test_load_compact_rebuilds_when_model_changes(tmp_path, monkeypatch):
+    from app.config import settings
+    from app.services.embedding_store import book_key
+
+    books = [{"aladin_id": i, "isbn13": f"979{i:010d}", "title": f"책 {i}", "category_id": 1}
+             for i in range(8)]
+    keys = [book_key(b) for b in books]
+    vecs = make_vectors(len(books), 16)
+    path = str(tmp_path / "vectors")
+    monkeypatch.setattr(settings, "VECTOR_STORE_DIR", path)
+    monkeypatch.setattr(catalogue, "get_catalogue", lambda: _Catalogue(books))
+
+    builds = []
+
+    async def build(out_dir, *, dtype="int8", provider=None, lock=True):
+        builds.append(provider)
+        write(out_dir, keys, vecs, dtype=dtype, provider=provider, model=f"{provider}-model-{len(builds)}",
+              lock=lock)
+        return len(keys)
+
+    monkeypatch.setattr(compact_vectors, "build_from_catalogue", build)
+
+    def load(prov, model):
+        return asyncio.run(vector_index._load_compact(prov, model))
+
+    # 저장소가 없으면 구축
+    idx = load("sbert", "sbert-model-1")
+    assert builds == ["sbert"] and len(idx) == len(books)
+    # 같은 provider/model이면 기존 파일을 그대로 사용
+    load("sbert", "sbert-model-1")
+    assert builds == ["sbert"]
+    # 모델이 바뀌면 재구축
+    load("sbert", "other-model")
+    assert builds == ["sbert", "sbert"]
+    # provider가 바뀌면 재구축
+    idx = load("openai", "openai-model-3")
+    assert builds == ["sbert", "sbert", "openai"]
+    meta = CompactVectors(path)
+    assert (meta.provider, meta.model) == ("openai", "openai-model-3")
+    assert sorted(os.listdir(tmp_path)) == ["vectors", "vectors.lock"]
+
+
+def _write_worker(path: str, seed: int) -> None:
+    x = make_vectors(500, 32, seed=seed)
+    write(path, [f"{seed}-{i}" for i in range(len(x))], x, provider="sbert", model=f"m{seed}")
+
+
+def test_concurrent_writes_from_processes(tmp_path):
+    import multiprocessing as mp
+
+    path = str(tmp_path / "vectors")
+    ctx = mp.get_context("fork")
+    procs = [ctx.Process(target=_write_worker, args=(path, i)) for i in range(6)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    assert [p.exitcode for p in procs] == [0] * 6
+    store = CompactVectors(path)
+    assert len(store) == 500 and store.keys[0] == f"{store.model[1:]}-0"
+    assert sorted(os.listdir(tmp_path)) == ["vectors", "vectors.lock"]
+
+
+def test_concurrent_load_compact_builds_once(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app.config import settings
+    from app.services.embedding_store import book_key
+
+    books = [{"aladin_id": i, "isbn13": f"979{i:010d}", "title": f"책 {i}", "category_id": 1}
+             for i in range(8)]
+    vecs = make_vectors(len(books), 16)
+    monkeypatch.setattr(settings, "VECTOR_STORE_DIR", str(tmp_path / "vectors"))
+    monkeypatch.setattr(catalogue, "get_catalogue", lambda: _Catalogue(books))
+    builds = []
+
+    async def build(out_dir, *, dtype="int8", provider=None, lock=True):
+        builds.append(provider)
+        await asyncio.sleep(0.2)  # 구축 중에 다른 워커가 모델 변경을 감지
+        write(out_dir, [book_key(b) for b in books], vecs, dtype=dtype, provider=provider, model="m",
+              lock=lock)
+        return len(books)
+
+    monkeypatch.setattr(compact_vectors, "build_from_catalogue", build)
+    # 워커 대신 스레드마다 별도 이벤트 루프 (flock은 파일 디스크립터 단위라 스레드 사이에서도 배타적)
+    with ThreadPoolExecutor(4) as pool:
+        idxs = list(pool.map(lambda _: asyncio.run(vector_index._load_compact("sbert", "m")), range(4)))
+    assert builds == ["sbert"]
+    assert all(len(i) == len(books) for i in idxs)
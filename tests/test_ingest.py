@@ -0,0 +1,169 @@
+"""app.ingest ↔ benchmarks.aladin_stub (ASGI 전송으로 네트워크 없이)"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.embed_worker import get_batcher
+from app.ingest import PAGE_SIZE, Checkpoint, Ingestor, RateLimiter
+from app.services import aladin_guard
+from app.services.aladin import AladinClient
+from app.services.catalogue import Catalogue
+from app.services.categories import GENRE_TO_CATEGORY
+from app.services.embedding_store import EmbeddingStore
+from benchmarks.aladin_stub import create_app
+
+N_CATS = len(GENRE_TO_CATEGORY)
+PER_CATEGORY = 120  # 50 + 50 + 20 → 카테고리마다 3페이지에서 소진
+
+
+@pytest.fixture(autouse=True)
+def fresh_guard(monkeypatch, encoder):
+    # 이전 실행에서 열린 서킷 브레이커/속도 제한 상태를 넘기지 않음
+    monkeypatch.setattr(aladin_guard, "_guard", None)
+
+
+def _ingest(stub, tmp_path, *, pages=4, rate=0.0, embed_batch=64, store_cls=EmbeddingStore):
+    db = str(tmp_path / "catalogue.db")
+    ckpt_path = str(tmp_path / "ckpt.json")
+
+    async def _run():
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub))
+        catalogue, store = Catalogue(db), store_cls(db)
+        ckpt = Checkpoint(ckpt_path)
+        cli = AladinClient(api_key="stub", base="http://stub/ttb/api/", http=http,
+                           use_cache=False, priority="background")
+        ing = Ingestor(cli, catalogue, store, ckpt, query_types=["Bestseller"], pages=pages,
+                       concurrency=4, rate=rate, embed_batch=embed_batch)
+        try:
+            stats = await ing.run()
+            books = await catalogue.load_books()
+            return stats, books
+        finally:
+            await get_batcher().stop()
+            await catalogue.close()
+            await store.close()
+            await http.aclose()
+
+    stats, books = asyncio.run(_run())
+    return stats, books, Checkpoint(ckpt_path)
+
+
+def _pages(ckpt: Checkpoint, cid: int):
+    return sorted(int(k.rsplit(":", 1)[1]) for k in ckpt.done if k.startswith(f"{cid}:Bestseller:"))
+
+
+def test_full_run_marks_pages_and_exhaustion(tmp_path, encoder):
+    stub = create_app(per_category=PER_CATEGORY)
+    stats, books, ckpt = _ingest(stub, tmp_path)
+    assert len(books) == PER_CATEGORY * N_CATS
+    assert stats["embedded"] == PER_CATEGORY * N_CATS
+    assert stats["calls"] == stub.state.requests == 3 * N_CATS
+    for cid in GENRE_TO_CATEGORY.values():
+        assert _pages(ckpt, cid) == [1, 2, 3]
+    assert ckpt.exhausted == {f"{cid}:Bestseller" for cid in GENRE_TO_CATEGORY.values()}
+
+
+def test_resume_from_checkpoint(tmp_path, encoder):
+    stub = create_app(per_category=PER_CATEGORY)
+    _, books, ckpt = _ingest(stub, tmp_path, pages=2)
+    assert len(books) == 2 * PAGE_SIZE * N_CATS
+    assert not ckpt.exhausted
+    first_calls = stub.state.requests
+
+    # 페이지 상한을 늘려 재실행: 끝난 1~2페이지는 건너뛰고 3페이지만 호출
+    stats, books, ckpt = _ingest(stub, tmp_path, pages=4)
+    assert stats["skipped_pages"] == 2 * N_CATS
+    assert stub.state.requests - first_calls == N_CATS
+    assert len(books) == PER_CATEGORY * N_CATS
+    assert len(ckpt.exhausted) == N_CATS
+
+    # 모두 소진 → 호출 없음
+    before = stub.state.requests
+    stats, _, _ = _ingest(stub, tmp_path, pages=4)
+    assert stub.state.requests == before and stats["calls"] == 0
+
+
+def test_pages_done_only_after_embeddings_flushed(tmp_path, encoder):
+    seen = []
+
+    class _Store(EmbeddingStore):
+        def __init__(self, db_path):
+            super().__init__(db_path)
+            self.ckpt = Checkpoint(str(tmp_path / "ckpt.json"))
+
+        async def embed_books(self, books, texts, **kw):
+            # flush 시점에 디스크의 체크포인트에는 이 배치의 페이지가 아직 없어야 함
+            done = Checkpoint(str(tmp_path / "ckpt.json")).done
+            seen.append((len(books), len(done)))
+            return await super().embed_books(books, texts, **kw)
+
+    stub = create_app(per_category=PER_CATEGORY)
+    _ingest(stub, tmp_path, embed_batch=200, store_cls=_Store)
+    assert seen and sum(n for n, _ in seen) == PER_CATEGORY * N_CATS
+    # 배치마다 직전까지 완료된 페이지 수만 기록돼 있음 (배치당 최소 200권 = 4페이지)
+    assert [d for _, d in seen] == sorted(d for _, d in seen)
+    assert seen[0][1] == 0
+
+
+def test_failed_embedding_leaves_pages_pending(tmp_path, encoder):
+    class _Broken(EmbeddingStore):
+        async def embed_books(self, books, texts, **kw):
+            raise RuntimeError("encoder down")
+
+    stub = create_app(per_category=PER_CATEGORY)
+    with pytest.raises(RuntimeError):
+        _ingest(stub, tmp_path, embed_batch=10 ** 6, store_cls=_Broken)
+    ckpt = Checkpoint(str(tmp_path / "ckpt.json"))
+    assert not ckpt.done and not ckpt.exhausted
+
+    # 다음 실행에서 모든 페이지를 다시 수집·임베딩
+    stats, books, ckpt = _ingest(stub, tmp_path)
+    assert stats["skipped_pages"] == 0
+    assert stats["embedded"] == PER_CATEGORY * N_CATS
+    assert len(ckpt.exhausted) == N_CATS
+
+
+def test_transient_errors_stop_pair_and_retry_next_run(tmp_path, encoder, monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "ALADIN_BREAKER_FAILURES", 1000)
+    flaky = create_app(per_category=PER_CATEGORY, error_every=4)
+    stats, _, ckpt = _ingest(flaky, tmp_path)
+    assert stats["errors"] > 0
+    for cid in GENRE_TO_CATEGORY.values():
+        done = _pages(ckpt, cid)
+        # 실패한 페이지 뒤로는 진행하지 않음 → 완료 페이지는 항상 1부터 연속
+        assert done == list(range(1, len(done) + 1))
+        if f"{cid}:Bestseller" in ckpt.exhausted:
+            assert done == [1, 2, 3]
+    assert len(ckpt.exhausted) < N_CATS
+
+    healthy = create_app(per_category=PER_CATEGORY)
+    stats, books, ckpt = _ingest(healthy, tmp_path)
+    assert stats["errors"] == 0
+    assert len(books) == PER_CATEGORY * N_CATS
+    assert len(ckpt.exhausted) == N_CATS
+
+
+def test_rate_limit_spaces_calls(tmp_path, encoder):
+    stub = create_app(per_category=PER_CATEGORY)
+    t = time.perf_counter()
+    stats, _, _ = _ingest(stub, tmp_path, rate=100.0)
+    elapsed = time.perf_counter() - t
+    assert elapsed >= (stats["calls"] - 1) / 100.0 * 0.95
+
+
+def test_rate_limiter_interval():
+    async def _run():
+        lim = RateLimiter(50.0)
+        loop = asyncio.get_running_loop()
+        stamps = []
+        for _ in range(6):
+            await lim.wait()
+            stamps.append(loop.time())
+        return stamps
+
+    stamps = asyncio.run(_run())
+    # 각 호출 시각은 흔들려도 예약은 누적 간격 기준
+    assert stamps[-1] - stamps[0] >= 5 * 0.02 * 0.95
@@ -0,0 +1,144 @@
+"""BM25 어휘 색인: 후보만 채점, 스레드에서 검색하는 동안 갱신"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import numpy as np
+
+from app.services.embedding_store import book_key
+from app.services.lexical_index import LexicalIndex, _decode_varints, _varint, tokenize
+from benchmarks.fixtures import make_realistic_books
+from conftest import aladin_books, settle
+
+QUERY = "따뜻한 위로가 필요한 하루 일상 이야기"
+
+
+def _books(n: int, start: int = 0):
+    return [{**b, "isbn13": str(9790000000000 + i), "categoryId": 1 + i % 5}
+            for i, b in enumerate(make_realistic_books(n), start)]
+
+
+def test_candidate_scores_match_full_bm25():
+    books = _books(3000)
+    index = LexicalIndex()
+    index.add_books(books)
+    # 내용 변경(tombstone)이 섞인 상태에서도 동일
+    index.add_books([{**b, "description": "새로운 일상 이야기"} for b in books[:100]])
+    full = index._snapshot().bm25(tokenize(QUERY))
+    rng = np.random.default_rng(0)
+    cand = [books[i] for i in rng.choice(len(books), 200, replace=False)] + [{"isbn13": "not-indexed"}]
+    got = index.scores_for(QUERY, cand)
+    want = [full[index._doc_of[book_key(b)]] if book_key(b) in index._doc_of else 0.0 for b in cand]
+    np.testing.assert_allclose(got, want, rtol=1e-5)
+    assert got[-1] == 0
+
+    # 여러 질의를 한 번에: 질의별 scores_for와 같음
+    queries = [QUERY, "추리 스릴러", "없는단어", ""]
+    mat = index.candidates(cand).scores(queries)
+    assert mat.shape == (len(queries), len(cand))
+    for q, row in zip(queries, mat):
+        np.testing.assert_allclose(row, index.scores_for(q, cand), rtol=1e-6)
+
+
+def test_search_top_k_is_stable_prefix():
+    index = LexicalIndex()
+    index.add_books(_books(2000))
+    books, scores = index.search(QUERY, 10_000)
+    assert np.all(np.diff(scores) <= 0)
+    for k in (1, 7, 50):
+        top, s = index.search(QUERY, k)
+        assert [book_key(b) for b in top] == [book_key(b) for b in books[:k]]
+        np.testing.assert_array_equal(s, scores[:k])
+
+
+def test_decode_ignores_partial_trailing_varint():
+    buf = bytearray()
+    for v in (3, 300, 70000):
+        _varint(v, buf)
+    assert _decode_varints(bytes(buf)).tolist() == [3, 300, 70000]
+    assert _decode_varints(bytes(buf[:-1])).tolist() == [3, 300]
+
+
+def test_search_in_threads_while_adding_books():
+    index = LexicalIndex()
+    index.add_books(_books(2000))
+    cand = _books(200)
+
+    def read(_):
+        books, _scores = index.search(QUERY, 20, exclude_terms=["살인"])
+        return len(books), index.scores_for(QUERY, cand).shape
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(read, i) for i in range(200)]
+        # 검색 스레드와 겹치게 새 도서 추가·기존 도서 변경·압축 재구성
+        for s in range(0, 2000, 100):
+            index.add_books(_books(100, 2000 + s))
+            index.add_books([{**b, "description": f"바뀐 설명 {s}"} for b in _books(100, s)])
+            if s % 500 == 0:
+                index.compact()
+        assert all(f.result() == (20, (200,)) for f in futures)
+    assert index.counters["compactions"] == 4 and len(index) == 4000
+
+
+def test_reload_keeps_books_added_from_requests(monkeypatch):
+    import asyncio
+
+    from app.services import catalogue, lexical_index
+
+    class _Catalogue:
+        async def load_books(self):
+            return _books(300)
+
+    monkeypatch.setattr(catalogue, "get_catalogue", lambda: _Catalogue())
+    monkeypatch.setattr(lexical_index, "_lexical", None)
+    # 요청 경로(실행기 스레드)에서 먼저 쌓인 도서는 카탈로그로 다시 구축한 색인에도 남음
+    assert lexical_index.index_books(_books(50, 1000)) == 50
+    index = asyncio.run(lexical_index.load_lexical_index())
+    assert lexical_index.get_lexical_index() is index and len(index) == 350
+
+
+def test_recommend_lexical_retrieval(api):
+    calls = []
+
+    def handler(req):
+        calls.append(req.url.path)
+        return httpx.Response(200, json=aladin_books(req))
+
+    client = api(handler, PREFILTER_TOP_N=20)
+    body = {"message": "따뜻한 위로 일상 이야기"}
+    r = client.post("/recommend", json=body)
+    assert r.status_code == 200 and r.json()["items"], r.text
+    settle()
+    seen = len(calls)
+    # 색인에 쌓인 도서에서 후보 추출: 알라딘 호출 없이 BM25 + 의미 점수로 재정렬
+    r = client.post("/recommend", json={**body, "retrieval": "lexical", "retrieval_k": 30})
+    assert r.status_code == 200, r.text
+    assert r.json()["items"] and len(calls) == seen
+    assert "retrieve" in r.headers["server-timing"]
+
+
+def test_batch_lexical_scores_per_chunk(api, monkeypatch):
+    from app import main
+    from app.services.lexical_index import get_lexical_index
+
+    seen = []
+    rerank_batch = main.rerank_batch
+
+    def spy(qvecs, cols, bvecs, constraints, *, topk, lexical):
+        seen.append((cols.books, lexical))
+        return rerank_batch(qvecs, cols, bvecs, constraints, topk=topk, lexical=lexical)
+
+    monkeypatch.setattr(main, "rerank_batch", spy)
+    client = api(BATCH_CHUNK_SIZE=3)
+    client.post("/recommend", json={"message": "따뜻한 위로 일상 이야기"})  # 색인 채우기
+    settle()
+    messages = ["따뜻한 위로", "일상 이야기", "없는단어", "위로 이야기 일상", "따뜻한"]
+    r = client.post("/recommend/batch", json={"profiles": [{"id": str(i), "message": m} for i, m in enumerate(messages)]})
+    assert r.status_code == 200, r.text
+    assert sorted(json.loads(line)["id"] for line in r.text.splitlines()) == ["0", "1", "2", "3", "4"]
+    # chunk(3)마다 한 번, 프로필별 scores_for와 같은 행렬
+    assert [lex.shape[0] for _, lex in seen] == [3, 2]
+    lex = get_lexical_index()
+    want = np.stack([lex.scores_for(m, seen[0][0]) for m in messages])
+    np.testing.assert_allclose(np.concatenate([m for _, m in seen]), want, rtol=1e-6)
+    assert want[:2].any()
@@ -0,0 +1,54 @@
+"""
+ONNX Runtime 인코더 ↔ sentence-transformers 코사인 일치도
+onnxruntime/sentence-transformers가 없거나 내보낸 모델(ONNX_MODEL_DIR)이 없으면 건너뜀
+
+    python -m app.core.onnx_encoder --out models/kr-sbert-onnx && pytest tests/test_onnx_parity.py
+"""
+import os
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.core.onnx_encoder import CONFIG_FILE
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+if not os.path.exists(os.path.join(settings.ONNX_MODEL_DIR, CONFIG_FILE)):
+    pytest.skip(f"no exported ONNX model in {settings.ONNX_MODEL_DIR}", allow_module_level=True)
+
+# int8 동적 양자화 기준 (fp32는 0.999 이상이 정상)
+MIN_COS = float(os.getenv("ONNX_PARITY_MIN_COS", 0.98))
+
+
+@pytest.fixture(scope="module")
+def encoders():
+    from sentence_transformers import SentenceTransformer
+
+    from app.core.nlp import SBERT_MODEL
+    from app.core.onnx_encoder import OnnxEncoder
+    st = SentenceTransformer(SBERT_MODEL, device="cpu")
+    onnx = OnnxEncoder(settings.ONNX_MODEL_DIR, quantized=settings.ONNX_QUANTIZED)
+    return st, onnx
+
+
+def test_cosine_parity(encoders):
+    from benchmarks.bench_onnx import make_texts
+    st, onnx = encoders
+    texts = make_texts(128)
+    ref = np.asarray(st.encode(texts, normalize_embeddings=True), dtype=np.float32)
+    got = onnx.encode(texts)
+    assert got.shape == ref.shape
+    cos = (ref * got).sum(axis=1)
+    assert cos.min() >= MIN_COS, f"min cosine {cos.min():.5f} (mean {cos.mean():.5f}, {onnx.model_path})"
+
+
+def test_nearest_neighbours_agree(encoders):
+    from benchmarks.bench_onnx import make_texts
+    st, onnx = encoders
+    texts = make_texts(128, seed=1)
+    ref = np.asarray(st.encode(texts, normalize_embeddings=True), dtype=np.float32)
+    got = onnx.encode(texts)
+    nn_ref = np.argsort(-(ref @ ref.T), axis=1)[:, 1]
+    nn_got = np.argsort(-(got @ got.T), axis=1)[:, 1]
+    assert (nn_ref == nn_got).mean() >= 0.9
@@ -0,0 +1,161 @@
+"""app.core.openai_embed ↔ benchmarks.openai_stub (ASGI 전송으로 네트워크 없이)"""
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+
+pytest.importorskip("openai")
+
+from app.config import settings
+from app.core import openai_embed
+from app.core.openai_embed import aembed, chunk_texts, estimate_tokens
+from benchmarks.openai_stub import create_app, stub_vector
+
+MODEL = "text-embedding-3-large"
+
+
+def _client(stub):
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key="stub", base_url="http://stub/v1", max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=stub)),
+    )
+
+
+def _embed(stub, texts, **kw):
+    async def _run():
+        client = _client(stub)
+        try:
+            return await aembed(texts, model=MODEL, client=client, **kw)
+        finally:
+            await client.close()
+    return asyncio.run(_run())
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """재시도 대기 시간 기록 (실제로는 기다리지 않음)"""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def _sleep(delay, *args, **kw):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(openai_embed.asyncio, "sleep", _sleep)
+    return delays
+
+
+def test_chunk_by_items_keeps_order():
+    texts = [f"t{i}" for i in range(10)]
+    chunks = chunk_texts(texts, max_items=4, max_tokens=10 ** 6)
+    assert chunks == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+def test_chunk_by_tokens():
+    texts = ["가" * 10, "나" * 10, "다" * 10, "라" * 40]  # 5, 5, 5, 20 토큰 (textprep 근사)
+    assert [estimate_tokens(t) for t in texts] == [5, 5, 5, 20]
+    chunks = chunk_texts(texts, max_items=100, max_tokens=11)
+    # 예산을 넘는 단일 텍스트도 자기 청크로 보냄
+    assert chunks == [[0, 1], [2], [3]]
+
+
+def test_order_preserved_across_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_EMBED_MAX_ITEMS", 3)
+    monkeypatch.setattr(settings, "OPENAI_EMBED_CONCURRENCY", 4)
+    stub = create_app(latency_ms=5)
+    texts = [f"문장 {i} " * (1 + i % 4) for i in range(11)]
+    vecs = _embed(stub, texts, dimensions=64)
+    assert stub.state.batch_sizes and sorted(stub.state.batch_sizes) == [2, 3, 3, 3]
+    expected = np.array([stub_vector(t, 64) for t in texts], dtype=np.float32)
+    np.testing.assert_allclose(vecs, expected, atol=1e-5)
+
+
+def test_dimensions_passed_and_normalised():
+    stub = create_app()
+    vecs = _embed(stub, ["a", "b"], dimensions=256)
+    assert vecs.shape == (2, 256)
+    np.testing.assert_allclose(np.linalg.norm(vecs, axis=1), 1.0, atol=1e-5)
+    full = _embed(stub, ["a"])
+    assert full.shape == (1, 3072)
+
+
+def test_429_honours_retry_after(monkeypatch, sleeps):
+    monkeypatch.setattr(settings, "OPENAI_EMBED_MAX_ITEMS", 2)
+    monkeypatch.setattr(settings, "OPENAI_EMBED_CONCURRENCY", 1)
+    stub = create_app(fail_every=2)  # 2, 4번째 요청이 429 (retry-after: 0.01)
+    texts = [f"t{i}" for i in range(6)]
+    vecs = _embed(stub, texts, dimensions=32)
+    assert sleeps == [0.01, 0.01]
+    assert stub.state.requests == 5
+    np.testing.assert_allclose(vecs[5], stub_vector("t5", 32), atol=1e-5)
+
+
+def test_5xx_exponential_backoff(monkeypatch, sleeps):
+    monkeypatch.setattr(settings, "OPENAI_BACKOFF_BASE", 0.5)
+    monkeypatch.setattr(settings, "OPENAI_BACKOFF_MAX", 1.0)
+    monkeypatch.setattr(openai_embed.random, "uniform", lambda a, b: 1.0)
+    calls = {"n": 0}
+    app = create_app()
+
+    async def flaky(scope, receive, send):
+        # 처음 세 번은 503 (Retry-After 없음) → 0.5, 1.0, 1.0(상한) 대기 후 성공
+        if scope["type"] == "http":
+            calls["n"] += 1
+            if calls["n"] <= 3:
+                resp = httpx.Response(503, json={"error": {"message": "unavailable"}})
+                await send({"type": "http.response.start", "status": 503,
+                            "headers": [(b"content-type", b"application/json")]})
+                await send({"type": "http.response.body", "body": resp.content})
+                return
+        await app(scope, receive, send)
+
+    vecs = _embed(flaky, ["x"], dimensions=8)
+    assert sleeps == [0.5, 1.0, 1.0]
+    assert vecs.shape == (1, 8)
+
+
+def test_gives_up_after_max_retries(monkeypatch, sleeps):
+    import openai
+    monkeypatch.setattr(settings, "OPENAI_MAX_RETRIES", 2)
+    stub = create_app(fail_every=1)
+    with pytest.raises(openai.RateLimitError):
+        _embed(stub, ["x"])
+    assert len(sleeps) == 2
+    assert stub.state.requests == 3
+
+
+def test_evicted_clients_are_closed(monkeypatch):
+    from openai import AsyncOpenAI
+
+    monkeypatch.setattr(settings, "OPENAI_CLIENTS_MAX", 1)
+    monkeypatch.setattr(openai_embed, "_clients", type(openai_embed._clients)())
+    stub = create_app(latency_ms=20)
+    made = []
+
+    def new_client(api_key):
+        cli = AsyncOpenAI(api_key=api_key, base_url="http://stub/v1", max_retries=0,
+                          http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=stub)))
+        made.append(cli)
+        return cli
+
+    monkeypatch.setattr(openai_embed, "_new_client", new_client)
+
+    async def _run():
+        # sk-a 요청이 진행 중일 때 sk-b가 sk-a 클라이언트를 LRU에서 밀어냄 → 끝난 뒤에 닫힘
+        a = asyncio.ensure_future(aembed(["a"], model=MODEL, api_key="sk-a"))
+        await asyncio.sleep(0.005)
+        openai_embed.get_async_client("sk-b")
+        assert not made[0].is_closed() and id(made[0]) in openai_embed._retired
+        await a
+        await aembed(["b"], model=MODEL, api_key="sk-b")
+        await asyncio.sleep(0)
+        await asyncio.gather(*openai_embed._closing)
+        closed = [c.is_closed() for c in made]
+        await openai_embed.close_clients()
+        return closed
+
+    assert asyncio.run(_run()) == [True, False]
+    assert all(c.is_closed() for c in made)
+    assert not openai_embed._retired and not openai_embed._in_use
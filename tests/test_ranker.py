@@ -0,0 +1,49 @@
+"""1단계 prefilter: 규칙 + 인기도 + 어휘 점수 상위 N권을 원래 순서로"""
+import numpy as np
+
+from app.core.ranker import W_LEX, W_POP, W_RULE, W_SEM, popularity, prefilter, rule_score
+
+CONS = {"max_pages": 300, "min_pubyear": 2015, "exclude_terms": ["살인"]}
+
+
+def _books(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [{
+        "isbn13": str(9790000000000 + i), "title": f"책 {i}",
+        "description": "살인 사건" if i % 7 == 0 else "따뜻한 일상",
+        "pubDate": f"{rng.integers(2000, 2025)}-01-01",
+        "customerReviewRank": int(rng.integers(0, 11)), "salesPoint": int(rng.integers(0, 20000)),
+        "subInfo": {"itemPage": int(rng.integers(100, 600))},
+    } for i in range(n)]
+
+
+def _expected(books, lexical, n):
+    # 도서별 스칼라 함수로 계산한 기준 점수 (의미 항 없이)
+    score = np.array([W_RULE * rule_score(b, CONS) + W_POP * popularity(b) for b in books])
+    if lexical is not None:
+        score += W_SEM * W_LEX * lexical / lexical.max()
+    return np.sort(np.argsort(-score, kind="stable")[:n])
+
+
+def test_prefilter_keeps_top_n_in_original_order():
+    books = _books(200)
+    keep = prefilter(books, CONS, 60)
+    assert len(keep) == 60 and np.all(np.diff(keep) > 0)
+    np.testing.assert_array_equal(keep, _expected(books, None, 60))
+
+
+def test_prefilter_uses_lexical_scores():
+    books = _books(200)
+    base = np.array([W_RULE * rule_score(b, CONS) + W_POP * popularity(b) for b in books])
+    dropped = int(np.argsort(-base, kind="stable")[30])  # 어휘 점수가 없으면 31번째라 탈락
+    lexical = np.random.default_rng(1).random(200) * 0.1
+    lexical[dropped] = 1.0
+    keep = prefilter(books, CONS, 30, lexical=lexical)
+    np.testing.assert_array_equal(keep, _expected(books, lexical, 30))
+    assert dropped in keep and dropped not in prefilter(books, CONS, 30)
+
+
+def test_prefilter_returns_everything_when_n_out_of_range():
+    books = _books(50)
+    for n in (0, -1, 50, 80):
+        np.testing.assert_array_equal(prefilter(books, CONS, n), np.arange(50))
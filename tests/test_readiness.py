@@ -0,0 +1,31 @@
+"""/readyz: 워밍업 비활성·openai(서버 키 없음)·지연 로드 후 준비 상태"""
+from app.core import nlp
+
+
+def test_ready_when_warmup_disabled(api, monkeypatch):
+    monkeypatch.setattr(nlp, "_ready", {})
+    client = api(EMBEDDING_WARMUP=False)
+    assert client.get("/readyz").status_code == 200
+
+
+def test_openai_without_server_key_becomes_ready(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(nlp, "_ready", {})
+    monkeypatch.setattr(settings, "EMBEDDING_WARMUP", True)
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "")
+    assert not nlp.is_ready("openai")
+    nlp.warmup("openai")
+    assert nlp.is_ready("openai")
+
+
+def test_ready_after_first_lazy_encode(monkeypatch, encoder):
+    from app.config import settings
+
+    monkeypatch.setattr(nlp, "_ready", {})
+    monkeypatch.setattr(settings, "EMBEDDING_WARMUP", True)
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "sbert")
+    # 워밍업이 실패한 뒤에도 요청 경로의 인코딩이 성공하면 복구
+    assert not nlp.is_ready()
+    nlp.embed_texts(["첫 요청"])
+    assert nlp.is_ready()
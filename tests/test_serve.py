@@ -0,0 +1,45 @@
+"""멀티 워커 preload: 스레드 수 적용 순서, 다른 이벤트 루프에서 저장소 재사용"""
+import asyncio
+
+from app import serve
+from app.core import nlp
+from app.services import catalogue, lexical_index, vector_index
+from app.services.catalogue import Catalogue
+
+
+def test_preload_limits_threads_after_imports(monkeypatch, tmp_path):
+    from app.config import settings
+
+    events = []
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "sbert")
+    monkeypatch.setattr(settings, "VECTOR_INDEX_ON_STARTUP", True)
+    monkeypatch.setattr(settings, "VECTOR_INDEX_TYPE", "hnsw")
+    monkeypatch.setattr(settings, "CATALOGUE_DB", str(tmp_path / "c.db"))
+    monkeypatch.setattr(catalogue, "_catalogue", None)
+    monkeypatch.setattr(lexical_index, "_lexical", None)
+    monkeypatch.setattr(nlp, "_get_sbert", lambda: events.append("model"))
+    monkeypatch.setattr(vector_index, "_faiss", lambda: events.append("faiss"))
+    monkeypatch.setattr(serve, "set_runtime_threads", lambda n: events.append(("threads", n)))
+
+    async def load_index(provider=None):
+        events.append("index")
+
+    monkeypatch.setattr(vector_index, "load_index", load_index)
+    serve.preload()
+    # torch/faiss가 import된 뒤, 인덱스 구축 전에 단일 스레드로
+    assert events == ["model", "faiss", ("threads", 1), "index"]
+
+
+def test_catalogue_usable_from_another_event_loop(tmp_path):
+    # preload의 asyncio.run에서 경합으로 락이 그 루프에 묶인 뒤 워커의 새 루프에서 다시 사용
+    cat = Catalogue(str(tmp_path / "c.db"))
+    books = [{"itemId": i, "isbn13": f"979{i:010d}", "title": f"책 {i}"} for i in range(1, 21)]
+
+    async def run(n):
+        await asyncio.gather(*(cat.upsert_books(books[i::4]) for i in range(4)))
+        got = await asyncio.gather(*(cat.load_books() for _ in range(n)))
+        await cat.close()
+        return [len(g) for g in got]
+
+    assert asyncio.run(run(4)) == [20] * 4
+    assert asyncio.run(run(4)) == [20] * 4
@@ -0,0 +1,88 @@
+"""면담 세션 저장소 + 면담 중 선행 후보 수집(prefetch)"""
+import re
+
+from app.core.interview import QUESTIONS
+
+GENRES = ["한국소설(2000년대 이후)", "에세이", "시", "추리/스릴러", "과학"]
+
+
+def _interview(client, narrative: str):
+    """Q1~Q8을 순서대로 답하고 세션 id 반환 (Q5 이후 매 답변마다 prefetch 시작/갱신)"""
+    answers = {
+        "Q1_SQUIN": {"answer": narrative},
+        "Q2_LENGTH": {"structured": {"length": "중간(~500쪽)"}},
+        "Q3_RECENCY": {"structured": {"recency": ["최신 선호(5년 이내)"]}},
+        "Q5_GENRE": {"genres": GENRES},
+        "Q7_NEG": {"answer": "잔혹 장면 X"},
+        "Q8_END": {"answer": "위로 일상"},
+    }
+    sid = None
+    for q in QUESTIONS:
+        body = {"qid": q["id"], "session_id": sid, **answers.get(q["id"], {})}
+        r = client.post("/interview/parse", json=body)
+        assert r.status_code == 200, r.text
+        sid = r.json()["session_id"]
+    return sid
+
+
+def test_interview_concurrent_with_prefetch(api, tmp_path):
+    # 세션·카탈로그·임베딩이 같은 SQLite 파일을 각자의 연결로 공유 (기본 설정과 동일)
+    db = str(tmp_path / "squin.db")
+    client = api(SESSION_DB=db, CATALOGUE_DB=db, EMBEDDING_DB=db, PREFETCH_WAIT_S=30.0)
+    for i in range(4):
+        sid = _interview(client, f"따뜻한 위로가 필요한 하루 {i}")
+        r = client.post("/recommend", params={"session_id": sid}, json={})
+        assert r.status_code == 200, r.text
+        assert r.json()["items"]
+        prefetch = re.search(r"prefetch;dur=([\d.]+)", r.headers["server-timing"])
+        assert prefetch and float(prefetch.group(1)) < 4000, r.headers["server-timing"]
+
+
+def test_session_ids_are_unguessable_tokens(api, tmp_path):
+    client = api(SESSION_DB=str(tmp_path / "s.db"), PREFETCH_ENABLED=False)
+    sids = [client.post("/interview/parse", json={"qid": "Q1_SQUIN", "answer": f"이야기 {i}"}).json()["session_id"]
+            for i in range(3)]
+    assert len(set(sids)) == 3
+    assert all(isinstance(s, str) and len(s) >= 32 for s in sids)
+    # 내부 정수 id로는 다른 사람의 세션에 접근할 수 없음
+    for guess in ("1", "2", "3"):
+        r = client.post("/interview/parse", json={"qid": "Q8_END", "answer": "x", "session_id": guess})
+        assert r.status_code == 404
+        assert client.post("/recommend", params={"session_id": guess}, json={}).status_code == 404
+
+
+def test_prefetch_not_shared_across_openai_keys():
+    from app.main import RecommendIn, _prefetch_key
+    a = RecommendIn(message="위로", embedding_provider="openai", openai_key="sk-a")
+    b = a.model_copy(update={"openai_key": "sk-b"})
+    assert _prefetch_key(a) != _prefetch_key(b)
+    assert _prefetch_key(a) == _prefetch_key(a.model_copy())
+    assert "sk-a" not in repr(_prefetch_key(a))
+
+
+def test_prefetch_key_tracks_constraints():
+    from app.main import RecommendIn, _prefetch_key
+    a = RecommendIn(message="위로", constraints={"genre_candidates": ["에세이"], "exclude_terms": ["잔혹"]})
+    assert _prefetch_key(a) != _prefetch_key(a.model_copy(update={"constraints": {"genre_candidates": ["에세이"]}}))
+    # 순서·중복만 다른 제약은 같은 키
+    b = a.model_copy(update={"constraints": {"exclude_terms": ["잔혹", "잔혹"], "genre_candidates": ["에세이"]}})
+    assert _prefetch_key(a) == _prefetch_key(b)
+
+
+def test_prefetch_not_used_when_constraints_change(api, tmp_path):
+    from app.core import metrics
+
+    client = api(SESSION_DB=str(tmp_path / "s.db"), PREFETCH_WAIT_S=30.0)
+    sid = _interview(client, "따뜻한 위로가 필요한 하루")
+    used, missed = metrics.PREFETCH.value(result="used"), metrics.PREFETCH.value(result="miss")
+    # Q7에서 모은 제외어와 다른 제약으로 추천 → 옛 제약으로 prefilter한 후보를 쓰지 않음
+    sess = client.post("/interview/parse", json={"qid": "Q8_END", "answer": "위로 일상", "session_id": sid}).json()
+    cons = {**sess["constraints"], "exclude_terms": ["이야기"]}
+    r = client.post("/recommend", params={"session_id": sid}, json={"constraints": cons})
+    assert r.status_code == 200, r.text
+    assert metrics.PREFETCH.value(result="miss") == missed + 1
+    assert metrics.PREFETCH.value(result="used") == used
+    # 같은 제약이면 선행 결과 사용
+    sid = _interview(client, "따뜻한 위로가 필요한 하루")
+    assert client.post("/recommend", params={"session_id": sid}, json={}).status_code == 200
+    assert metrics.PREFETCH.value(result="used") == used + 1